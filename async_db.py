@@ -13,14 +13,121 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/4/6 14:21
 # @Desc    : 异步Aiomysql的增删改查封装
-from typing import Any, Dict, List, Union
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
 
 import aiomysql
 
+from tools import utils
+
+
+# SQL 文本按 (表名, 字段集合) 缓存，每条记录只需绑定参数，不再重复拼接字段列表
+@lru_cache(maxsize=1024)
+def _build_insert_sql(table_name: str, fields: Tuple[str, ...]) -> str:
+    fieldstr = ','.join([f'`{field}`' for field in fields])
+    valstr = ','.join(['%s'] * len(fields))
+    return "INSERT INTO %s (%s) VALUES(%s)" % (table_name, fieldstr, valstr)
+
+
+@lru_cache(maxsize=1024)
+def _build_update_sql(table_name: str, fields: Tuple[str, ...], field_where: str) -> str:
+    upsets = ','.join(['`%s`=%%s' % field for field in fields])
+    return 'UPDATE %s SET %s WHERE `%s`=%%s' % (table_name, upsets, field_where)
+
+
+@lru_cache(maxsize=1024)
+def _build_upsert_sql(table_name: str, fields: Tuple[str, ...], update_exclude_fields: Tuple[str, ...]) -> str:
+    fieldstr = ','.join([f'`{field}`' for field in fields])
+    valstr = ','.join(['%s'] * len(fields))
+    update_fields = [field for field in fields if field not in update_exclude_fields]
+    updatestr = ','.join([f'`{field}`=VALUES(`{field}`)' for field in update_fields])
+    return "INSERT INTO %s (%s) VALUES(%s) ON DUPLICATE KEY UPDATE %s" % (table_name, fieldstr, valstr, updatestr)
+
+
+class PoolMetrics:
+    """
+    连接池等待指标，用来判断存储并发和连接池大小是否匹配：
+    平均/最大等待时间持续偏高说明连接池太小，可以调大 RELATION_DB_POOL_MAX_SIZE 或降低爬虫并发
+    """
+
+    def __init__(self) -> None:
+        self.acquire_count = 0
+        self.acquire_timeout_count = 0
+        self.ping_failure_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, wait: float) -> None:
+        self.acquire_count += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+    def snapshot(self) -> Dict[str, Union[int, float]]:
+        return {
+            "acquire_count": self.acquire_count,
+            "acquire_timeout_count": self.acquire_timeout_count,
+            "ping_failure_count": self.ping_failure_count,
+            "wait_avg_ms": round(self.wait_total / self.acquire_count * 1000, 3) if self.acquire_count else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+
 
 class AsyncMysqlDB:
-    def __init__(self, pool: aiomysql.Pool) -> None:
+    def __init__(self, pool: aiomysql.Pool, acquire_timeout: Optional[float] = None,
+                 pre_ping_interval: Optional[float] = None) -> None:
+        """
+        :param pool: aiomysql 连接池
+        :param acquire_timeout: 从连接池获取连接的超时时间（秒），为空时一直等待
+        :param pre_ping_interval: 连接空闲超过多少秒后，使用前先 ping 一次（断线自动重连），为空时不检查
+        """
         self.__pool = pool
+        self.__acquire_timeout = acquire_timeout
+        self.__pre_ping_interval = pre_ping_interval
+        self.metrics = PoolMetrics()
+
+    @asynccontextmanager
+    async def _acquire(self) -> AsyncIterator[aiomysql.Connection]:
+        """
+        从连接池获取一个连接，记录等待时间，按需做连接健康检查
+        :return:
+        """
+        start = time.perf_counter()
+        try:
+            conn = await asyncio.wait_for(self.__pool.acquire(), timeout=self.__acquire_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.acquire_timeout_count += 1
+            utils.logger.warning(
+                f"[AsyncMysqlDB._acquire] acquire connection timeout after {self.__acquire_timeout}s, "
+                f"pool stats: {self.pool_stats()}")
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        try:
+            if self.__pre_ping_interval is not None and \
+                    asyncio.get_running_loop().time() - conn.last_usage > self.__pre_ping_interval:
+                try:
+                    await conn.ping(reconnect=True)
+                except Exception:
+                    self.metrics.ping_failure_count += 1
+                    raise
+            yield conn
+        finally:
+            self.__pool.release(conn)
+
+    def pool_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        连接池当前状态和等待指标
+        :return:
+        """
+        stats: Dict[str, Union[int, float]] = {
+            "size": self.__pool.size,
+            "freesize": self.__pool.freesize,
+            "maxsize": self.__pool.maxsize,
+        }
+        stats.update(self.metrics.snapshot())
+        return stats
 
     async def query(self, sql: str, *args: Union[str, int]) -> List[Dict[str, Any]]:
         """
@@ -29,7 +136,7 @@ class AsyncMysqlDB:
         :param args: sql中传递动态参数列表
         :return:
         """
-        async with self.__pool.acquire() as conn:
+        async with self._acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 await cur.execute(sql, args)
                 data = await cur.fetchall()
@@ -42,7 +149,7 @@ class AsyncMysqlDB:
         :param args:sql中传递动态参数列表
         :return:
         """
-        async with self.__pool.acquire() as conn:
+        async with self._acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 await cur.execute(sql, args)
                 data = await cur.fetchone()
@@ -55,13 +162,9 @@ class AsyncMysqlDB:
         :param item: 一条记录的字典信息
         :return:
         """
-        fields = list(item.keys())
+        sql = _build_insert_sql(table_name, tuple(item.keys()))
         values = list(item.values())
-        fields = [f'`{field}`' for field in fields]
-        fieldstr = ','.join(fields)
-        valstr = ','.join(['%s'] * len(item))
-        sql = "INSERT INTO %s (%s) VALUES(%s)" % (table_name, fieldstr, valstr)
-        async with self.__pool.acquire() as conn:
+        async with self._acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 await cur.execute(sql, values)
                 lastrowid = cur.lastrowid
@@ -77,19 +180,10 @@ class AsyncMysqlDB:
         :param value_where: update 语句 where 条件中的字段值
         :return:
         """
-        upsets = []
-        values = []
-        for k, v in updates.items():
-            s = '`%s`=%%s' % k
-            upsets.append(s)
-            values.append(v)
-        upsets = ','.join(upsets)
-        sql = 'UPDATE %s SET %s WHERE %s="%s"' % (
-            table_name,
-            upsets,
-            field_where, value_where,
-        )
-        async with self.__pool.acquire() as conn:
+        sql = _build_update_sql(table_name, tuple(updates.keys()), field_where)
+        values = list(updates.values())
+        values.append(value_where)
+        async with self._acquire() as conn:
             async with conn.cursor() as cur:
                 rows = await cur.execute(sql, values)
                 return rows
@@ -101,7 +195,39 @@ class AsyncMysqlDB:
         :param args:
         :return:
         """
-        async with self.__pool.acquire() as conn:
+        async with self._acquire() as conn:
             async with conn.cursor() as cur:
                 rows = await cur.execute(sql, args)
                 return rows
+
+    @staticmethod
+    def build_upsert_sql(table_name: str, fields: Sequence[str], update_exclude_fields: Sequence[str] = ()) -> str:
+        """
+        构造 INSERT ... ON DUPLICATE KEY UPDATE 语句，依赖表上的唯一索引判断记录是否已存在
+        :param table_name: 表名
+        :param fields: 插入的字段
+        :param update_exclude_fields: 记录已存在时不更新的字段，例如 add_ts
+        :return:
+        """
+        return _build_upsert_sql(table_name, tuple(fields), tuple(update_exclude_fields))
+
+    async def batch_upsert(self, table_name: str, items: List[Dict[str, Any]],
+                           update_exclude_fields: Sequence[str] = ("add_ts",)) -> int:
+        """
+        批量插入或更新记录，字段相同的记录合并成一条多行 INSERT ... ON DUPLICATE KEY UPDATE 语句执行
+        :param table_name: 表名
+        :param items: 记录列表
+        :param update_exclude_fields: 记录已存在时不更新的字段
+        :return: 影响的行数
+        """
+        groups: Dict[Tuple[str, ...], List[List[Any]]] = {}
+        for item in items:
+            groups.setdefault(tuple(item.keys()), []).append(list(item.values()))
+
+        rows = 0
+        async with self._acquire() as conn:
+            async with conn.cursor() as cur:
+                for fields, values_list in groups.items():
+                    sql = self.build_upsert_sql(table_name, fields, update_exclude_fields)
+                    rows += await cur.executemany(sql, values_list)
+        return rows
@@ -10,7 +10,7 @@
 
 
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from playwright.async_api import BrowserContext, BrowserType
 
@@ -77,6 +77,40 @@ class AbstractStore(ABC):
     async def store_creator(self, creator: Dict):
         pass
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        store a page of contents, sinks that can write a page at once override this
+        """
+        for content_item in content_items:
+            await self.store_content(content_item)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        store a page of comments, sinks that can write a page at once override this
+        """
+        for comment_item in comment_items:
+            await self.store_comment(comment_item)
+
+    # 生命周期钩子：每次运行只创建一个存储实例（见 store/store_registry.py），
+    # 需要在多条数据之间复用缓冲区、文件句柄或数据库连接的存储实现按需重写
+    async def open(self):
+        """
+        open store resources before crawling
+        """
+        pass
+
+    async def flush(self):
+        """
+        flush buffered items
+        """
+        pass
+
+    async def close(self):
+        """
+        flush buffered items and release store resources after crawling
+        """
+        pass
+
 
 class AbstractStoreImage(ABC):
     # TODO: support all platform
@@ -51,3 +51,61 @@ class AbstractCache(ABC):
         :return:
         """
         raise NotImplementedError
+
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        批量获取键的值，返回值与 keys 一一对应，不存在的键为 None。
+        子类可以覆盖为一次往返的批量实现
+        :param keys: 键列表
+        :return:
+        """
+        return [self.get(key) for key in keys]
+
+
+class AbstractAsyncCache(ABC):
+    """
+    异步缓存，方法与 AbstractCache 相同但需要 await，网络缓存使用时不阻塞事件循环
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        从缓存中获取键的值
+        :param key: 键
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        将键的值设置到缓存中
+        :param key: 键
+        :param value: 值
+        :param expire_time: 过期时间
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合pattern的key
+        :param pattern: 匹配模式
+        :return:
+        """
+        raise NotImplementedError
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        批量获取键的值，返回值与 keys 一一对应，不存在的键为 None
+        :param keys: 键列表
+        :return:
+        """
+        return [await self.get(key) for key in keys]
+
+    async def close(self) -> None:
+        """
+        释放连接等资源
+        :return:
+        """
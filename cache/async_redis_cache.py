@@ -0,0 +1,119 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 基于 redis.asyncio 的异步 RedisCache 实现
+#            读写不阻塞事件循环，批量读写使用 MGET 和 pipeline，遍历键使用 SCAN
+
+from typing import Any, Dict, List, Optional
+
+from redis.asyncio import ConnectionPool, Redis
+
+from cache.abs_cache import AbstractAsyncCache
+from cache.codec import get_codec
+from config import db_config
+
+
+class AsyncRedisCache(AbstractAsyncCache):
+
+    def __init__(self) -> None:
+        self._pool = ConnectionPool(
+            host=db_config.REDIS_DB_HOST,
+            port=db_config.REDIS_DB_PORT,
+            db=db_config.REDIS_DB_NUM,
+            password=db_config.REDIS_DB_PWD,
+            max_connections=db_config.REDIS_MAX_CONNECTIONS,
+        )
+        self._redis_client = Redis(connection_pool=self._pool)
+        self._codec = get_codec(db_config.REDIS_CACHE_CODEC)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        从缓存中获取键的值, 并且反序列化
+        :param key:
+        :return:
+        """
+        value = await self._redis_client.get(key)
+        if value is None:
+            return None
+        return self._codec.loads(value)
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        将键的值设置到缓存中, 并且序列化
+        :param key:
+        :param value:
+        :param expire_time:
+        :return:
+        """
+        await self._redis_client.set(key, self._codec.dumps(value), ex=expire_time)
+
+    async def delete(self, *keys: str) -> None:
+        """
+        删除键
+        :param keys:
+        :return:
+        """
+        if keys:
+            await self._redis_client.delete(*keys)
+
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合pattern的key，使用 SCAN 分批遍历，不会像 KEYS 一样阻塞 redis
+        :param pattern:
+        :return:
+        """
+        return [key.decode() async for key in
+                self._redis_client.scan_iter(match=pattern, count=db_config.REDIS_SCAN_COUNT)]
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        使用 MGET 一次往返批量获取键的值，返回值与 keys 一一对应，不存在的键为 None
+        :param keys:
+        :return:
+        """
+        if not keys:
+            return []
+        return [None if value is None else self._codec.loads(value) for value in await self._redis_client.mget(keys)]
+
+    async def set_many(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        使用 pipeline 一次往返批量设置键的值
+        :param mapping: 键值对
+        :param expire_time: 过期时间
+        :return:
+        """
+        if not mapping:
+            return
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, self._codec.dumps(value), ex=expire_time)
+            await pipe.execute()
+
+    async def load_by_pattern(self, pattern: str) -> Dict[str, Any]:
+        """
+        SCAN 出所有符合pattern的key 后用 MGET 批量读取，扫描和读取之间过期的键会被跳过
+        :param pattern:
+        :return:
+        """
+        keys = await self.keys(pattern)
+        values = await self.get_many(keys)
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    async def close(self) -> None:
+        """
+        关闭客户端并断开连接池中的连接
+        :return:
+        """
+        await self._redis_client.close()
+        await self._pool.disconnect()
@@ -0,0 +1,106 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 缓存值的序列化
+#            默认使用 JSON（安装了 orjson 时使用 orjson），可选 msgpack；
+#            pickle 反序列化会执行任意代码，只为读取旧数据保留
+
+import json
+import pickle
+from abc import ABC, abstractmethod
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson 只是更快，没有时使用标准库 json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # 只有 msgpack 编码需要
+    msgpack = None
+
+
+class AbstractCodec(ABC):
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        """
+        把值序列化成字节
+        :param value: 值
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """
+        把字节反序列化成值
+        :param data: 字节
+        :return:
+        """
+        raise NotImplementedError
+
+
+class JsonCodec(AbstractCodec):
+
+    def dumps(self, value: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+
+class MsgpackCodec(AbstractCodec):
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise ImportError("msgpack codec requires msgpack, please run: pip install msgpack")
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+class PickleCodec(AbstractCodec):
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value)
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+CODECS = {
+    "json": JsonCodec,
+    "msgpack": MsgpackCodec,
+    "pickle": PickleCodec,
+}
+
+
+def get_codec(name: str) -> AbstractCodec:
+    """
+    按名称创建序列化器
+    :param name: json / msgpack / pickle
+    :return:
+    """
+    codec_class = CODECS.get(name)
+    if codec_class is None:
+        raise ValueError(f"Unknown cache codec: {name}, supported codecs: {list(CODECS)}")
+    return codec_class()
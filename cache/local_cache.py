@@ -16,22 +16,55 @@
 # @Desc    : 本地缓存
 
 import asyncio
+import bisect
+import heapq
 import time
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Tuple
 
 from cache.abs_cache import AbstractCache
 
 
+class CacheStats:
+    """
+    缓存命中指标，命中率持续偏低说明过期时间太短或 max_entries 太小
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def snapshot(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+        }
+
+
 class ExpiringLocalCache(AbstractCache):
 
-    def __init__(self, cron_interval: int = 10):
+    def __init__(self, cron_interval: int = 10, max_entries: Optional[int] = None):
         """
         初始化本地缓存
         :param cron_interval: 定时清楚cache的时间间隔
+        :param max_entries: 最多缓存多少个键，超过时淘汰最久未使用的键，为空时不限制
         :return:
         """
         self._cron_interval = cron_interval
-        self._cache_container: Dict[str, Tuple[Any, float]] = {}
+        self._max_entries = max_entries
+        # 按访问顺序排列，最久未使用的键在最前面
+        self._cache_container: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        # 过期时间小顶堆 (expire_time, key)，键被覆盖或删除后旧的堆元素留到弹出时再丢弃
+        self._expire_heap: List[Tuple[float, str]] = []
+        # 有序的键列表，用于前缀匹配；键集合变化后置空，下次前缀查询时再重建，不拖慢写入和淘汰
+        self._sorted_keys: Optional[List[str]] = None
+        self.stats = CacheStats()
         self._cron_task: Optional[asyncio.Task] = None
         # 开启定时清理任务
         self._schedule_clear()
@@ -44,21 +77,30 @@ class ExpiringLocalCache(AbstractCache):
         if self._cron_task is not None:
             self._cron_task.cancel()
 
+    def __len__(self) -> int:
+        return len(self._cache_container)
+
     def get(self, key: str) -> Optional[Any]:
         """
         从缓存中获取键的值
         :param key:
         :return:
         """
-        value, expire_time = self._cache_container.get(key, (None, 0))
-        if value is None:
+        entry = self._cache_container.get(key)
+        if entry is None:
+            self.stats.misses += 1
             return None
 
         # 如果键已过期，则删除键并返回None
+        value, expire_time = entry
         if expire_time < time.time():
-            del self._cache_container[key]
+            self._delete(key)
+            self.stats.expirations += 1
+            self.stats.misses += 1
             return None
 
+        self._cache_container.move_to_end(key)
+        self.stats.hits += 1
         return value
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
@@ -69,23 +111,71 @@ class ExpiringLocalCache(AbstractCache):
         :param expire_time:
         :return:
         """
-        self._cache_container[key] = (value, time.time() + expire_time)
+        if value is None:
+            # None 表示未命中，不缓存
+            self.delete(key)
+            return
+        expire_at = time.time() + expire_time
+        if key in self._cache_container:
+            self._cache_container.move_to_end(key)
+        else:
+            self._sorted_keys = None
+        self._cache_container[key] = (value, expire_at)
+        heapq.heappush(self._expire_heap, (expire_at, key))
+
+        if self._max_entries is not None:
+            while len(self._cache_container) > self._max_entries:
+                self._delete(next(iter(self._cache_container)))
+                self.stats.evictions += 1
+        # 反复覆盖同一个键会在堆中留下过期的元素，堆比缓存大太多时重建
+        if len(self._expire_heap) > 2 * len(self._cache_container) + 64:
+            self._rebuild_heap()
+
+    def delete(self, key: str) -> None:
+        """
+        删除键
+        :param key:
+        :return:
+        """
+        if key in self._cache_container:
+            self._delete(key)
 
     def keys(self, pattern: str) -> List[str]:
         """
         获取所有符合pattern的key
-        :param pattern: 匹配模式
+        :param pattern: 匹配模式，"*" 返回全部，"prefix*" 按前缀匹配，其他模式去掉 * 后按子串匹配
         :return:
         """
+        self._clear()
         if pattern == '*':
             return list(self._cache_container.keys())
 
+        prefix = pattern[:-1]
+        if pattern.endswith('*') and '*' not in prefix:
+            if self._sorted_keys is None:
+                self._sorted_keys = sorted(self._cache_container)
+            start = bisect.bisect_left(self._sorted_keys, prefix)
+            result = []
+            for key in self._sorted_keys[start:]:
+                if not key.startswith(prefix):
+                    break
+                result.append(key)
+            return result
+
         # 本地缓存通配符暂时将*替换为空
         if '*' in pattern:
             pattern = pattern.replace('*', '')
 
         return [key for key in self._cache_container.keys() if pattern in key]
 
+    def _delete(self, key: str) -> None:
+        del self._cache_container[key]
+        self._sorted_keys = None
+
+    def _rebuild_heap(self) -> None:
+        self._expire_heap = [(expire_time, key) for key, (_, expire_time) in self._cache_container.items()]
+        heapq.heapify(self._expire_heap)
+
     def _schedule_clear(self):
         """
         开启定时清理任务,
@@ -102,12 +192,17 @@ class ExpiringLocalCache(AbstractCache):
 
     def _clear(self):
         """
-        根据过期时间清理缓存
+        根据过期时间清理缓存，只弹出堆顶已过期的元素，不遍历整个缓存
         :return:
         """
-        for key, (value, expire_time) in self._cache_container.items():
-            if expire_time < time.time():
-                del self._cache_container[key]
+        now = time.time()
+        while self._expire_heap and self._expire_heap[0][0] < now:
+            expire_time, key = heapq.heappop(self._expire_heap)
+            entry = self._cache_container.get(key)
+            # 键已删除或已被重新设置过期时间时，堆中的这个元素已失效
+            if entry is not None and entry[1] == expire_time:
+                self._delete(key)
+                self.stats.expirations += 1
 
     async def _start_clear_cron(self):
         """
@@ -14,13 +14,13 @@
 # @Name    : 程序员阿江-Relakkes
 # @Time    : 2024/5/29 22:57
 # @Desc    : RedisCache实现
-import pickle
 import time
-from typing import Any, List
+from typing import Any, List, Optional
 
-from redis import Redis
+from redis import ConnectionPool, Redis
 
 from cache.abs_cache import AbstractCache
+from cache.codec import get_codec
 from config import db_config
 
 
@@ -29,6 +29,15 @@ class RedisCache(AbstractCache):
     def __init__(self) -> None:
         # 连接redis, 返回redis客户端
         self._redis_client = self._connet_redis()
+        self._codec = get_codec(db_config.REDIS_CACHE_CODEC)
+
+    @property
+    def redis_client(self) -> Redis:
+        """
+        底层的 redis 客户端，用于发布订阅等缓存接口之外的操作
+        :return:
+        """
+        return self._redis_client
 
     @staticmethod
     def _connet_redis() -> Redis:
@@ -36,12 +45,14 @@ class RedisCache(AbstractCache):
         连接redis, 返回redis客户端, 这里按需配置redis连接信息
         :return:
         """
-        return Redis(
+        pool = ConnectionPool(
             host=db_config.REDIS_DB_HOST,
             port=db_config.REDIS_DB_PORT,
             db=db_config.REDIS_DB_NUM,
             password=db_config.REDIS_DB_PWD,
+            max_connections=db_config.REDIS_MAX_CONNECTIONS,
         )
+        return Redis(connection_pool=pool)
 
     def get(self, key: str) -> Any:
         """
@@ -52,7 +63,7 @@ class RedisCache(AbstractCache):
         value = self._redis_client.get(key)
         if value is None:
             return None
-        return pickle.loads(value)
+        return self._codec.loads(value)
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
         """
@@ -62,13 +73,31 @@ class RedisCache(AbstractCache):
         :param expire_time:
         :return:
         """
-        self._redis_client.set(key, pickle.dumps(value), ex=expire_time)
+        self._redis_client.set(key, self._codec.dumps(value), ex=expire_time)
+
+    def delete(self, key: str) -> None:
+        """
+        删除键
+        :param key:
+        :return:
+        """
+        self._redis_client.delete(key)
 
     def keys(self, pattern: str) -> List[str]:
         """
-        获取所有符合pattern的key
+        获取所有符合pattern的key，使用 SCAN 分批遍历，不会像 KEYS 一样阻塞 redis
+        """
+        return [key.decode() for key in self._redis_client.scan_iter(match=pattern, count=db_config.REDIS_SCAN_COUNT)]
+
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        使用 MGET 一次往返批量获取键的值
+        :param keys:
+        :return:
         """
-        return [key.decode() for key in self._redis_client.keys(pattern)]
+        if not keys:
+            return []
+        return [None if value is None else self._codec.loads(value) for value in self._redis_client.mget(keys)]
 
 
 if __name__ == '__main__':
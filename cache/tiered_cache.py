@@ -0,0 +1,173 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 两级缓存：进程内的本地缓存（L1）+ redis（L2）
+#            读多写少的数据（签名参数、代理 IP、登录态等）优先从 L1 读取，L1 未命中时读 redis 并回填 L1；
+#            redis 中不存在的键也会在 L1 短暂缓存（负缓存），避免反复穿透到 redis；
+#            写入和删除通过 redis 发布订阅通知同一 redis 上的其他爬虫进程删除各自 L1 中的旧值
+
+import uuid
+from collections import deque
+from typing import Any, Deque, List, Optional
+
+from cache.abs_cache import AbstractCache
+from cache.local_cache import ExpiringLocalCache
+from cache.redis_cache import RedisCache
+from config import db_config
+from tools import utils
+
+# 负缓存的占位值，表示该键在 redis 中不存在
+_NOT_FOUND = object()
+
+
+class TieredCache(AbstractCache):
+
+    def __init__(self, l1_ttl: int = db_config.TIERED_CACHE_L1_TTL,
+                 l1_max_entries: int = db_config.TIERED_CACHE_L1_MAX_ENTRIES,
+                 negative_ttl: int = db_config.TIERED_CACHE_NEGATIVE_TTL,
+                 channel: str = db_config.TIERED_CACHE_INVALIDATION_CHANNEL):
+        """
+        :param l1_ttl: 本地缓存的过期时间（秒），也是没有收到失效通知时其他进程读到旧值的最长时间
+        :param l1_max_entries: 本地缓存最多缓存多少个键
+        :param negative_ttl: redis 中不存在的键在本地缓存多少秒，为 0 时不做负缓存
+        :param channel: 失效通知的发布订阅频道
+        """
+        self._l1_ttl = l1_ttl
+        self._negative_ttl = negative_ttl
+        self._channel = channel
+        self._l1 = ExpiringLocalCache(cron_interval=max(l1_ttl, 1), max_entries=l1_max_entries)
+        self._l2 = RedisCache()
+        # 本实例的标识，收到自己发布的失效通知时忽略
+        self._instance_id = uuid.uuid4().hex
+        # 订阅线程收到的待失效键，在调用方线程中删除，本地缓存只在一个线程中访问
+        self._invalidated_keys: Deque[str] = deque()
+        self._pubsub = None
+        self._pubsub_thread = None
+        self._subscribe()
+
+    @property
+    def stats(self):
+        return self._l1.stats
+
+    def _subscribe(self) -> None:
+        try:
+            self._pubsub = self._l2.redis_client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self._channel: self._on_invalidate})
+            self._pubsub_thread = self._pubsub.run_in_thread(sleep_time=1, daemon=True,
+                                                             exception_handler=self._on_pubsub_error)
+        except Exception as e:
+            # 订阅失败时只依赖 L1 的过期时间
+            utils.logger.warning(f"[TieredCache._subscribe] subscribe {self._channel} failed, "
+                                 f"local cache entries will only expire by ttl: {e}")
+            self._pubsub = None
+
+    def _on_invalidate(self, message) -> None:
+        instance_id, _, key = message["data"].decode().partition(" ")
+        if instance_id != self._instance_id:
+            self._invalidated_keys.append(key)
+
+    @staticmethod
+    def _on_pubsub_error(e: Exception, pubsub, pubsub_thread) -> None:
+        utils.logger.warning(f"[TieredCache._on_pubsub_error] invalidation listener stopped, "
+                             f"local cache entries will only expire by ttl: {e}")
+        pubsub_thread.stop()
+
+    def _publish_invalidation(self, key: str) -> None:
+        try:
+            self._l2.redis_client.publish(self._channel, f"{self._instance_id} {key}")
+        except Exception as e:
+            utils.logger.warning(f"[TieredCache._publish_invalidation] publish invalidation of {key} failed: {e}")
+
+    def _apply_invalidations(self) -> None:
+        while self._invalidated_keys:
+            self._l1.delete(self._invalidated_keys.popleft())
+
+    def _fill_l1(self, key: str, value: Optional[Any]) -> None:
+        if value is not None:
+            self._l1.set(key, value, self._l1_ttl)
+        elif self._negative_ttl > 0:
+            self._l1.set(key, _NOT_FOUND, self._negative_ttl)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        先读本地缓存，未命中时读 redis 并回填本地缓存
+        :param key:
+        :return:
+        """
+        self._apply_invalidations()
+        value = self._l1.get(key)
+        if value is not None:
+            return None if value is _NOT_FOUND else value
+        value = self._l2.get(key)
+        self._fill_l1(key, value)
+        return value
+
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        本地缓存未命中的键一次 MGET 从 redis 读取
+        :param keys:
+        :return:
+        """
+        self._apply_invalidations()
+        values = [self._l1.get(key) for key in keys]
+        missing_keys = [key for key, value in zip(keys, values) if value is None]
+        l2_values = dict(zip(missing_keys, self._l2.get_many(missing_keys)))
+        for key, value in l2_values.items():
+            self._fill_l1(key, value)
+        return [None if value is _NOT_FOUND else l2_values[key] if value is None else value
+                for key, value in zip(keys, values)]
+
+    def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        写入 redis 和本地缓存，并通知其他进程删除本地缓存中的旧值
+        :param key:
+        :param value:
+        :param expire_time:
+        :return:
+        """
+        self._apply_invalidations()
+        self._l2.set(key, value, expire_time)
+        self._l1.set(key, value, min(expire_time, self._l1_ttl))
+        self._publish_invalidation(key)
+
+    def delete(self, key: str) -> None:
+        """
+        删除 redis 和本地缓存中的键，并通知其他进程
+        :param key:
+        :return:
+        """
+        self._apply_invalidations()
+        self._l2.delete(key)
+        self._l1.delete(key)
+        self._publish_invalidation(key)
+
+    def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合pattern的key，以 redis 为准
+        :param pattern: 匹配模式
+        :return:
+        """
+        return self._l2.keys(pattern)
+
+    def close(self) -> None:
+        """
+        停止失效通知的订阅线程
+        :return:
+        """
+        if self._pubsub_thread is not None:
+            self._pubsub_thread.stop()
+            self._pubsub_thread = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
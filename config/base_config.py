@@ -34,6 +34,41 @@ IP_PROXY_POOL_COUNT = 2
 # 代理IP提供商名称
 IP_PROXY_PROVIDER_NAME = "kuaidaili"
 
+# 提取到的代理 IP 缓存在哪里：memory 只在当前进程内复用；async_redis 存到 redis 中，多个爬虫进程共享未过期的 IP，
+# 读写不阻塞事件循环，需要先配置 db_config 中的 redis 连接
+IP_PROXY_CACHE_TYPE = "memory"
+
+# 验证代理 IP 是否可用的地址，测试时可以换成本地的服务
+IP_PROXY_VALIDATE_URL = "https://httpbin.org/ip"
+
+# 验证代理 IP 的超时时间（秒）
+IP_PROXY_VALIDATE_TIMEOUT = 5
+
+# 同时验证的代理 IP 数量
+IP_PROXY_VALIDATE_CONCURRENCY = 10
+
+# 代理 IP 距离过期不足多少秒时不再分配
+IP_PROXY_EXPIRE_MARGIN = 30
+
+# 代理健康度：延迟和成功率的 EWMA 平滑系数，越大越看重最近的请求
+IP_PROXY_HEALTH_EWMA_ALPHA = 0.3
+
+# 代理连续失败多少次后隔离
+IP_PROXY_MAX_CONSECUTIVE_FAILURES = 3
+
+# 代理成功率（EWMA）低于多少时隔离
+IP_PROXY_MIN_SUCCESS_RATE = 0.5
+
+# 代理隔离时长（秒），每多被封禁一次隔离时长翻倍
+IP_PROXY_QUARANTINE_SECONDS = 300
+
+# 代理被封禁多少次后不再使用
+IP_PROXY_MAX_BLOCK_COUNT = 3
+
+# 计为代理请求失败的响应状态码，限流、签名或 cookie 失效时也会返回这些状态码，只会临时隔离，不会永久弃用代理；
+# 明确的 IP 封禁信号（如小红书 IP 异常错误码、B 站 -412）由平台客户端调用 report_blocked 记录
+IP_PROXY_FAILURE_STATUS_CODES = (403, 418, 429, 461, 471)
+
 # 设置为True不会打开浏览器（无头浏览器）
 # 设置False会打开一个浏览器
 # 小红书如果一直扫码登录不通过，打开浏览器手动过一下滑动验证码
@@ -44,7 +79,41 @@ HEADLESS = False
 SAVE_LOGIN_STATE = True
 
 # 数据保存类型选项配置,支持三种类型：csv、db、json, 最好保存到DB，有排重的功能。
-SAVE_DATA_OPTION = "json"  # csv or db or json
+SAVE_DATA_OPTION = "json"  # csv or db or json or jsonl or sqlite or parquet
+
+# jsonl 存储配置：每条数据追加一行，缓冲区达到行数或时间间隔时批量写盘
+# 缓冲区行数阈值
+JSONL_FLUSH_LINES = 100
+# 写盘时间间隔(秒)
+JSONL_FLUSH_INTERVAL = 1.0
+# 爬虫结束时是否把 jsonl 文件导出为旧版的 json 数组文件（data/xxx/json 目录下）
+JSONL_EXPORT_JSON_ON_CLOSE = True
+
+# csv 存储配置：文件句柄在运行期间保持打开，缓冲区达到行数或时间间隔时批量写盘
+# 缓冲区行数阈值
+CSV_FLUSH_LINES = 100
+# 写盘时间间隔(秒)
+CSV_FLUSH_INTERVAL = 1.0
+
+# sqlite 存储配置：适合没有 MySQL 的单机部署，WAL 模式，所有写入由单个写入任务批量提交
+# 数据库文件路径，所有平台共用一个库，表结构见 schema/sqlite_tables.sql
+SQLITE_DB_PATH = "data/sqlite/media_crawler.db"
+# 每个事务最多写入多少条记录
+SQLITE_BATCH_SIZE = 500
+# 写入队列长度（一页数据算一次写入），队列满时存储协程等待，避免写入跟不上时内存无限增长
+SQLITE_QUEUE_SIZE = 10000
+
+# parquet 存储配置：列式存储，便于下游批量分析，需要安装 pyarrow（pip install pyarrow，或 pip install -r requirements-optional.txt）
+# 每个 row group 的行数，攒够后写入文件
+PARQUET_ROW_GROUP_SIZE = 5000
+# 单个文件超过多少 MB 后滚动到下一个分片
+PARQUET_MAX_FILE_SIZE_MB = 128
+# 压缩算法：zstd、snappy、gzip 或 none
+PARQUET_COMPRESSION = "zstd"
+
+# 所有存储定时把缓冲区中的数据写出的间隔(秒)，限制进程异常退出时丢失的数据量，设置为 0 关闭；
+# parquet 存储只写出凑满 PARQUET_ROW_GROUP_SIZE 的 row group，剩余数据在爬虫结束时写入
+STORE_FLUSH_INTERVAL = 60
 
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
@@ -58,6 +127,54 @@ CRAWLER_MAX_NOTES_COUNT = 200
 # 并发爬虫数量控制
 MAX_CONCURRENCY_NUM = 1
 
+# HTTP 连接池配置，一次爬虫运行内所有请求共享同一个长连接池
+# 是否开启 HTTP/2，需要安装 h2 依赖(pip install httpx[http2]，或 pip install -r requirements-optional.txt)，未安装时自动退回 HTTP/1.1
+ENABLE_HTTP2 = True
+# 连接池最大连接数
+HTTP_MAX_CONNECTIONS = 100
+# 连接池最大保持 keep-alive 的空闲连接数
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+# keep-alive 空闲连接的过期时间(秒)
+HTTP_KEEPALIVE_EXPIRY = 30
+# 单个 host 的最大并发连接数, 0 表示不限制
+HTTP_MAX_CONNECTIONS_PER_HOST = 10
+
+# 搜索模式下同时处理的关键词数量，每个关键词独立分页、独立 search_id
+MAX_KEYWORD_CONCURRENCY_NUM = 3
+
+# 搜索模式流水线配置：搜索页 -> 详情 -> 评论/存储 各阶段通过有界队列衔接，各自独立并发
+# 各阶段队列长度，队列满时上游阶段等待，避免数据在内存中堆积
+PIPELINE_QUEUE_SIZE = 50
+# 详情阶段并发 worker 数
+PIPELINE_DETAIL_WORKER_NUM = MAX_CONCURRENCY_NUM
+# 评论阶段并发 worker 数
+PIPELINE_COMMENT_WORKER_NUM = MAX_CONCURRENCY_NUM
+# 存储阶段并发 worker 数
+PIPELINE_STORE_WORKER_NUM = 1
+
+# 请求限速配置，按 (平台, 接口) 维度的令牌桶，所有 API 请求都会经过限速器
+# 请求成功时速率线性增加，出现验证码、IP 封禁等信号时速率成倍下降(AIMD)
+# 初始速率(每秒请求数)
+RATE_LIMIT_INITIAL_QPS = 1.0
+# 最低速率(每秒请求数)
+RATE_LIMIT_MIN_QPS = 0.1
+# 最高速率(每秒请求数)
+RATE_LIMIT_MAX_QPS = 5.0
+# 令牌桶容量，即允许的突发请求数
+RATE_LIMIT_BURST = 1
+# 每次请求成功后速率的增量
+RATE_LIMIT_INCREASE_STEP = 0.05
+# 被限流后速率的缩减系数
+RATE_LIMIT_DECREASE_FACTOR = 0.5
+# 按平台覆盖上面的限速配置，key 为平台名称，可覆盖 INITIAL_QPS、MIN_QPS、MAX_QPS、BURST
+# 微博对API的限流比较严重，初始速率与原来每页随机延时 1~3 秒相当，最高不超过每秒 1 次
+RATE_LIMIT_PLATFORM_OVERRIDES = {
+    "wb": {"INITIAL_QPS": 0.3, "MAX_QPS": 1.0},
+}
+
+# JS 签名常驻 Node worker 进程数量（抖音、头条 a_bogus 签名，知乎 x-zse-96 签名）
+SIGN_JS_WORKER_NUM = 2
+
 # 是否开启爬图片模式, 默认不开启爬图片
 ENABLE_GET_IMAGES = False
 
@@ -187,3 +304,9 @@ STOP_WORDS_FILE = "./docs/hit_stopwords.txt"
 
 # 中文字体文件路径
 FONT_PATH = "./docs/STZHONGS.TTF"
+
+# 词频文件和词云图的写入间隔（秒），期间新增的数据合并后写一次，爬虫结束时会再写一次
+WORDCLOUD_FLUSH_INTERVAL = 30
+
+# 分词使用的进程数，为 0 时在当前进程的线程池中分词
+WORDCLOUD_CUT_PROCESS_NUM = 1
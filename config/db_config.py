@@ -20,12 +20,60 @@ RELATION_DB_NAME = os.getenv("RELATION_DB_NAME", "media_crawler")
 
 RELATION_DB_URL = f"mysql://{RELATION_DB_USER}:{RELATION_DB_PWD}@{RELATION_DB_HOST}:{RELATION_DB_PORT}/{RELATION_DB_NAME}"
 
+# 数据库连接池最小/最大连接数，最大连接数建议不小于存储并发（MAX_CONCURRENCY_NUM 及批量写入的表数量）
+RELATION_DB_POOL_MIN_SIZE = int(os.getenv("RELATION_DB_POOL_MIN_SIZE", 1))
+RELATION_DB_POOL_MAX_SIZE = int(os.getenv("RELATION_DB_POOL_MAX_SIZE", 10))
+
+# 连接使用超过多少秒后回收重建，需小于 MySQL 的 wait_timeout，-1 表示不回收
+RELATION_DB_POOL_RECYCLE = int(os.getenv("RELATION_DB_POOL_RECYCLE", 3600))
+
+# 从连接池获取连接的超时时间（秒），连接池被占满时超时报错而不是无限等待
+RELATION_DB_ACQUIRE_TIMEOUT = float(os.getenv("RELATION_DB_ACQUIRE_TIMEOUT", 30))
+
+# 连接空闲超过多少秒后，使用前先 ping 一次（断线自动重连），设置为 0 关闭检查
+RELATION_DB_PRE_PING_INTERVAL = float(os.getenv("RELATION_DB_PRE_PING_INTERVAL", 60)) or None
+
+# 关闭连接池时等待正在使用的连接归还的最长时间（秒），超时后强制关闭
+RELATION_DB_CLOSE_TIMEOUT = float(os.getenv("RELATION_DB_CLOSE_TIMEOUT", 10))
+
+# 数据库批量写入：每张表攒够多少条记录写一次库
+DB_BATCH_SIZE = 100
+
+# 数据库批量写入：最长多少毫秒写一次库
+DB_FLUSH_INTERVAL_MS = 1000
+
+# 数据库批量写入：同一批记录连续写库失败多少次后丢弃（丢弃前会在日志中记录这批数据）
+DB_FLUSH_MAX_RETRIES = 3
+
 # redis config
 REDIS_DB_HOST = "127.0.0.1"  # your redis host
 REDIS_DB_PWD = os.getenv("REDIS_DB_PWD", "123456")  # your redis password
 REDIS_DB_PORT = os.getenv("REDIS_DB_PORT", 6379)  # your redis port
 REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
 
+# redis 连接池最大连接数
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 20))
+
+# redis 缓存值的序列化方式：json（默认，安装了 orjson 时使用 orjson）、msgpack（需要 pip install msgpack，或 pip install -r requirements-optional.txt）、pickle（仅用于读取旧数据）
+REDIS_CACHE_CODEC = os.getenv("REDIS_CACHE_CODEC", "json")
+
+# SCAN 每次迭代建议返回的键数量
+REDIS_SCAN_COUNT = 500
+
 # cache type
 CACHE_TYPE_REDIS = "redis"
-CACHE_TYPE_MEMORY = "memory"
\ No newline at end of file
+CACHE_TYPE_MEMORY = "memory"
+CACHE_TYPE_ASYNC_REDIS = "async_redis"
+CACHE_TYPE_TIERED = "tiered"
+
+# 两级缓存（tiered）：本地缓存的过期时间（秒），没有收到失效通知时其他进程最多读到这么久之前的旧值
+TIERED_CACHE_L1_TTL = 5
+
+# 两级缓存：本地缓存最多缓存多少个键
+TIERED_CACHE_L1_MAX_ENTRIES = 10000
+
+# 两级缓存：redis 中不存在的键在本地缓存多少秒（负缓存），为 0 时不做负缓存
+TIERED_CACHE_NEGATIVE_TTL = 2
+
+# 两级缓存：写入和删除时通知其他进程的发布订阅频道
+TIERED_CACHE_INVALIDATION_CHANNEL = "media_crawler:cache:invalidate"
\ No newline at end of file
@@ -54,10 +54,17 @@ async def init_mediacrawler_db():
     """
     db_conn_params = parse_mysql_url(config.RELATION_DB_URL)
     pool = await aiomysql.create_pool(
+        minsize=config.RELATION_DB_POOL_MIN_SIZE,
+        maxsize=config.RELATION_DB_POOL_MAX_SIZE,
+        pool_recycle=config.RELATION_DB_POOL_RECYCLE,
         autocommit=True,
         **db_conn_params
     )
-    async_db_obj = AsyncMysqlDB(pool)
+    async_db_obj = AsyncMysqlDB(
+        pool,
+        acquire_timeout=config.RELATION_DB_ACQUIRE_TIMEOUT,
+        pre_ping_interval=config.RELATION_DB_PRE_PING_INTERVAL,
+    )
 
     # 将连接池对象和封装的CRUD sql接口对象放到上下文变量中
     db_conn_pool_var.set(pool)
@@ -77,14 +84,23 @@ async def init_db():
 
 async def close():
     """
-    关闭连接池
+    关闭连接池，等待正在使用的连接归还后再退出
     Returns:
 
     """
     utils.logger.info("[close] close mediacrawler db pool")
+    async_db_obj: AsyncMysqlDB = media_crawler_db_var.get()
+    if async_db_obj is not None:
+        utils.logger.info(f"[close] mediacrawler db pool stats: {async_db_obj.pool_stats()}")
     db_pool: aiomysql.Pool = db_conn_pool_var.get()
     if db_pool is not None:
         db_pool.close()
+        try:
+            await asyncio.wait_for(db_pool.wait_closed(), timeout=config.RELATION_DB_CLOSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            utils.logger.warning("[close] wait for db connections released timeout, terminate the pool")
+            db_pool.terminate()
+            await db_pool.wait_closed()
 
 
 async def init_table_schema():
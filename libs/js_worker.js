@@ -0,0 +1,52 @@
+// 常驻 JS 签名 worker，由 tools/js_worker_pool.py 启动
+// 启动参数为签名脚本路径，加载后按行读取 stdin 中的 JSON 请求，按行向 stdout 写出 JSON 结果
+// 请求: {"id": 1, "fn": "sign_datail", "args": ["...", "..."]}
+// 响应: {"id": 1, "result": "..."} 或 {"id": 1, "error": "..."}
+const fs = require('fs');
+const vm = require('vm');
+const readline = require('readline');
+
+// stdout 只用于协议通信，脚本内的日志统一打到 stderr
+console.log = console.error;
+console.info = console.error;
+
+const scriptPath = process.argv[2];
+globalThis.require = require;
+vm.runInThisContext(fs.readFileSync(scriptPath, 'utf-8').replace(/^\uFEFF/, ''), {filename: scriptPath});
+
+const FN_NAME_RE = /^[A-Za-z_$][\w$]*$/;
+
+function invoke(fn, args) {
+    if (!FN_NAME_RE.test(fn)) {
+        throw new Error(`invalid function name: ${fn}`);
+    }
+    // 通过名字解析全局函数，兼容 function 声明和顶层 const/let 绑定
+    const func = vm.runInThisContext(fn);
+    if (typeof func !== 'function') {
+        throw new Error(`${fn} is not a function`);
+    }
+    return func.apply(null, args || []);
+}
+
+const rl = readline.createInterface({input: process.stdin, terminal: false});
+rl.on('line', (line) => {
+    if (!line) {
+        return;
+    }
+    let req;
+    try {
+        req = JSON.parse(line);
+    } catch (e) {
+        return;
+    }
+    let resp;
+    try {
+        resp = {id: req.id, result: invoke(req.fn, req.args)};
+    } catch (e) {
+        resp = {id: req.id, error: String(e && e.stack || e)};
+    }
+    process.stdout.write(JSON.stringify(resp) + '\n');
+});
+rl.on('close', () => process.exit(0));
+
+process.stdout.write(JSON.stringify({id: 0, result: 'ready'}) + '\n');
@@ -15,7 +15,7 @@ import sys
 import cmd_arg
 import config
 import db
-from base.base_crawler import AbstractCrawler
+from base.base_crawler import AbstractCrawler, AbstractStore
 from media_platform.bilibili import BilibiliCrawler
 from media_platform.douyin import DouYinCrawler
 from media_platform.kuaishou import KuaishouCrawler
@@ -24,6 +24,18 @@ from media_platform.weibo import WeiboCrawler
 from media_platform.xhs import XiaoHongShuCrawler
 from media_platform.zhihu import ZhihuCrawler
 from media_platform.toutiao import ToutiaoCrawler
+from proxy.proxy_ip_pool import close_ip_pool
+from store.bilibili import BiliStoreFactory
+from store.douyin import DouyinStoreFactory
+from store.kuaishou import KuaishouStoreFactory
+from store.store_registry import close_stores, open_stores
+from store.tieba import TieBaStoreFactory
+from store.toutiao import ToutiaoStoreFactory
+from store.weibo import WeibostoreFactory
+from store.xhs import XhsStoreFactory
+from store.zhihu import ZhihuStoreFactory
+from tools.http_client import close_async_clients
+from tools.js_worker_pool import close_js_worker_pools
 
 
 class CrawlerFactory:
@@ -46,6 +58,26 @@ class CrawlerFactory:
         return crawler_class()
 
 
+class StoreFactory:
+    STORES = {
+        "xhs": XhsStoreFactory,
+        "dy": DouyinStoreFactory,
+        "ks": KuaishouStoreFactory,
+        "bili": BiliStoreFactory,
+        "wb": WeibostoreFactory,
+        "tieba": TieBaStoreFactory,
+        "zhihu": ZhihuStoreFactory,
+        "toutiao": ToutiaoStoreFactory
+    }
+
+    @staticmethod
+    def create_store(platform: str) -> AbstractStore:
+        store_factory = StoreFactory.STORES.get(platform)
+        if not store_factory:
+            raise ValueError("Invalid Media Platform Currently only supported xhs or dy or ks or bili ...")
+        return store_factory.create_store()
+
+
 async def main():
     # parse cmd
     await cmd_arg.parse_cmd()
@@ -55,7 +87,18 @@ async def main():
         await db.init_db()
 
     crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
-    await crawler.start()
+    # the store instance is created once per run and shared by all items
+    StoreFactory.create_store(platform=config.PLATFORM)
+    await open_stores()
+    try:
+        await crawler.start()
+    finally:
+        # stop the proxy pool background refill, close shared http connection pool and js sign workers
+        await close_ip_pool()
+        await close_async_clients()
+        await close_js_worker_pools()
+        # flush buffered items and close the stores, db rows are flushed before the connection pool is closed
+        await close_stores()
 
     if config.SAVE_DATA_OPTION == "db":
         await db.close()
@@ -15,16 +15,19 @@
 # @Desc    : bilibili 请求客户端
 import asyncio
 import json
+import time
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 from base.base_crawler import AbstractApiClient
+from proxy.proxy_ip_pool import refresh_proxies
 from tools import utils
+from tools.http_client import get_async_client
+from tools.rate_limiter import get_rate_limiter
 
-from .exception import DataFetchError
+from .exception import AccountBlockError, DataFetchError, IPBlockError
 from .field import CommentOrderType, SearchOrderType
 from .help import BilibiliSign
 
@@ -45,17 +48,42 @@ class BilibiliClient(AbstractApiClient):
         self._host = "https://api.bilibili.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        # wbi 的 img_key、sub_key 大约每天轮换一次，缓存签名对象，过期或被服务端拒绝时再刷新
+        self.wbi_keys_ttl = 6 * 60 * 60
+        self.WBI_SIGN_REJECT_CODES = (-352, -403)
+        # -352 风控校验失败，-412 请求被拦截
+        self.THROTTLED_CODES = (-352, -412)
+        self.IP_BLOCKED_CODE = -412
+        # -101 账号未登录（cookie 失效）
+        self.NOT_LOGIN_CODE = -101
+        self._wbi_sign: Optional[BilibiliSign] = None
+        self._wbi_sign_expire_at = 0.0
+        self._wbi_refresh_lock = asyncio.Lock()
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
+        rate_limiter = get_rate_limiter("bili", url)
+        await rate_limiter.acquire()
+        self.proxies = await refresh_proxies(self.proxies)
+        client = get_async_client(self.proxies)
+        response = await client.request(
+            method, url, timeout=self.timeout,
+            **kwargs
+        )
         data: Dict = response.json()
         if data.get("code") != 0:
+            if data.get("code") in self.WBI_SIGN_REJECT_CODES:
+                # w_rid 校验失败多半是 wbi key 已经轮换，下次签名时重新获取
+                self.invalidate_wbi_sign()
+            if data.get("code") in self.THROTTLED_CODES:
+                rate_limiter.on_throttled()
+            if data.get("code") == self.IP_BLOCKED_CODE:
+                client.report_blocked()
+                raise IPBlockError(data.get("message", "request was blocked"))
+            if data.get("code") == self.NOT_LOGIN_CODE:
+                raise AccountBlockError(data.get("message", "account not login"))
             raise DataFetchError(data.get("message", "unkonw error"))
         else:
+            rate_limiter.on_success()
             return data.get("data", {})
 
     async def pre_request_data(self, req_data: Dict) -> Dict:
@@ -68,8 +96,30 @@ class BilibiliClient(AbstractApiClient):
         """
         if not req_data:
             return {}
-        img_key, sub_key = await self.get_wbi_keys()
-        return BilibiliSign(img_key, sub_key).sign(req_data)
+        wbi_sign = await self.get_wbi_sign()
+        return wbi_sign.sign(req_data)
+
+    async def get_wbi_sign(self) -> BilibiliSign:
+        """
+        获取缓存的 wbi 签名对象，过期后只允许一个协程去刷新 key，其余协程等待刷新结果
+        :return:
+        """
+        if self._wbi_sign is not None and time.time() < self._wbi_sign_expire_at:
+            return self._wbi_sign
+        async with self._wbi_refresh_lock:
+            if self._wbi_sign is None or time.time() >= self._wbi_sign_expire_at:
+                img_key, sub_key = await self.get_wbi_keys()
+                self._wbi_sign = BilibiliSign(img_key, sub_key)
+                self._wbi_sign_expire_at = time.time() + self.wbi_keys_ttl
+            return self._wbi_sign
+
+    def invalidate_wbi_sign(self):
+        """
+        使缓存的 wbi key 失效
+        :return:
+        """
+        self._wbi_sign = None
+        self._wbi_sign_expire_at = 0.0
 
     async def get_wbi_keys(self) -> Tuple[str, str]:
         """
@@ -125,6 +175,7 @@ class BilibiliClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self.invalidate_wbi_sign()
 
     async def search_video_by_keyword(self, keyword: str, page: int = 1, page_size: int = 20,
                                       order: SearchOrderType = SearchOrderType.DEFAULT,
@@ -192,13 +243,14 @@ class BilibiliClient(AbstractApiClient):
         return await self.get(uri, params, enable_params_sign=True)
 
     async def get_video_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(f"[BilibiliClient.get_video_media] request {url} err, res:{response.text}")
-                return None
-            else:
-                return response.content
+        self.proxies = await refresh_proxies(self.proxies)
+        client = get_async_client(self.proxies)
+        response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
+        if not response.reason_phrase == "OK":
+            utils.logger.error(f"[BilibiliClient.get_video_media] request {url} err, res:{response.text}")
+            return None
+        else:
+            return response.content
 
     async def get_video_comments(self,
                                  video_id: str,
@@ -221,13 +273,12 @@ class BilibiliClient(AbstractApiClient):
         }
         return await self.get(uri, post_data)
 
-    async def get_video_all_comments(self, video_id: str, crawl_interval: float = 1.0, is_fetch_sub_comments=False,
+    async def get_video_all_comments(self, video_id: str, is_fetch_sub_comments=False,
                                      callback: Optional[Callable] = None,
                                      max_count: int = 10,):
         """
         get video all comments include sub comments
         :param video_id:
-        :param crawl_interval:
         :param is_fetch_sub_comments:
         :param callback:
         max_count: 一次笔记爬取的最大评论数量
@@ -250,13 +301,12 @@ class BilibiliClient(AbstractApiClient):
                     if (comment.get("rcount", 0) > 0):
                         {
                             await self.get_video_all_level_two_comments(
-                                video_id, comment_id, CommentOrderType.DEFAULT, 10, crawl_interval,  callback)
+                                video_id, comment_id, CommentOrderType.DEFAULT, 10, callback)
                         }
             if len(result) + len(comment_list) > max_count:
                 comment_list = comment_list[:max_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
             if not is_fetch_sub_comments:
                 result.extend(comment_list)
                 continue
@@ -267,7 +317,6 @@ class BilibiliClient(AbstractApiClient):
                                                level_one_comment_id: int,
                                                order_mode: CommentOrderType,
                                                ps: int = 10,
-                                               crawl_interval: float = 1.0,
                                                callback: Optional[Callable] = None,
                                                ) -> Dict:
         """
@@ -276,7 +325,6 @@ class BilibiliClient(AbstractApiClient):
         :param level_one_comment_id: 一级评论 ID
         :param order_mode:
         :param ps: 一页评论数
-        :param crawl_interval:
         :param callback:
         :return:
         """
@@ -288,7 +336,6 @@ class BilibiliClient(AbstractApiClient):
             comment_list: List[Dict] = result.get("replies", [])
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
             if (int(result["page"]["count"]) <= pn * ps):
                 break
 
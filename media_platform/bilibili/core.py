@@ -16,7 +16,6 @@
 
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple, Union
 
@@ -28,10 +27,11 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.pipeline import CrawlerPipeline, fan_out_keywords
+from var import crawler_type_var
 
 from .client import BilibiliClient
-from .exception import DataFetchError
+from .exception import AccountBlockError, DataFetchError, IPBlockError
 from .field import SearchOrderType
 from .login import BilibiliLogin
 
@@ -105,21 +105,31 @@ class BilibiliCrawler(AbstractCrawler):
         bili_limit_count = 20  # bilibili limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < bili_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = bili_limit_count
-        start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(
-                f"[BilibiliCrawler.search] Current search keyword: {keyword}")
-            page = 1
+        # 视频详情（含视频媒体下载）和评论请求的并发上限由所有关键词共享，而不是每个关键词各一份
+        self.search_detail_semaphore = asyncio.Semaphore(config.PIPELINE_DETAIL_WORKER_NUM)
+        self.search_comment_semaphore = asyncio.Semaphore(config.PIPELINE_COMMENT_WORKER_NUM)
+        await fan_out_keywords(config.KEYWORDS.split(","), self.search_by_keyword)
+
+    async def search_by_keyword(self, keyword: str) -> None:
+        """
+        search videos of one keyword page by page and hand them to this keyword's detail -> store / comment pipeline
+        :param keyword:
+        :return:
+        """
+        bili_limit_count = 20  # bilibili limit page fixed value
+        start_page = config.START_PAGE
+        utils.logger.info(
+            f"[BilibiliCrawler.search_by_keyword] Current search keyword: {keyword}")
+        page = 1
+        async with self.create_search_pipeline(keyword) as pipeline:
             while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(
-                        f"[BilibiliCrawler.search] Skip page: {page}")
+                        f"[BilibiliCrawler.search_by_keyword] Skip page: {page}")
                     page += 1
                     continue
 
-                utils.logger.info(f"[BilibiliCrawler.search] search bilibili keyword: {keyword}, page: {page}")
-                video_id_list: List[str] = []
+                utils.logger.info(f"[BilibiliCrawler.search_by_keyword] search bilibili keyword: {keyword}, page: {page}")
                 videos_res = await self.bili_client.search_video_by_keyword(
                     keyword=keyword,
                     page=page,
@@ -129,22 +139,39 @@ class BilibiliCrawler(AbstractCrawler):
                     pubtime_end_s=0 # 作品发布日期结束日期时间戳
                 )
                 video_list: List[Dict] = videos_res.get("result")
-
-                semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                task_list = [
-                    self.get_video_info_task(aid=video_item.get(
-                        "aid"), bvid="", semaphore=semaphore)
-                    for video_item in video_list
-                ]
-                video_items = await asyncio.gather(*task_list)
-                for video_item in video_items:
-                    if video_item:
-                        video_id_list.append(video_item.get("View").get("aid"))
-                        await bilibili_store.update_bilibili_video(video_item)
-                        await bilibili_store.update_up_info(video_item)
-                        await self.get_bilibili_video(video_item, semaphore)
+                for video_item in video_list:
+                    await pipeline.put(video_item)
                 page += 1
-                await self.batch_get_video_comments(video_id_list)
+
+    def create_search_pipeline(self, keyword: str) -> CrawlerPipeline:
+        """
+        search result pipeline: search item -> video detail -> store / comments, each stage runs concurrently
+        :param keyword:
+        :return:
+        """
+        detail_semaphore = self.search_detail_semaphore
+        comment_semaphore = self.search_comment_semaphore
+
+        async def fetch_detail(video_item: Dict) -> Optional[Dict]:
+            video_detail = await self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=detail_semaphore)
+            if video_detail:
+                await self.get_bilibili_video(video_detail, detail_semaphore)
+            return video_detail
+
+        async def store_video(video_detail: Dict) -> None:
+            await bilibili_store.update_bilibili_video(video_detail)
+            await bilibili_store.update_up_info(video_detail)
+
+        async def fetch_comments(video_detail: Dict) -> None:
+            await self.get_comments(video_detail.get("View").get("aid"), comment_semaphore)
+
+        pipeline = CrawlerPipeline(f"bili-search-{keyword}", queue_size=config.PIPELINE_QUEUE_SIZE,
+                                   fatal_exceptions=(IPBlockError, AccountBlockError))
+        pipeline.add_stage("detail", fetch_detail, config.PIPELINE_DETAIL_WORKER_NUM)
+        pipeline.add_stage("store", store_video, config.PIPELINE_STORE_WORKER_NUM, upstreams=["detail"])
+        if config.ENABLE_GET_COMMENTS:
+            pipeline.add_stage("comment", fetch_comments, config.PIPELINE_COMMENT_WORKER_NUM, upstreams=["detail"])
+        return pipeline
 
     async def batch_get_video_comments(self, video_id_list: List[str]):
         """
@@ -180,7 +207,6 @@ class BilibiliCrawler(AbstractCrawler):
                     f"[BilibiliCrawler.get_comments] begin get video_id: {video_id} comments ...")
                 await self.bili_client.get_video_all_comments(
                     video_id=video_id,
-                    crawl_interval=random.random(),
                     is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
                     callback=bilibili_store.batch_update_bilibili_video_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
@@ -189,6 +215,8 @@ class BilibiliCrawler(AbstractCrawler):
             except DataFetchError as ex:
                 utils.logger.error(
                     f"[BilibiliCrawler.get_comments] get video_id: {video_id} comment error: {ex}")
+            except (IPBlockError, AccountBlockError):
+                raise
             except Exception as e:
                 utils.logger.error(
                     f"[BilibiliCrawler.get_comments] may be been blocked, err:{e}")
@@ -207,7 +235,6 @@ class BilibiliCrawler(AbstractCrawler):
                 video_bvids_list.append(video["bvid"])
             if (int(result["page"]["count"]) <= pn * ps):
                 break
-            await asyncio.sleep(random.random())
             pn += 1
         await self.get_specified_videos(video_bvids_list)
 
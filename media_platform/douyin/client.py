@@ -9,17 +9,18 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 
-import asyncio
 import copy
 import json
 import urllib.parse
 from typing import Any, Callable, Dict, Optional
 
-import requests
 from playwright.async_api import BrowserContext
 
 from base.base_crawler import AbstractApiClient
+from proxy.proxy_ip_pool import refresh_proxies
 from tools import utils
+from tools.http_client import get_async_client
+from tools.rate_limiter import get_rate_limiter
 from var import request_keyword_var
 
 from .exception import *
@@ -93,15 +94,20 @@ class DOUYINClient(AbstractApiClient):
 
     async def request(self, method, url, **kwargs):
         response = None
-        if method == "GET":
-            response = requests.request(method, url, **kwargs)
-        elif method == "POST":
-            response = requests.request(method, url, **kwargs)
+        rate_limiter = get_rate_limiter("dy", url)
+        if method in ("GET", "POST"):
+            await rate_limiter.acquire()
+            self.proxies = await refresh_proxies(self.proxies)
+            client = get_async_client(self.proxies)
+            response = await client.request(method, url, timeout=self.timeout, follow_redirects=True, **kwargs)
+        if response.text == "" or response.text == "blocked":
+            utils.logger.error(f"request params incrr, response.text: {response.text}")
+            rate_limiter.on_throttled()
+            raise AccountBlockError("account blocked")
         try:
-            if response.text == "" or response.text == "blocked":
-                utils.logger.error(f"request params incrr, response.text: {response.text}")
-                raise Exception("account blocked")
-            return response.json()
+            data = response.json()
+            rate_limiter.on_success()
+            return data
         except Exception as e:
             raise DataFetchError(f"{e}, {response.text}")
 
@@ -227,7 +233,6 @@ class DOUYINClient(AbstractApiClient):
     async def get_aweme_all_comments(
             self,
             aweme_id: str,
-            crawl_interval: float = 1.0,
             is_fetch_sub_comments=False,
             callback: Optional[Callable] = None,
             max_count: int = 10,
@@ -235,7 +240,6 @@ class DOUYINClient(AbstractApiClient):
         """
         获取帖子的所有评论，包括子评论
         :param aweme_id: 帖子ID
-        :param crawl_interval: 抓取间隔
         :param is_fetch_sub_comments: 是否抓取子评论
         :param callback: 回调函数，用于处理抓取到的评论
         :param max_count: 一次帖子爬取的最大评论数量
@@ -257,7 +261,6 @@ class DOUYINClient(AbstractApiClient):
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(aweme_id, comments)
 
-            await asyncio.sleep(crawl_interval)
             if not is_fetch_sub_comments:
                 continue
             # 获取二级评论
@@ -280,7 +283,6 @@ class DOUYINClient(AbstractApiClient):
                         result.extend(sub_comments)
                         if callback:  # 如果有回调函数，就执行回调函数
                             await callback(aweme_id, sub_comments)
-                        await asyncio.sleep(crawl_interval)
         return result
 
     async def get_user_info(self, sec_user_id: str):
@@ -11,7 +11,6 @@
 
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -23,10 +22,11 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import douyin as douyin_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.pipeline import CrawlerPipeline, fan_out_keywords
+from var import crawler_type_var
 
 from .client import DOUYINClient
-from .exception import DataFetchError
+from .exception import AccountBlockError, DataFetchError
 from .field import PublishTimeType
 from .login import DouYinLogin
 
@@ -89,33 +89,44 @@ class DouYinCrawler(AbstractCrawler):
         dy_limit_count = 10  # douyin limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < dy_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = dy_limit_count
-        start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[DouYinCrawler.search] Current keyword: {keyword}")
-            aweme_list: List[str] = []
-            page = 0
-            dy_search_id = ""
+        # 搜索结果已包含作品详情，只有评论需要限制并发，评论信号量由所有关键词的流水线共用
+        self.search_comment_semaphore = asyncio.Semaphore(config.PIPELINE_COMMENT_WORKER_NUM)
+        await fan_out_keywords(config.KEYWORDS.split(","), self.search_by_keyword)
+
+    async def search_by_keyword(self, keyword: str) -> None:
+        """
+        search awemes of one keyword, the logid of each page is sent as search_id of the next page,
+        search results already carry the aweme detail and go straight to the store / comment pipeline
+        :param keyword:
+        :return:
+        """
+        dy_limit_count = 10  # douyin limit page fixed value
+        start_page = config.START_PAGE
+        utils.logger.info(f"[DouYinCrawler.search_by_keyword] Current keyword: {keyword}")
+        aweme_list: List[str] = []
+        page = 0
+        dy_search_id = ""
+        async with self.create_search_pipeline(keyword) as pipeline:
             while (page - start_page + 1) * dy_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
-                    utils.logger.info(f"[DouYinCrawler.search] Skip {page}")
+                    utils.logger.info(f"[DouYinCrawler.search_by_keyword] Skip {page}")
                     page += 1
                     continue
                 try:
-                    utils.logger.info(f"[DouYinCrawler.search] search douyin keyword: {keyword}, page: {page}")
+                    utils.logger.info(f"[DouYinCrawler.search_by_keyword] search douyin keyword: {keyword}, page: {page}")
                     posts_res = await self.dy_client.search_info_by_keyword(keyword=keyword,
                                                                             offset=page * dy_limit_count - dy_limit_count,
                                                                             publish_time=PublishTimeType(config.PUBLISH_TIME_TYPE),
                                                                             search_id=dy_search_id
                                                                             )
                 except DataFetchError:
-                    utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed")
+                    utils.logger.error(f"[DouYinCrawler.search_by_keyword] search douyin keyword: {keyword} failed")
                     break
 
                 page += 1
                 if "data" not in posts_res:
                     utils.logger.error(
-                        f"[DouYinCrawler.search] search douyin keyword: {keyword} failed，账号也许被风控了。")
+                        f"[DouYinCrawler.search_by_keyword] search douyin keyword: {keyword} failed，账号也许被风控了。")
                     break
                 dy_search_id = posts_res.get("extra", {}).get("logid", "")
                 for post_item in posts_res.get("data"):
@@ -125,9 +136,27 @@ class DouYinCrawler(AbstractCrawler):
                     except TypeError:
                         continue
                     aweme_list.append(aweme_info.get("aweme_id", ""))
-                    await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
-            utils.logger.info(f"[DouYinCrawler.search] keyword:{keyword}, aweme_list:{aweme_list}")
-            await self.batch_get_note_comments(aweme_list)
+                    await pipeline.put(aweme_info)
+        utils.logger.info(f"[DouYinCrawler.search_by_keyword] keyword:{keyword}, aweme_list:{aweme_list}")
+
+    def create_search_pipeline(self, keyword: str) -> CrawlerPipeline:
+        """
+        搜索结果流水线：搜索结果中已包含作品详情，直接分发到存储与评论阶段，各阶段独立并发
+        """
+        comment_semaphore = self.search_comment_semaphore
+
+        async def store_aweme(aweme_info: Dict) -> None:
+            await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
+
+        async def fetch_comments(aweme_info: Dict) -> None:
+            await self.get_comments(aweme_info.get("aweme_id", ""), comment_semaphore)
+
+        pipeline = CrawlerPipeline(f"dy-search-{keyword}", queue_size=config.PIPELINE_QUEUE_SIZE,
+                                   fatal_exceptions=(AccountBlockError,))
+        pipeline.add_stage("store", store_aweme, config.PIPELINE_STORE_WORKER_NUM)
+        if config.ENABLE_GET_COMMENTS:
+            pipeline.add_stage("comment", fetch_comments, config.PIPELINE_COMMENT_WORKER_NUM)
+        return pipeline
 
     async def get_specified_awemes(self):
         """Get the information and comments of the specified post"""
@@ -177,7 +206,6 @@ class DouYinCrawler(AbstractCrawler):
                 # 将关键词列表传递给 get_aweme_all_comments 方法
                 await self.dy_client.get_aweme_all_comments(
                     aweme_id=aweme_id,
-                    crawl_interval=random.random(),
                     is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
                     callback=douyin_store.batch_update_dy_aweme_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
@@ -18,3 +18,7 @@ class DataFetchError(RequestError):
 
 class IPBlockError(RequestError):
     """fetch so fast that the server block us ip"""
+
+
+class AccountBlockError(RequestError):
+    """account is blocked or login state is expired"""
@@ -20,6 +20,9 @@ import random
 import execjs
 from playwright.async_api import Page
 
+import config
+from tools.js_worker_pool import get_js_worker_pool
+
 douyin_sign_obj = execjs.compile(open('libs/douyin.js', encoding='utf-8-sig').read())
 
 def get_web_id():
@@ -48,7 +51,7 @@ async def get_a_bogus(url: str, params: str, post_data: dict, user_agent: str, p
     """
     获取 a_bogus 参数, 目前不支持post请求类型的签名
     """
-    return get_a_bogus_from_js(url, params, user_agent)
+    return await get_a_bogus_from_js_pool(url, params, user_agent)
 
 def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     """
@@ -67,6 +70,24 @@ def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     return douyin_sign_obj.call(sign_js_name, params, user_agent)
 
 
+async def get_a_bogus_from_js_pool(url: str, params: str, user_agent: str):
+    """
+    通过常驻 Node worker 池获取 a_bogus 参数，不阻塞事件循环
+    Args:
+        url:
+        params:
+        user_agent:
+
+    Returns:
+
+    """
+    sign_js_name = "sign_datail"
+    if "/reply" in url:
+        sign_js_name = "sign_reply"
+    sign_pool = get_js_worker_pool("libs/douyin.js", worker_num=config.SIGN_JS_WORKER_NUM)
+    return await sign_pool.call(sign_js_name, params, user_agent)
+
+
 
 async def get_a_bogus_from_playright(params: str, post_data: dict, user_agent: str, page: Page):
     """
@@ -10,19 +10,20 @@
 
 
 # -*- coding: utf-8 -*-
-import asyncio
 import json
 from typing import Any, Callable, Dict, List, Optional
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 import config
 from base.base_crawler import AbstractApiClient
+from proxy.proxy_ip_pool import refresh_proxies
 from tools import utils
+from tools.http_client import get_async_client
+from tools.rate_limiter import get_rate_limiter
 
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from .graphql import KuaiShouGraphQL
 
 
@@ -45,15 +46,23 @@ class KuaiShouClient(AbstractApiClient):
         self.graphql = KuaiShouGraphQL()
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
+        rate_limiter = get_rate_limiter("ks", url)
+        await rate_limiter.acquire()
+        self.proxies = await refresh_proxies(self.proxies)
+        client = get_async_client(self.proxies)
+        response = await client.request(
+            method, url, timeout=self.timeout,
+            **kwargs
+        )
+        if response.status_code in (403, 429):
+            rate_limiter.on_throttled()
+            # 被风控拦截时返回的不是 json 数据，继续请求只会一直失败
+            raise IPBlockError(f"request blocked, status code: {response.status_code}, url: {url}")
         data: Dict = response.json()
         if data.get("errors"):
             raise DataFetchError(data.get("errors", "unkonw error"))
         else:
+            rate_limiter.on_success()
             return data.get("data", {})
 
     async def get(self, uri: str, params=None) -> Dict:
@@ -187,14 +196,12 @@ class KuaiShouClient(AbstractApiClient):
     async def get_video_all_comments(
         self,
         photo_id: str,
-        crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
     ):
         """
         get video all comments include sub comments
         :param photo_id:
-        :param crawl_interval:
         :param callback:
         :param max_count:
         :return:
@@ -213,9 +220,8 @@ class KuaiShouClient(AbstractApiClient):
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(photo_id, comments)
             result.extend(comments)
-            await asyncio.sleep(crawl_interval)
             sub_comments = await self.get_comments_all_sub_comments(
-                comments, photo_id, crawl_interval, callback
+                comments, photo_id, callback
             )
             result.extend(sub_comments)
         return result
@@ -224,7 +230,6 @@ class KuaiShouClient(AbstractApiClient):
         self,
         comments: List[Dict],
         photo_id,
-        crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
     ) -> List[Dict]:
         """
@@ -232,7 +237,6 @@ class KuaiShouClient(AbstractApiClient):
         Args:
             comments: 评论列表
             photo_id: 视频id
-            crawl_interval: 爬取一次评论的延迟单位（秒）
             callback: 一次评论爬取结束后
         Returns:
 
@@ -266,7 +270,6 @@ class KuaiShouClient(AbstractApiClient):
                 comments = vision_sub_comment_list.get("subComments", {})
                 if callback:
                     await callback(photo_id, comments)
-                await asyncio.sleep(crawl_interval)
                 result.extend(comments)
         return result
 
@@ -282,14 +285,12 @@ class KuaiShouClient(AbstractApiClient):
     async def get_all_videos_by_creator(
         self,
         user_id: str,
-        crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
     ) -> List[Dict]:
         """
         获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
         Args:
             user_id: 用户ID
-            crawl_interval: 爬取一次的延迟单位（秒）
             callback: 一次分页爬取结束后的更新回调函数
         Returns:
 
@@ -315,6 +316,5 @@ class KuaiShouClient(AbstractApiClient):
 
             if callback:
                 await callback(videos)
-            await asyncio.sleep(crawl_interval)
             result.extend(videos)
         return result
@@ -11,7 +11,6 @@
 
 import asyncio
 import os
-import random
 import time
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
@@ -24,10 +23,11 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import kuaishou as kuaishou_store
 from tools import utils
-from var import comment_tasks_var, crawler_type_var, source_keyword_var
+from tools.pipeline import CrawlerPipeline, fan_out_keywords
+from var import comment_tasks_var, crawler_type_var
 
 from .client import KuaiShouClient
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from .login import KuaishouLogin
 
 
@@ -94,38 +94,63 @@ class KuaishouCrawler(AbstractCrawler):
         ks_limit_count = 20  # kuaishou limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < ks_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = ks_limit_count
+        # 搜索结果已带视频信息，只有评论阶段需要限流，多个关键词并发时共用这一个评论信号量
+        self.search_comment_semaphore = asyncio.Semaphore(config.PIPELINE_COMMENT_WORKER_NUM)
+        await fan_out_keywords(config.KEYWORDS.split(","), self.search_by_keyword)
+
+    async def search_by_keyword(self, keyword: str) -> None:
+        """
+        search videos of one keyword with the page number as pcursor,
+        search results already carry the video info and go straight to the store / comment pipeline
+        :param keyword:
+        :return:
+        """
+        ks_limit_count = 20  # kuaishou limit page fixed value
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[KuaishouCrawler.search] Current search keyword: {keyword}")
-            page = 1
+        utils.logger.info(f"[KuaishouCrawler.search_by_keyword] Current search keyword: {keyword}")
+        page = 1
+        async with self.create_search_pipeline(keyword) as pipeline:
             while (page - start_page + 1) * ks_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
-                    utils.logger.info(f"[KuaishouCrawler.search] Skip page: {page}")
+                    utils.logger.info(f"[KuaishouCrawler.search_by_keyword] Skip page: {page}")
                     page += 1
                     continue
-                utils.logger.info(f"[KuaishouCrawler.search] search kuaishou keyword: {keyword}, page: {page}")
-                video_id_list: List[str] = []
+                utils.logger.info(f"[KuaishouCrawler.search_by_keyword] search kuaishou keyword: {keyword}, page: {page}")
                 videos_res = await self.ks_client.search_info_by_keyword(
                     keyword=keyword,
                     pcursor=str(page),
                 )
                 if not videos_res:
-                    utils.logger.error(f"[KuaishouCrawler.search] search info by keyword:{keyword} not found data")
+                    utils.logger.error(f"[KuaishouCrawler.search_by_keyword] search info by keyword:{keyword} not found data")
                     continue
 
                 vision_search_photo: Dict = videos_res.get("visionSearchPhoto")
                 if vision_search_photo.get("result") != 1:
-                    utils.logger.error(f"[KuaishouCrawler.search] search info by keyword:{keyword} not found data ")
+                    utils.logger.error(f"[KuaishouCrawler.search_by_keyword] search info by keyword:{keyword} not found data ")
                     continue
 
                 for video_detail in vision_search_photo.get("feeds"):
-                    video_id_list.append(video_detail.get("photo", {}).get("id"))
-                    await kuaishou_store.update_kuaishou_video(video_item=video_detail)
-
-                # batch fetch video comments
+                    await pipeline.put(video_detail)
                 page += 1
-                await self.batch_get_video_comments(video_id_list)
+
+    def create_search_pipeline(self, keyword: str) -> CrawlerPipeline:
+        """
+        搜索结果流水线：搜索结果中已包含视频详情，直接分发到存储与评论阶段，各阶段独立并发
+        """
+        comment_semaphore = self.search_comment_semaphore
+
+        async def store_video(video_detail: Dict) -> None:
+            await kuaishou_store.update_kuaishou_video(video_item=video_detail)
+
+        async def fetch_comments(video_detail: Dict) -> None:
+            await self.get_comments(video_detail.get("photo", {}).get("id"), comment_semaphore)
+
+        pipeline = CrawlerPipeline(f"ks-search-{keyword}", queue_size=config.PIPELINE_QUEUE_SIZE,
+                                   fatal_exceptions=(IPBlockError,))
+        pipeline.add_stage("store", store_video, config.PIPELINE_STORE_WORKER_NUM)
+        if config.ENABLE_GET_COMMENTS:
+            pipeline.add_stage("comment", fetch_comments, config.PIPELINE_COMMENT_WORKER_NUM)
+        return pipeline
 
     async def get_specified_videos(self):
         """Get the information and comments of the specified post"""
@@ -185,12 +210,13 @@ class KuaishouCrawler(AbstractCrawler):
                 utils.logger.info(f"[KuaishouCrawler.get_comments] begin get video_id: {video_id} comments ...")
                 await self.ks_client.get_video_all_comments(
                     photo_id=video_id,
-                    crawl_interval=random.random(),
                     callback=kuaishou_store.batch_update_ks_video_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
                 )
             except DataFetchError as ex:
                 utils.logger.error(f"[KuaishouCrawler.get_comments] get video_id: {video_id} comment error: {ex}")
+            except IPBlockError:
+                raise
             except Exception as e:
                 utils.logger.error(f"[KuaishouCrawler.get_comments] may be been blocked, err:{e}")
                 # use time.sleeep block main coroutine instead of asyncio.sleep and cacel running comment task
@@ -274,7 +300,6 @@ class KuaishouCrawler(AbstractCrawler):
             # Get all video information of the creator
             all_video_list = await self.ks_client.get_all_videos_by_creator(
                 user_id = user_id,
-                crawl_interval = random.random(),
                 callback = self.fetch_creator_video_detail
             )
 
@@ -14,15 +14,17 @@ import json
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext
 from tenacity import RetryError, retry, stop_after_attempt, wait_fixed
 
 import config
 from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from proxy.proxy_health import get_proxies_url
 from proxy.proxy_ip_pool import ProxyIpPool
 from tools import utils
+from tools.http_client import get_async_client, retire_proxy_clients
+from tools.rate_limiter import get_rate_limiter
 
 from .field import SearchNoteType, SearchSortType
 from .help import TieBaExtractor
@@ -59,22 +61,30 @@ class BaiduTieBaClient(AbstractApiClient):
         Returns:
 
         """
+        if not proxies and self.ip_pool and self.default_ip_proxy:
+            # 默认代理过期或被隔离后换成池中健康的代理
+            self.default_ip_proxy = await self.ip_pool.refresh_proxies(self.default_ip_proxy)
         actual_proxies = proxies if proxies else self.default_ip_proxy
-        async with httpx.AsyncClient(proxies=actual_proxies) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                headers=self.headers, **kwargs
-            )
+        rate_limiter = get_rate_limiter("tieba", url)
+        await rate_limiter.acquire()
+        client = get_async_client(actual_proxies)
+        response = await client.request(
+            method, url, timeout=self.timeout,
+            headers=self.headers, **kwargs
+        )
 
         if response.status_code != 200:
             utils.logger.error(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
             utils.logger.error(f"Request failed, response: {response.text}")
+            rate_limiter.on_throttled()
             raise Exception(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
 
         if response.text == "" or response.text == "blocked":
             utils.logger.error(f"request params incrr, response.text: {response.text}")
+            rate_limiter.on_throttled()
             raise Exception("account blocked")
 
+        rate_limiter.on_success()
         if return_ori_content:
             return response.text
 
@@ -108,6 +118,9 @@ class BaiduTieBaClient(AbstractApiClient):
                                          return_ori_content=return_ori_content,
                                          proxies=proxies,
                                          **kwargs)
+                if get_proxies_url(self.default_ip_proxy) != get_proxies_url(proxies):
+                    # 换了新代理，旧代理的连接池不再使用
+                    retire_proxy_clients(get_proxies_url(self.default_ip_proxy))
                 self.default_ip_proxy = proxies
                 return res
 
@@ -203,7 +216,7 @@ class BaiduTieBaClient(AbstractApiClient):
         page_content = await self.get(uri, return_ori_content=True)
         return self._page_extractor.extract_note_detail(page_content)
 
-    async def get_note_all_comments(self, note_detail: TiebaNote, crawl_interval: float = 1.0,
+    async def get_note_all_comments(self, note_detail: TiebaNote,
                                     callback: Optional[Callable] = None,
                                     max_count: int = 10,
                                     ) -> List[TiebaComment]:
@@ -211,7 +224,6 @@ class BaiduTieBaClient(AbstractApiClient):
         获取指定帖子下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
         Args:
             note_detail: 帖子详情对象
-            crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后
             max_count: 一次帖子爬取的最大评论数量
         Returns:
@@ -235,18 +247,16 @@ class BaiduTieBaClient(AbstractApiClient):
                 await callback(note_detail.note_id, comments)
             result.extend(comments)
             # 获取所有子评论
-            await self.get_comments_all_sub_comments(comments, crawl_interval=crawl_interval, callback=callback)
-            await asyncio.sleep(crawl_interval)
+            await self.get_comments_all_sub_comments(comments, callback=callback)
             current_page += 1
         return result
 
-    async def get_comments_all_sub_comments(self, comments: List[TiebaComment], crawl_interval: float = 1.0,
+    async def get_comments_all_sub_comments(self, comments: List[TiebaComment],
                                             callback: Optional[Callable] = None) -> List[TiebaComment]:
         """
         获取指定评论下的所有子评论
         Args:
             comments: 评论列表
-            crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后
 
         Returns:
@@ -283,7 +293,6 @@ class BaiduTieBaClient(AbstractApiClient):
                 if callback:
                     await callback(parment_comment.note_id, sub_comments)
                 all_sub_comments.extend(sub_comments)
-                await asyncio.sleep(crawl_interval)
                 current_page += 1
         return all_sub_comments
 
@@ -333,14 +342,13 @@ class BaiduTieBaClient(AbstractApiClient):
         return await self.get(uri, params=params)
 
     async def get_all_notes_by_creator_user_name(self,
-                                                 user_name: str, crawl_interval: float = 1.0,
+                                                 user_name: str,
                                                  callback: Optional[Callable] = None,
                                                  max_note_count: int = 0) -> List[TiebaNote]:
         """
         根据创作者用户名获取创作者所有帖子
         Args:
             user_name: 创作者用户名
-            crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后的回调函数，是一个awaitable类型的函数
             max_note_count: 帖子最大获取数量，如果为0则获取所有
 
@@ -368,7 +376,6 @@ class BaiduTieBaClient(AbstractApiClient):
             notes = await asyncio.gather(*note_detail_task)
             if callback:
                 await callback(notes)
-            await asyncio.sleep(crawl_interval)
             result.extend(notes)
             page_number += 1
             total_get_count += page_per_count
@@ -11,7 +11,6 @@
 
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -24,8 +23,9 @@ from model.m_baidu_tieba import TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import tieba as tieba_store
 from tools import utils
+from tools.pipeline import fan_out_keywords
 from tools.crawler_util import format_proxy_info
-from var import crawler_type_var, source_keyword_var
+from var import crawler_type_var
 
 from .client import BaiduTieBaClient
 from .field import SearchNoteType, SearchSortType
@@ -86,35 +86,46 @@ class TieBaCrawler(AbstractCrawler):
         tieba_limit_count = 10  # tieba limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < tieba_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = tieba_limit_count
+        # 帖子详情和评论都从这一个信号量取许可，多个关键词并发搜索时总并发仍不超过 MAX_CONCURRENCY_NUM
+        self.search_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        await fan_out_keywords(config.KEYWORDS.split(","), self.search_by_keyword)
+
+    async def search_by_keyword(self, keyword: str) -> None:
+        """
+        search posts of one keyword page by page, details and comments of each page are fetched
+        with the crawler wide search_semaphore
+        :param keyword:
+        :return:
+        """
+        tieba_limit_count = 10  # tieba limit page fixed value
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[BaiduTieBaCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            while (page - start_page + 1) * tieba_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[BaiduTieBaCrawler.search] Skip page {page}")
-                    page += 1
-                    continue
-                try:
-                    utils.logger.info(f"[BaiduTieBaCrawler.search] search tieba keyword: {keyword}, page: {page}")
-                    notes_list: List[TiebaNote] = await self.tieba_client.get_notes_by_keyword(
-                        keyword=keyword,
-                        page=page,
-                        page_size=tieba_limit_count,
-                        sort=SearchSortType.TIME_DESC,
-                        note_type=SearchNoteType.FIXED_THREAD
-                    )
-                    if not notes_list:
-                        utils.logger.info(f"[BaiduTieBaCrawler.search] Search note list is empty")
-                        break
-                    utils.logger.info(f"[BaiduTieBaCrawler.search] Note list len: {len(notes_list)}")
-                    await self.get_specified_notes(note_id_list=[note_detail.note_id for note_detail in notes_list])
-                    page += 1
-                except Exception as ex:
-                    utils.logger.error(
-                        f"[BaiduTieBaCrawler.search] Search keywords error, current page: {page}, current keyword: {keyword}, err: {ex}")
+        utils.logger.info(f"[BaiduTieBaCrawler.search_by_keyword] Current search keyword: {keyword}")
+        page = 1
+        while (page - start_page + 1) * tieba_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+            if page < start_page:
+                utils.logger.info(f"[BaiduTieBaCrawler.search_by_keyword] Skip page {page}")
+                page += 1
+                continue
+            try:
+                utils.logger.info(f"[BaiduTieBaCrawler.search_by_keyword] search tieba keyword: {keyword}, page: {page}")
+                notes_list: List[TiebaNote] = await self.tieba_client.get_notes_by_keyword(
+                    keyword=keyword,
+                    page=page,
+                    page_size=tieba_limit_count,
+                    sort=SearchSortType.TIME_DESC,
+                    note_type=SearchNoteType.FIXED_THREAD
+                )
+                if not notes_list:
+                    utils.logger.info(f"[BaiduTieBaCrawler.search_by_keyword] Search note list is empty")
                     break
+                utils.logger.info(f"[BaiduTieBaCrawler.search_by_keyword] Note list len: {len(notes_list)}")
+                await self.get_specified_notes(note_id_list=[note_detail.note_id for note_detail in notes_list],
+                                               semaphore=self.search_semaphore)
+                page += 1
+            except Exception as ex:
+                utils.logger.error(
+                    f"[BaiduTieBaCrawler.search_by_keyword] Search keywords error, current page: {page}, current keyword: {keyword}, err: {ex}")
+                break
 
     async def get_specified_tieba_notes(self):
         """
@@ -144,16 +155,18 @@ class TieBaCrawler(AbstractCrawler):
                 await self.get_specified_notes([note.note_id for note in note_list])
                 page_number += tieba_limit_count
 
-    async def get_specified_notes(self, note_id_list: List[str] = config.TIEBA_SPECIFIED_ID_LIST):
+    async def get_specified_notes(self, note_id_list: List[str] = config.TIEBA_SPECIFIED_ID_LIST,
+                                  semaphore: Optional[asyncio.Semaphore] = None):
         """
         Get the information and comments of the specified post
         Args:
             note_id_list:
+            semaphore: shared semaphore for details and comments, a new one with MAX_CONCURRENCY_NUM permits is created when empty
 
         Returns:
 
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = semaphore or asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
         task_list = [
             self.get_note_detail_async_task(note_id=note_id, semaphore=semaphore) for note_id in note_id_list
         ]
@@ -163,7 +176,7 @@ class TieBaCrawler(AbstractCrawler):
             if note_detail is not None:
                 note_details_model.append(note_detail)
                 await tieba_store.update_tieba_note(note_detail)
-        await self.batch_get_note_comments(note_details_model)
+        await self.batch_get_note_comments(note_details_model, semaphore)
 
     async def get_note_detail_async_task(self, note_id: str, semaphore: asyncio.Semaphore) -> Optional[TiebaNote]:
         """
@@ -192,11 +205,13 @@ class TieBaCrawler(AbstractCrawler):
                     f"[BaiduTieBaCrawler.get_note_detail] have not fund note detail note_id:{note_id}, err: {ex}")
                 return None
 
-    async def batch_get_note_comments(self, note_detail_list: List[TiebaNote]):
+    async def batch_get_note_comments(self, note_detail_list: List[TiebaNote],
+                                      semaphore: Optional[asyncio.Semaphore] = None):
         """
         Batch get note comments
         Args:
             note_detail_list:
+            semaphore: shared semaphore, a new one with MAX_CONCURRENCY_NUM permits is created when empty
 
         Returns:
 
@@ -204,7 +219,7 @@ class TieBaCrawler(AbstractCrawler):
         if not config.ENABLE_GET_COMMENTS:
             return
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = semaphore or asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
         task_list: List[Task] = []
         for note_detail in note_detail_list:
             task = asyncio.create_task(self.get_comments_async_task(note_detail, semaphore), name=note_detail.note_id)
@@ -225,7 +240,6 @@ class TieBaCrawler(AbstractCrawler):
             utils.logger.info(f"[BaiduTieBaCrawler.get_comments] Begin get note id comments {note_detail.note_id}")
             await self.tieba_client.get_note_all_comments(
                 note_detail=note_detail,
-                crawl_interval=random.random(),
                 callback=tieba_store.batch_update_tieba_note_comments,
                 max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
             )
@@ -249,7 +263,6 @@ class TieBaCrawler(AbstractCrawler):
                 # Get all note information of the creator
                 all_notes_list = await self.tieba_client.get_all_notes_by_creator_user_name(
                     user_name=creator_info.user_name,
-                    crawl_interval=0,
                     callback=tieba_store.batch_update_tieba_notes,
                     max_note_count=config.CRAWLER_MAX_NOTES_COUNT
                 )
@@ -5,18 +5,19 @@
 # 头条账号首页
 # https://www.toutiao.com/c/user/token/MS4wLjABAAAAjlhp9frdJMzX1sj23-gKqPXE11NMJ0HejjFa3kG44spBlt4xL6f7wZTiYW_zTXH6/
 
-import asyncio
 import copy
 import json
 import sys
 import urllib.parse
 from typing import Any, Callable, Dict, Optional
 
-import requests
 from playwright.async_api import BrowserContext
 
 from base.base_crawler import AbstractApiClient
+from proxy.proxy_ip_pool import refresh_proxies
 from tools import utils
+from tools.http_client import get_async_client
+from tools.rate_limiter import get_rate_limiter
 from var import request_keyword_var
 
 from .exception import *
@@ -68,15 +69,20 @@ class ToutiaoClient(AbstractApiClient):
     async def request(self, method, url, **kwargs):
         utils.logger.debug(f"request: method={method} url={url}")
         response = None
-        if method == "GET":
-            response = requests.request(method, url, **kwargs)
-        elif method == "POST":
-            response = requests.request(method, url, **kwargs)
+        rate_limiter = get_rate_limiter("toutiao", url)
+        if method in ("GET", "POST"):
+            await rate_limiter.acquire()
+            self.proxies = await refresh_proxies(self.proxies)
+            client = get_async_client(self.proxies)
+            response = await client.request(method, url, timeout=self.timeout, follow_redirects=True, **kwargs)
         try:
             if response.text == "" or response.text == "blocked":
                 utils.logger.error(f"request params incrr, response.text: {response.text}")
+                rate_limiter.on_throttled()
                 raise Exception("account blocked")
-            return response.json()
+            data = response.json()
+            rate_limiter.on_success()
+            return data
         except Exception as e:
             raise DataFetchError(f"{e}, {response.text}")
 
@@ -151,7 +157,6 @@ class ToutiaoClient(AbstractApiClient):
     async def get_post_all_comments(
             self,
             post_id: str,
-            crawl_interval: float = 1.0,
             is_fetch_sub_comments=False,
             callback: Optional[Callable] = None,
             max_count: int = 10,
@@ -159,7 +164,6 @@ class ToutiaoClient(AbstractApiClient):
         """
         获取帖子的所有评论，包括子评论
         :param post_id: 帖子ID
-        :param crawl_interval: 抓取间隔
         :param is_fetch_sub_comments: 是否抓取子评论
         :param callback: 回调函数，用于处理抓取到的评论
         :param max_count: 一次帖子爬取的最大评论数量
@@ -189,7 +193,6 @@ class ToutiaoClient(AbstractApiClient):
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(post_id, comments)
 
-            await asyncio.sleep(crawl_interval)
 
             if not is_fetch_sub_comments:
                 continue
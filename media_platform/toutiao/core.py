@@ -11,7 +11,6 @@
 
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -136,7 +135,6 @@ class ToutiaoCrawler(AbstractCrawler):
                 # 将关键词列表传递给 get_post_all_comments 方法
                 await self.toutiao_client.get_post_all_comments(
                     post_id=post_id,
-                    crawl_interval=random.random(),
                     is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
                     callback=toutiao_store.batch_update_posts_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
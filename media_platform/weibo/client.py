@@ -14,19 +14,20 @@
 # @Time    : 2023/12/23 15:40
 # @Desc    : 微博爬虫 API 请求 client
 
-import asyncio
 import copy
 import json
 import re
 from typing import Callable, Dict, List, Optional, Union
 from urllib.parse import parse_qs, unquote, urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 
 import config
+from proxy.proxy_ip_pool import refresh_proxies
 from tools import utils
+from tools.http_client import get_async_client
+from tools.rate_limiter import get_rate_limiter
 
 from .exception import DataFetchError
 from .field import SearchType
@@ -52,11 +53,17 @@ class WeiboClient:
 
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         enable_return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
+        rate_limiter = get_rate_limiter("wb", url)
+        await rate_limiter.acquire()
+        self.proxies = await refresh_proxies(self.proxies)
+        client = get_async_client(self.proxies)
+        response = await client.request(
+            method, url, timeout=self.timeout,
+            **kwargs
+        )
+        # 微博限流时返回 418/403
+        if response.status_code in (403, 418):
+            rate_limiter.on_throttled()
 
         if enable_return_response:
             return response
@@ -67,6 +74,7 @@ class WeiboClient:
             utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
             raise DataFetchError(data.get("msg", "unkonw error"))
         else:
+            rate_limiter.on_success()
             return data.get("data", {})
 
     async def get(self, uri: str, params=None, headers=None, **kwargs) -> Union[Response, Dict]:
@@ -148,14 +156,13 @@ class WeiboClient:
 
         return await self.get(uri, params, headers=headers)
 
-    async def get_note_all_comments(self, note_id: str, crawl_interval: float = 1.0,
+    async def get_note_all_comments(self, note_id: str,
                                     callback: Optional[Callable] = None,
                                     max_count: int = 10,
                                     ):
         """
         get note all comments include sub comments
         :param note_id:
-        :param crawl_interval:
         :param callback:
         :param max_count:
         :return:
@@ -173,7 +180,6 @@ class WeiboClient:
                 comment_list = comment_list[:max_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(note_id, comment_list)
-            await asyncio.sleep(crawl_interval)
             result.extend(comment_list)
             sub_comment_result = await self.get_comments_all_sub_comments(note_id, comment_list, callback)
             result.extend(sub_comment_result)
@@ -212,24 +218,25 @@ class WeiboClient:
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(
-                "GET", url, timeout=self.timeout, headers=self.headers
-            )
-            if response.status_code != 200:
-                raise DataFetchError(f"get weibo detail err: {response.text}")
-            match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
-            if match:
-                render_data_json = match.group(1)
-                render_data_dict = json.loads(render_data_json)
-                note_detail = render_data_dict[0].get("status")
-                note_item = {
-                    "mblog": note_detail
-                }
-                return note_item
-            else:
-                utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
-                return dict()
+        self.proxies = await refresh_proxies(self.proxies)
+        client = get_async_client(self.proxies)
+        response = await client.request(
+            "GET", url, timeout=self.timeout, headers=self.headers
+        )
+        if response.status_code != 200:
+            raise DataFetchError(f"get weibo detail err: {response.text}")
+        match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
+        if match:
+            render_data_json = match.group(1)
+            render_data_dict = json.loads(render_data_json)
+            note_detail = render_data_dict[0].get("status")
+            note_item = {
+                "mblog": note_detail
+            }
+            return note_item
+        else:
+            utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
+            return dict()
 
     async def get_note_image(self, image_url: str) -> bytes:
         image_url = image_url[8:]  # 去掉 https://
@@ -245,13 +252,14 @@ class WeiboClient:
         # 微博图床对外存在防盗链，所以需要代理访问
         # 由于微博图片是通过 i1.wp.com 来访问的，所以需要拼接一下
         final_uri = (f"{self._image_agent_host}" f"{image_url}")
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", final_uri, timeout=self.timeout)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
-                return None
-            else:
-                return response.content
+        self.proxies = await refresh_proxies(self.proxies)
+        client = get_async_client(self.proxies)
+        response = await client.request("GET", final_uri, timeout=self.timeout)
+        if not response.reason_phrase == "OK":
+            utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
+            return None
+        else:
+            return response.content
 
 
 
@@ -330,14 +338,13 @@ class WeiboClient:
         }
         return await self.get(uri, params)
 
-    async def get_all_notes_by_creator_id(self, creator_id: str, container_id: str, crawl_interval: float = 1.0,
+    async def get_all_notes_by_creator_id(self, creator_id: str, container_id: str,
                                           callback: Optional[Callable] = None) -> List[Dict]:
         """
         获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
         Args:
             creator_id:
             container_id:
-            crawl_interval:
             callback:
 
         Returns:
@@ -365,7 +372,6 @@ class WeiboClient:
             notes = [note for note  in notes if note.get("card_type") == 9]
             if callback:
                 await callback(notes)
-            await asyncio.sleep(crawl_interval)
             result.extend(notes)
             crawler_total_count += 10
             notes_has_more = notes_res.get("cardlistInfo", {}).get("total", 0) > crawler_total_count
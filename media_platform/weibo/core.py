@@ -17,7 +17,6 @@
 
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -29,7 +28,8 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.pipeline import fan_out_keywords
+from var import crawler_type_var
 
 from .client import WeiboClient
 from .exception import DataFetchError
@@ -111,34 +111,44 @@ class WeiboCrawler(AbstractCrawler):
         weibo_limit_count = 10  # weibo limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < weibo_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = weibo_limit_count
-        start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            while (page - start_page + 1) * weibo_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[WeiboCrawler.search] Skip page: {page}")
-                    page += 1
-                    continue
-                utils.logger.info(f"[WeiboCrawler.search] search weibo keyword: {keyword}, page: {page}")
-                search_res = await self.wb_client.get_note_by_keyword(
-                    keyword=keyword,
-                    page=page,
-                    search_type=SearchType.DEFAULT
-                )
-                note_id_list: List[str] = []
-                note_list = filter_search_result_card(search_res.get("cards"))
-                for note_item in note_list:
-                    if note_item:
-                        mblog: Dict = note_item.get("mblog")
-                        if mblog:
-                            note_id_list.append(mblog.get("id"))
-                            await weibo_store.update_weibo_note(note_item)
-                            await self.get_note_images(mblog)
+        # 每页微博的评论抓取都用这个信号量，多个关键词同时翻页时评论请求总数不超过 MAX_CONCURRENCY_NUM
+        self.search_comment_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        await fan_out_keywords(config.KEYWORDS.split(","), self.search_by_keyword)
 
+    async def search_by_keyword(self, keyword: str) -> None:
+        """
+        search weibo notes of one keyword page by page, notes and images are stored right away,
+        then comments of the page are fetched with the shared comment semaphore
+        :param keyword:
+        :return:
+        """
+        weibo_limit_count = 10  # weibo limit page fixed value
+        start_page = config.START_PAGE
+        utils.logger.info(f"[WeiboCrawler.search_by_keyword] Current search keyword: {keyword}")
+        page = 1
+        while (page - start_page + 1) * weibo_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+            if page < start_page:
+                utils.logger.info(f"[WeiboCrawler.search_by_keyword] Skip page: {page}")
                 page += 1
-                await self.batch_get_notes_comments(note_id_list)
+                continue
+            utils.logger.info(f"[WeiboCrawler.search_by_keyword] search weibo keyword: {keyword}, page: {page}")
+            search_res = await self.wb_client.get_note_by_keyword(
+                keyword=keyword,
+                page=page,
+                search_type=SearchType.DEFAULT
+            )
+            note_id_list: List[str] = []
+            note_list = filter_search_result_card(search_res.get("cards"))
+            for note_item in note_list:
+                if note_item:
+                    mblog: Dict = note_item.get("mblog")
+                    if mblog:
+                        note_id_list.append(mblog.get("id"))
+                        await weibo_store.update_weibo_note(note_item)
+                        await self.get_note_images(mblog)
+
+            page += 1
+            await self.batch_get_notes_comments(note_id_list, self.search_comment_semaphore)
 
     async def get_specified_notes(self):
         """
@@ -175,10 +185,11 @@ class WeiboCrawler(AbstractCrawler):
                     f"[WeiboCrawler.get_note_info_task] have not fund note detail note_id:{note_id}, err: {ex}")
                 return None
 
-    async def batch_get_notes_comments(self, note_id_list: List[str]):
+    async def batch_get_notes_comments(self, note_id_list: List[str], semaphore: Optional[asyncio.Semaphore] = None):
         """
         batch get notes comments
         :param note_id_list:
+        :param semaphore: shared semaphore, a new one with MAX_CONCURRENCY_NUM permits is created when empty
         :return:
         """
         if not config.ENABLE_GET_COMMENTS:
@@ -186,7 +197,7 @@ class WeiboCrawler(AbstractCrawler):
             return
 
         utils.logger.info(f"[WeiboCrawler.batch_get_notes_comments] note ids:{note_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = semaphore or asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
         task_list: List[Task] = []
         for note_id in note_id_list:
             task = asyncio.create_task(self.get_note_comments(note_id, semaphore), name=note_id)
@@ -205,7 +216,6 @@ class WeiboCrawler(AbstractCrawler):
                 utils.logger.info(f"[WeiboCrawler.get_note_comments] begin get note_id: {note_id} comments ...")
                 await self.wb_client.get_note_all_comments(
                     note_id=note_id,
-                    crawl_interval=random.randint(1,3), # 微博对API的限流比较严重，所以延时提高一些
                     callback=weibo_store.batch_update_weibo_note_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
                 )
@@ -257,7 +267,6 @@ class WeiboCrawler(AbstractCrawler):
                 all_notes_list = await self.wb_client.get_all_notes_by_creator_id(
                     creator_id=user_id,
                     container_id=createor_info_res.get("lfid_container_id"),
-                    crawl_interval=0,
                     callback=weibo_store.batch_update_weibo_notes
                 )
 
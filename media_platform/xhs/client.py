@@ -9,24 +9,26 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 
-import asyncio
 import json
 import re
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_result
 
 import config
 from base.base_crawler import AbstractApiClient
+from proxy.proxy_ip_pool import refresh_proxies
 from tools import utils
+from tools.http_client import get_async_client
+from tools.rate_limiter import get_rate_limiter
 from html import unescape
 
-from .exception import DataFetchError, IPBlockError
+from .exception import AccountBlockError, DataFetchError, IPBlockError
 from .field import SearchNoteType, SearchSortType
-from .help import get_search_id, sign
+from .help import get_search_id
+from .signer import XhsSigner
 
 
 class XiaoHongShuClient(AbstractApiClient):
@@ -46,10 +48,12 @@ class XiaoHongShuClient(AbstractApiClient):
         self._domain = "https://www.xiaohongshu.com"
         self.IP_ERROR_STR = "网络连接异常，请检查网络设置或重启试试"
         self.IP_ERROR_CODE = 300012
+        self.LOGIN_EXPIRED_CODE = -100
         self.NOTE_ABNORMAL_STR = "笔记状态异常，请稍后查看"
         self.NOTE_ABNORMAL_CODE = -510001
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        self.signer = XhsSigner(playwright_page, cookie_dict)
 
     async def _pre_headers(self, url: str, data=None) -> Dict:
         """
@@ -61,25 +65,15 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-        encrypt_params = await self.playwright_page.evaluate(
-            "([url, data]) => window._webmsxyw(url,data)", [url, data]
-        )
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
-        signs = sign(
-            a1=self.cookie_dict.get("a1", ""),
-            b1=local_storage.get("b1", ""),
-            x_s=encrypt_params.get("X-s", ""),
-            x_t=str(encrypt_params.get("X-t", "")),
-        )
-
+        signs = await self.signer.sign(url, data)
         headers = {
             "X-S": signs["x-s"],
             "X-T": signs["x-t"],
             "x-S-Common": signs["x-s-common"],
             "X-B3-Traceid": signs["x-b3-traceid"],
         }
-        self.headers.update(headers)
-        return self.headers
+        # 并发签名会被合并成一个批次同时返回，这里返回副本，避免多个请求互相覆盖签名头
+        return {**self.headers, **headers}
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
@@ -96,11 +90,15 @@ class XiaoHongShuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop("return_response", False)
 
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        rate_limiter = get_rate_limiter("xhs", url)
+        await rate_limiter.acquire()
+        self.proxies = await refresh_proxies(self.proxies)
+        client = get_async_client(self.proxies)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
 
         if response.status_code == 471 or response.status_code == 461:
             # someday someone maybe will bypass captcha
+            rate_limiter.on_throttled()
             verify_type = response.headers["Verifytype"]
             verify_uuid = response.headers["Verifyuuid"]
             raise Exception(
@@ -108,12 +106,18 @@ class XiaoHongShuClient(AbstractApiClient):
             )
 
         if return_response:
+            rate_limiter.on_success()
             return response.text
         data: Dict = response.json()
         if data["success"]:
+            rate_limiter.on_success()
             return data.get("data", data.get("success", {}))
         elif data["code"] == self.IP_ERROR_CODE:
+            rate_limiter.on_throttled()
+            client.report_blocked()
             raise IPBlockError(self.IP_ERROR_STR)
+        elif data["code"] == self.LOGIN_EXPIRED_CODE:
+            raise AccountBlockError(data.get("msg", "登录已过期"))
         else:
             raise DataFetchError(data.get("msg", None))
 
@@ -156,15 +160,16 @@ class XiaoHongShuClient(AbstractApiClient):
         )
 
     async def get_note_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", url, timeout=self.timeout)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(
-                    f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
-                )
-                return None
-            else:
-                return response.content
+        self.proxies = await refresh_proxies(self.proxies)
+        client = get_async_client(self.proxies)
+        response = await client.request("GET", url, timeout=self.timeout)
+        if not response.reason_phrase == "OK":
+            utils.logger.error(
+                f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
+            )
+            return None
+        else:
+            return response.content
 
     async def pong(self) -> bool:
         """
@@ -198,6 +203,7 @@ class XiaoHongShuClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self.signer.update_cookies(cookie_dict)
 
     async def get_note_by_keyword(
         self,
@@ -310,7 +316,6 @@ class XiaoHongShuClient(AbstractApiClient):
     async def get_note_all_comments(
         self,
         note_id: str,
-        crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
     ) -> List[Dict]:
@@ -318,7 +323,6 @@ class XiaoHongShuClient(AbstractApiClient):
         获取指定笔记下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
         Args:
             note_id: 笔记ID
-            crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后
             max_count: 一次笔记爬取的最大评论数量
         Returns:
@@ -341,10 +345,9 @@ class XiaoHongShuClient(AbstractApiClient):
                 comments = comments[: max_count - len(result)]
             if callback:
                 await callback(note_id, comments)
-            await asyncio.sleep(crawl_interval)
             result.extend(comments)
             sub_comments = await self.get_comments_all_sub_comments(
-                comments, crawl_interval, callback
+                comments, callback
             )
             result.extend(sub_comments)
         return result
@@ -352,14 +355,12 @@ class XiaoHongShuClient(AbstractApiClient):
     async def get_comments_all_sub_comments(
         self,
         comments: List[Dict],
-        crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
     ) -> List[Dict]:
         """
         获取指定一级评论下的所有二级评论, 该方法会一直查找一级评论下的所有二级评论信息
         Args:
             comments: 评论列表
-            crawl_interval: 爬取一次评论的延迟单位（秒）
             callback: 一次评论爬取结束后
 
         Returns:
@@ -399,7 +400,6 @@ class XiaoHongShuClient(AbstractApiClient):
                 comments = comments_res["comments"]
                 if callback:
                     await callback(note_id, comments)
-                await asyncio.sleep(crawl_interval)
                 result.extend(comments)
         return result
 
@@ -450,14 +450,12 @@ class XiaoHongShuClient(AbstractApiClient):
     async def get_all_notes_by_creator(
         self,
         user_id: str,
-        crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
     ) -> List[Dict]:
         """
         获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
         Args:
             user_id: 用户ID
-            crawl_interval: 爬取一次的延迟单位（秒）
             callback: 一次分页爬取结束后的更新回调函数
 
         Returns:
@@ -488,7 +486,6 @@ class XiaoHongShuClient(AbstractApiClient):
             )
             if callback:
                 await callback(notes)
-            await asyncio.sleep(crawl_interval)
             result.extend(notes)
         return result
 
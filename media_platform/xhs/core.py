@@ -11,7 +11,6 @@
 
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -25,10 +24,11 @@ from model.m_xiaohongshu import NoteUrlInfo
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import xhs as xhs_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.pipeline import CrawlerPipeline, fan_out_keywords
+from var import crawler_type_var
 
 from .client import XiaoHongShuClient
-from .exception import DataFetchError
+from .exception import AccountBlockError, DataFetchError, IPBlockError
 from .field import SearchSortType
 from .help import parse_note_info_from_note_url, get_search_id
 from .login import XiaoHongShuLogin
@@ -115,27 +115,38 @@ class XiaoHongShuCrawler(AbstractCrawler):
         xhs_limit_count = 20  # xhs limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < xhs_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = xhs_limit_count
+        # 笔记详情和评论的并发上限对整次搜索生效，各关键词的流水线共用这两个信号量
+        self.search_detail_semaphore = asyncio.Semaphore(config.PIPELINE_DETAIL_WORKER_NUM)
+        self.search_comment_semaphore = asyncio.Semaphore(config.PIPELINE_COMMENT_WORKER_NUM)
+        await fan_out_keywords(config.KEYWORDS.split(","), self.search_by_keyword)
+
+    async def search_by_keyword(self, keyword: str) -> None:
+        """
+        search notes of one keyword, the search_id is generated once and reused for every page of this keyword,
+        notes are handed to this keyword's detail -> store / comment pipeline
+        :param keyword:
+        :return:
+        """
+        xhs_limit_count = 20  # xhs limit page fixed value
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(
-                f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}"
-            )
-            page = 1
-            search_id = get_search_id()
+        utils.logger.info(
+            f"[XiaoHongShuCrawler.search_by_keyword] Current search keyword: {keyword}"
+        )
+        page = 1
+        search_id = get_search_id()
+        async with self.create_search_pipeline(keyword) as pipeline:
             while (
                 page - start_page + 1
             ) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Skip page {page}")
+                    utils.logger.info(f"[XiaoHongShuCrawler.search_by_keyword] Skip page {page}")
                     page += 1
                     continue
 
                 try:
                     utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] search xhs keyword: {keyword}, page: {page}"
+                        f"[XiaoHongShuCrawler.search_by_keyword] search xhs keyword: {keyword}, page: {page}"
                     )
-                    note_id_list: List[str] = []
                     notes_res = await self.xhs_client.get_note_by_keyword(
                         keyword=keyword,
                         search_id=search_id,
@@ -147,39 +158,58 @@ class XiaoHongShuCrawler(AbstractCrawler):
                         ),
                     )
                     utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] Search notes res:{notes_res}"
+                        f"[XiaoHongShuCrawler.search_by_keyword] Search notes res:{notes_res}"
                     )
                     if not notes_res or not notes_res.get("has_more", False):
                         utils.logger.info("No more content!")
                         break
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                    task_list = [
-                        self.get_note_detail_async_task(
-                            note_id=post_item.get("id"),
-                            xsec_source=post_item.get("xsec_source"),
-                            xsec_token=post_item.get("xsec_token"),
-                            semaphore=semaphore,
-                        )
-                        for post_item in notes_res.get("items", {})
-                        if post_item.get("model_type") not in ("rec_query", "hot_query")
-                    ]
-                    note_details = await asyncio.gather(*task_list)
-                    for note_detail in note_details:
-                        if note_detail:
-                            await xhs_store.update_xhs_note(note_detail)
-                            await self.get_notice_media(note_detail)
-                            note_id_list.append(note_detail.get("note_id"))
+                    for post_item in notes_res.get("items", {}):
+                        if post_item.get("model_type") not in ("rec_query", "hot_query"):
+                            await pipeline.put(post_item)
                     page += 1
-                    utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] Note details: {note_details}"
-                    )
-                    await self.batch_get_note_comments(note_id_list)
                 except DataFetchError:
                     utils.logger.error(
-                        "[XiaoHongShuCrawler.search] Get note detail error"
+                        "[XiaoHongShuCrawler.search_by_keyword] Get note detail error"
                     )
                     break
 
+    def create_search_pipeline(self, keyword: str) -> CrawlerPipeline:
+        """
+        搜索结果流水线：搜索项 -> 笔记详情 -> 存储 / 评论，各阶段独立并发
+        Args:
+            keyword: 搜索关键词
+
+        Returns:
+
+        """
+        detail_semaphore = self.search_detail_semaphore
+        comment_semaphore = self.search_comment_semaphore
+
+        async def fetch_detail(post_item: Dict) -> Optional[Dict]:
+            note_detail = await self.get_note_detail_async_task(
+                note_id=post_item.get("id"),
+                xsec_source=post_item.get("xsec_source"),
+                xsec_token=post_item.get("xsec_token"),
+                semaphore=detail_semaphore,
+            )
+            if note_detail:
+                await self.get_notice_media(note_detail)
+            return note_detail
+
+        async def store_note(note_detail: Dict) -> None:
+            await xhs_store.update_xhs_note(note_detail)
+
+        async def fetch_comments(note_detail: Dict) -> None:
+            await self.get_comments(note_detail.get("note_id"), comment_semaphore)
+
+        pipeline = CrawlerPipeline(f"xhs-search-{keyword}", queue_size=config.PIPELINE_QUEUE_SIZE,
+                                   fatal_exceptions=(IPBlockError, AccountBlockError))
+        pipeline.add_stage("detail", fetch_detail, config.PIPELINE_DETAIL_WORKER_NUM)
+        pipeline.add_stage("store", store_note, config.PIPELINE_STORE_WORKER_NUM, upstreams=["detail"])
+        if config.ENABLE_GET_COMMENTS:
+            pipeline.add_stage("comment", fetch_comments, config.PIPELINE_COMMENT_WORKER_NUM, upstreams=["detail"])
+        return pipeline
+
     async def get_creators_and_notes(self) -> None:
         """Get creator's notes and retrieve their comment information."""
         utils.logger.info(
@@ -196,7 +226,6 @@ class XiaoHongShuCrawler(AbstractCrawler):
             # Get all note information of the creator
             all_notes_list = await self.xhs_client.get_all_notes_by_creator(
                 user_id=user_id,
-                crawl_interval=random.random(),
                 callback=self.fetch_creator_notes_detail,
             )
 
@@ -339,7 +368,6 @@ class XiaoHongShuCrawler(AbstractCrawler):
             )
             await self.xhs_client.get_note_all_comments(
                 note_id=note_id,
-                crawl_interval=random.random(),
                 callback=xhs_store.batch_update_xhs_note_comments,
                 max_count=CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
             )
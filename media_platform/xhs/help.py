@@ -9,11 +9,13 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 
+import base64
 import ctypes
 import json
 import random
 import time
 import urllib.parse
+import zlib
 
 from model.m_xiaohongshu import NoteUrlInfo
 from tools.crawler_util import extract_url_params_to_dict
@@ -23,6 +25,20 @@ def sign(a1="", b1="", x_s="", x_t=""):
     """
     takes in a URI (uniform resource identifier), an optional data dictionary, and an optional ctime parameter. It returns a dictionary containing two keys: "x-s" and "x-t".
     """
+    x_s_common = build_x_s_common(a1=a1, b1=b1, x_s=x_s, x_t=x_t)
+    x_b3_traceid = get_b3_trace_id()
+    return {
+        "x-s": x_s,
+        "x-t": x_t,
+        "x-s-common": x_s_common,
+        "x-b3-traceid": x_b3_traceid
+    }
+
+
+def sign_common_dict(a1="", b1="", x_s="", x_t=""):
+    """
+    x-s-common 的原始实现：拼出 common 字典后逐字节编码，作为 build_x_s_common 的对照实现保留
+    """
     common = {
         "s0": 3,  # getPlatformCode
         "s1": "",
@@ -39,14 +55,32 @@ def sign(a1="", b1="", x_s="", x_t=""):
         "x10": 154,  # getSigCount
     }
     encode_str = encodeUtf8(json.dumps(common, separators=(',', ':')))
-    x_s_common = b64Encode(encode_str)
-    x_b3_traceid = get_b3_trace_id()
-    return {
-        "x-s": x_s,
-        "x-t": x_t,
-        "x-s-common": x_s_common,
-        "x-b3-traceid": x_b3_traceid
-    }
+    return b64Encode(encode_str)
+
+
+# x-s-common 中固定不变的部分，只需要序列化一次
+_X_S_COMMON_PREFIX = json.dumps({
+    "s0": 3,  # getPlatformCode
+    "s1": "",
+    "x0": "1",  # localStorage.getItem("b1b1")
+    "x1": "3.7.8-2",  # version
+    "x2": "Mac OS",
+    "x3": "xhs-pc-web",
+    "x4": "4.27.2",
+}, separators=(',', ':'))[:-1]
+_X_S_COMMON_SUFFIX = ',"x10":154}'  # getSigCount
+
+
+def build_x_s_common(a1="", b1="", x_s="", x_t=""):
+    """
+    生成 x-s-common，与 sign_common_dict 输出完全一致：
+    固定字段预先序列化，mrc 走 zlib 的 C 实现，base64 走标准库后再替换为小红书的字母表
+    """
+    common_json = (
+        f'{_X_S_COMMON_PREFIX},"x5":{json.dumps(a1)},"x6":{json.dumps(x_t)},"x7":{json.dumps(x_s)},'
+        f'"x8":{json.dumps(b1)},"x9":{fast_mrc(x_t + x_s + b1)}{_X_S_COMMON_SUFFIX}'
+    )
+    return b64_encode_bytes(common_json.encode("utf-8"))
 
 
 def get_b3_trace_id():
@@ -116,6 +150,17 @@ def mrc(e):
     return o ^ -1 ^ 3988292384
 
 
+def fast_mrc(e: str) -> int:
+    """
+    mrc 的快速实现
+    mrc 使用的是标准 CRC32 查表（多项式 0xEDB88320），只对前 57 个字符计算，
+    最后与 -1 异或使高位全部置 1，因此结果等于 (zlib.crc32 ^ 0xEDB88320) - 2**32
+    """
+    if len(e) < 57:
+        raise IndexError("string index out of range")
+    return (zlib.crc32(e[:57].encode("latin-1")) ^ 3988292384) - (1 << 32)
+
+
 lookup = [
     "Z",
     "m",
@@ -222,6 +267,17 @@ def b64Encode(e):
     return "".join(U)
 
 
+_STD_B64_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+_XHS_B64_TRANSLATE_TABLE = bytes.maketrans(_STD_B64_ALPHABET, "".join(lookup).encode())
+
+
+def b64_encode_bytes(data: bytes) -> str:
+    """
+    基于 bytes 的 b64Encode，标准 base64 编码后替换成小红书的字母表
+    """
+    return base64.b64encode(data).translate(_XHS_B64_TRANSLATE_TABLE).decode()
+
+
 def encodeUtf8(e):
     b = []
     m = urllib.parse.quote(e, safe='~()*!.\'')
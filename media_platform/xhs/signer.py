@@ -0,0 +1,130 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 小红书请求签名组件
+#            缓存 localStorage 中的 b1，仅在 cookies 或页面变化时刷新；
+#            同一轮事件循环内的并发签名请求合并为一次 page.evaluate，一个批次只需一次浏览器 IPC
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from playwright.async_api import Page
+
+from .exception import DataFetchError
+from .help import sign
+
+# 一次 evaluate 内完成整批签名，b1 过期时顺带读取 b1，避免序列化整个 localStorage
+_SIGN_BATCH_JS = """([items, needB1]) => ({
+    signs: items.map(([url, data]) => window._webmsxyw(url, data)),
+    b1: needB1 ? window.localStorage.getItem("b1") : null,
+})"""
+
+
+class XhsSigner:
+    def __init__(self, playwright_page: Page, cookie_dict: Dict[str, str]):
+        self.playwright_page = playwright_page
+        self.cookie_dict = cookie_dict
+        self._b1: Optional[str] = None
+        self._b1_page_url: Optional[str] = None
+        self._pending: List[Tuple[str, Optional[Dict], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def update_cookies(self, cookie_dict: Dict[str, str]) -> None:
+        """
+        cookies 变化后 b1 需要重新读取
+        Args:
+            cookie_dict: 新的 cookies
+
+        Returns:
+
+        """
+        self.cookie_dict = cookie_dict
+        self.invalidate_b1()
+
+    def invalidate_b1(self) -> None:
+        self._b1 = None
+        self._b1_page_url = None
+
+    def _need_refresh_b1(self) -> bool:
+        return self._b1 is None or self._b1_page_url != self.playwright_page.url
+
+    def _build_signs(self, encrypt_params: Dict) -> Dict:
+        return sign(
+            a1=self.cookie_dict.get("a1", ""),
+            b1=self._b1 or "",
+            x_s=encrypt_params.get("X-s", ""),
+            x_t=str(encrypt_params.get("X-t", "")),
+        )
+
+    async def sign_batch(self, items: List[Tuple[str, Optional[Dict]]]) -> List[Dict]:
+        """
+        一次浏览器往返签名一批 (url, data)
+        Args:
+            items: (url, data) 列表
+
+        Returns:
+            与 items 顺序一致的签名结果，字段同 help.sign 的返回值
+
+        """
+        if not items:
+            return []
+        need_b1 = self._need_refresh_b1()
+        page_url = self.playwright_page.url
+        result: Dict = await self.playwright_page.evaluate(
+            _SIGN_BATCH_JS, [[[url, data] for url, data in items], need_b1]
+        )
+        signs_list = result.get("signs") or []
+        if len(signs_list) != len(items):
+            raise DataFetchError(f"xhs sign batch expect {len(items)} signs, but got {len(signs_list)}")
+        if need_b1:
+            self._b1 = result.get("b1") or ""
+            self._b1_page_url = page_url
+        return [self._build_signs(encrypt_params) for encrypt_params in signs_list]
+
+    async def sign(self, url: str, data: Optional[Dict] = None) -> Dict:
+        """
+        签名单个请求，同一轮事件循环内的并发调用会被合并为一个批次
+        Args:
+            url: 请求路由（GET 请求包含查询参数）
+            data: POST 请求体
+
+        Returns:
+
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((url, data, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+        return await future
+
+    async def _flush(self) -> None:
+        """
+        让出一次事件循环，收集同批次的签名请求后统一签名
+        Returns:
+
+        """
+        await asyncio.sleep(0)
+        while self._pending:
+            batch, self._pending = self._pending, []
+            error: Exception = DataFetchError("xhs sign batch did not return a sign for every request")
+            try:
+                signs_list = await self.sign_batch([(url, data) for url, data, _ in batch])
+                for (_, _, future), signs in zip(batch, signs_list):
+                    if not future.done():
+                        future.set_result(signs)
+            except Exception as e:
+                error = e
+            finally:
+                # 没拿到签名结果（包括签名任务被取消）的调用方统一抛出异常，避免永远等待
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
@@ -10,12 +10,10 @@
 
 
 # -*- coding: utf-8 -*-
-import asyncio
 import json
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -24,7 +22,10 @@ import config
 from base.base_crawler import AbstractApiClient
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
+from proxy.proxy_ip_pool import refresh_proxies
 from tools import utils
+from tools.http_client import get_async_client
+from tools.rate_limiter import get_rate_limiter
 
 from .exception import DataFetchError, ForbiddenError
 from .field import SearchSort, SearchTime, SearchType
@@ -58,7 +59,7 @@ class ZhiHuClient(AbstractApiClient):
         d_c0 = self.cookie_dict.get("d_c0")
         if not d_c0:
             raise Exception("d_c0 not found in cookies")
-        sign_res = sign(url, self.default_headers["cookie"])
+        sign_res = await sign(url, self.default_headers["cookie"])
         headers = self.default_headers.copy()
         headers['x-zst-81'] = sign_res["x-zst-81"]
         headers['x-zse-96'] = sign_res["x-zse-96"]
@@ -79,14 +80,19 @@ class ZhiHuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop('return_response', False)
 
-        async with httpx.AsyncClient(proxies=self.proxies, ) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
+        rate_limiter = get_rate_limiter("zhihu", url)
+        await rate_limiter.acquire()
+        self.proxies = await refresh_proxies(self.proxies)
+        client = get_async_client(self.proxies)
+        response = await client.request(
+            method, url, timeout=self.timeout,
+            **kwargs
+        )
 
         if response.status_code != 200:
             utils.logger.error(f"[ZhiHuClient.request] Requset Url: {url}, Request error: {response.text}")
+            if response.status_code in (403, 429):
+                rate_limiter.on_throttled()
             if response.status_code == 403:
                 raise ForbiddenError(response.text)
             elif response.status_code == 404: # 如果一个content没有评论也是404
@@ -94,6 +100,7 @@ class ZhiHuClient(AbstractApiClient):
 
             raise DataFetchError(response.text)
 
+        rate_limiter.on_success()
         if return_response:
             return response.text
         try:
@@ -251,13 +258,12 @@ class ZhiHuClient(AbstractApiClient):
         }
         return await self.get(uri, params)
 
-    async def get_note_all_comments(self, content: ZhihuContent, crawl_interval: float = 1.0,
+    async def get_note_all_comments(self, content: ZhihuContent,
                                     callback: Optional[Callable] = None) -> List[ZhihuComment]:
         """
         获取指定帖子下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
         Args:
             content: 内容详情对象(问题｜文章｜视频)
-            crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后
 
         Returns:
@@ -283,18 +289,16 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(comments)
 
             result.extend(comments)
-            await self.get_comments_all_sub_comments(content, comments, crawl_interval=crawl_interval, callback=callback)
-            await asyncio.sleep(crawl_interval)
+            await self.get_comments_all_sub_comments(content, comments, callback=callback)
         return result
 
-    async def get_comments_all_sub_comments(self, content: ZhihuContent, comments: List[ZhihuComment], crawl_interval: float = 1.0,
+    async def get_comments_all_sub_comments(self, content: ZhihuContent, comments: List[ZhihuComment],
                                             callback: Optional[Callable] = None) -> List[ZhihuComment]:
         """
         获取指定评论下的所有子评论
         Args:
             content: 内容详情对象(问题｜文章｜视频)
             comments: 评论列表
-            crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后
 
         Returns:
@@ -327,7 +331,6 @@ class ZhiHuClient(AbstractApiClient):
                     await callback(sub_comments)
 
                 all_sub_comments.extend(sub_comments)
-                await asyncio.sleep(crawl_interval)
         return all_sub_comments
 
     async def get_creator_info(self, url_token: str) -> Optional[ZhihuCreator]:
@@ -404,13 +407,12 @@ class ZhiHuClient(AbstractApiClient):
         }
         return await self.get(uri, params)
 
-    async def get_all_anwser_by_creator(self, creator: ZhihuCreator, crawl_interval: float = 1.0,
+    async def get_all_anwser_by_creator(self, creator: ZhihuCreator,
                                         callback: Optional[Callable] = None) -> List[ZhihuContent]:
         """
         获取创作者的所有回答
         Args:
             creator: 创作者信息
-            crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后
 
         Returns:
@@ -432,17 +434,15 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
         return all_contents
 
 
-    async def get_all_articles_by_creator(self, creator: ZhihuCreator, crawl_interval: float = 1.0,
+    async def get_all_articles_by_creator(self, creator: ZhihuCreator,
                                           callback: Optional[Callable] = None) -> List[ZhihuContent]:
         """
         获取创作者的所有文章
         Args:
             creator:
-            crawl_interval:
             callback:
 
         Returns:
@@ -463,17 +463,15 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
         return all_contents
 
 
-    async def get_all_videos_by_creator(self, creator: ZhihuCreator, crawl_interval: float = 1.0,
+    async def get_all_videos_by_creator(self, creator: ZhihuCreator,
                                         callback: Optional[Callable] = None) -> List[ZhihuContent]:
         """
         获取创作者的所有视频
         Args:
             creator:
-            crawl_interval:
             callback:
 
         Returns:
@@ -494,5 +492,4 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
         return all_contents
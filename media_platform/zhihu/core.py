@@ -12,7 +12,6 @@
 # -*- coding: utf-8 -*-
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -25,7 +24,8 @@ from model.m_zhihu import ZhihuContent, ZhihuCreator
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import zhihu as zhihu_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.pipeline import fan_out_keywords
+from var import crawler_type_var
 
 from .client import ZhiHuClient
 from .exception import DataFetchError
@@ -111,42 +111,54 @@ class ZhihuCrawler(AbstractCrawler):
         zhihu_limit_count = 20  # zhihu limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < zhihu_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = zhihu_limit_count
+        # 各关键词每一页内容的评论抓取都从这个信号量取许可，关键词并发不会增加评论请求的总并发
+        self.search_comment_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        await fan_out_keywords(config.KEYWORDS.split(","), self.search_by_keyword)
+
+    async def search_by_keyword(self, keyword: str) -> None:
+        """
+        search zhihu contents of one keyword page by page, comments of each page are fetched
+        with the shared comment semaphore
+        :param keyword:
+        :return:
+        """
+        zhihu_limit_count = 20  # zhihu limit page fixed value
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[ZhihuCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            while (page - start_page + 1) * zhihu_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[ZhihuCrawler.search] Skip page {page}")
-                    page += 1
-                    continue
-
-                try:
-                    utils.logger.info(f"[ZhihuCrawler.search] search zhihu keyword: {keyword}, page: {page}")
-                    content_list: List[ZhihuContent]  = await self.zhihu_client.get_note_by_keyword(
-                        keyword=keyword,
-                        page=page,
-                    )
-                    utils.logger.info(f"[ZhihuCrawler.search] Search contents :{content_list}")
-                    if not content_list:
-                        utils.logger.info("No more content!")
-                        break
-
-                    page += 1
-                    for content in content_list:
-                        await zhihu_store.update_zhihu_content(content)
-
-                    await self.batch_get_content_comments(content_list)
-                except DataFetchError:
-                    utils.logger.error("[ZhihuCrawler.search] Search content error")
-                    return
-
-    async def batch_get_content_comments(self, content_list: List[ZhihuContent]):
+        utils.logger.info(f"[ZhihuCrawler.search_by_keyword] Current search keyword: {keyword}")
+        page = 1
+        while (page - start_page + 1) * zhihu_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+            if page < start_page:
+                utils.logger.info(f"[ZhihuCrawler.search_by_keyword] Skip page {page}")
+                page += 1
+                continue
+
+            try:
+                utils.logger.info(f"[ZhihuCrawler.search_by_keyword] search zhihu keyword: {keyword}, page: {page}")
+                content_list: List[ZhihuContent]  = await self.zhihu_client.get_note_by_keyword(
+                    keyword=keyword,
+                    page=page,
+                )
+                utils.logger.info(f"[ZhihuCrawler.search_by_keyword] Search contents :{content_list}")
+                if not content_list:
+                    utils.logger.info("No more content!")
+                    break
+
+                page += 1
+                for content in content_list:
+                    await zhihu_store.update_zhihu_content(content)
+
+                await self.batch_get_content_comments(content_list, self.search_comment_semaphore)
+            except DataFetchError:
+                utils.logger.error("[ZhihuCrawler.search_by_keyword] Search content error")
+                return
+
+    async def batch_get_content_comments(self, content_list: List[ZhihuContent],
+                                         semaphore: Optional[asyncio.Semaphore] = None):
         """
         Batch get content comments
         Args:
             content_list:
+            semaphore: shared semaphore, a new one with MAX_CONCURRENCY_NUM permits is created when empty
 
         Returns:
 
@@ -155,7 +167,7 @@ class ZhihuCrawler(AbstractCrawler):
             utils.logger.info(f"[ZhihuCrawler.batch_get_content_comments] Crawling comment mode is not enabled")
             return
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = semaphore or asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
         task_list: List[Task] = []
         for content_item in content_list:
             task = asyncio.create_task(self.get_comments(content_item, semaphore), name=content_item.content_id)
@@ -176,7 +188,6 @@ class ZhihuCrawler(AbstractCrawler):
             utils.logger.info(f"[ZhihuCrawler.get_comments] Begin get note id comments {content_item.content_id}")
             await self.zhihu_client.get_note_all_comments(
                 content=content_item,
-                crawl_interval=random.random(),
                 callback=zhihu_store.batch_update_zhihu_note_comments
             )
 
@@ -204,7 +215,6 @@ class ZhihuCrawler(AbstractCrawler):
             # Get all anwser information of the creator
             all_content_list = await self.zhihu_client.get_all_anwser_by_creator(
                 creator=createor_info,
-                crawl_interval=random.random(),
                 callback=zhihu_store.batch_update_zhihu_contents
             )
 
@@ -212,14 +222,12 @@ class ZhihuCrawler(AbstractCrawler):
             # Get all articles of the creator's contents
             # all_content_list = await self.zhihu_client.get_all_articles_by_creator(
             #     creator=createor_info,
-            #     crawl_interval=random.random(),
             #     callback=zhihu_store.batch_update_zhihu_contents
             # )
 
             # Get all videos of the creator's contents
             # all_content_list = await self.zhihu_client.get_all_videos_by_creator(
             #     creator=createor_info,
-            #     crawl_interval=random.random(),
             #     callback=zhihu_store.batch_update_zhihu_contents
             # )
 
@@ -17,16 +17,32 @@ from urllib.parse import parse_qs, urlparse
 import execjs
 from parsel import Selector
 
+import config
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools.crawler_util import extract_text_from_html
+from tools.js_worker_pool import get_js_worker_pool
 
 ZHIHU_SGIN_JS = None
 
 
-def sign(url: str, cookies: str) -> Dict:
+async def sign(url: str, cookies: str) -> Dict:
     """
-    zhihu sign algorithm
+    zhihu sign algorithm, 通过常驻 Node worker 池计算签名，不阻塞事件循环
+    Args:
+        url: request url with query string
+        cookies: request cookies with d_c0 key
+
+    Returns:
+
+    """
+    sign_pool = get_js_worker_pool("libs/zhihu.js", worker_num=config.SIGN_JS_WORKER_NUM)
+    return await sign_pool.call("get_sign", url, cookies)
+
+
+def sign_by_execjs(url: str, cookies: str) -> Dict:
+    """
+    zhihu sign algorithm, execjs 同步版本，每次调用都会阻塞事件循环
     Args:
         url: request url with query string
         cookies: request cookies with d_c0 key
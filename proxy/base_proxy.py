@@ -16,10 +16,10 @@
 # @Url     : 快代理HTTP实现，官方文档：https://www.kuaidaili.com/?ref=ldwkjqipvz6c
 import json
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, Union
 
 import config
-from cache.abs_cache import AbstractCache
+from cache.abs_cache import AbstractAsyncCache, AbstractCache
 from cache.cache_factory import CacheFactory
 from tools.utils import utils
 
@@ -40,36 +40,61 @@ class ProxyProvider(ABC):
         """
         raise NotImplementedError
 
+    async def close(self):
+        """
+        释放提供商持有的资源（如缓存连接），代理池关闭时调用
+        :return:
+        """
+        pass
 
 
 class IpCache:
-    def __init__(self):
-        self.cache_client: AbstractCache = CacheFactory.create_cache(cache_type=config.CACHE_TYPE_MEMORY)
+    def __init__(self, cache_type: Optional[str] = None):
+        """
+        :param cache_type: 缓存类型，为空时使用 IP_PROXY_CACHE_TYPE，async_redis 时多个进程共享提取到的 IP
+        """
+        self.cache_client: Union[AbstractCache, AbstractAsyncCache] = CacheFactory.create_cache(
+            cache_type=cache_type or config.IP_PROXY_CACHE_TYPE)
 
-    def set_ip(self, ip_key: str, ip_value_info: str, ex: int):
+    async def set_ip(self, ip_key: str, ip_value_info: str, ex: int):
         """
-        设置IP并带有过期时间，到期之后由 redis 负责删除
+        设置IP并带有过期时间，到期之后由缓存负责删除
         :param ip_key:
         :param ip_value_info:
         :param ex:
         :return:
         """
-        self.cache_client.set(key=ip_key, value=ip_value_info, expire_time=ex)
+        if isinstance(self.cache_client, AbstractAsyncCache):
+            await self.cache_client.set(key=ip_key, value=ip_value_info, expire_time=ex)
+        else:
+            self.cache_client.set(key=ip_key, value=ip_value_info, expire_time=ex)
 
-    def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
+    async def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
         """
-        从 redis 中加载所有还未过期的 IP 信息
+        从缓存中加载所有还未过期的 IP 信息
         :param proxy_brand_name: 代理商名称
         :return:
         """
         all_ip_list: List[IpInfoModel] = []
-        all_ip_keys: List[str] = self.cache_client.keys(pattern=f"{proxy_brand_name}_*")
+        pattern = f"{proxy_brand_name}_*"
         try:
-            for ip_key in all_ip_keys:
-                ip_value = self.cache_client.get(ip_key)
+            # 一次批量读取所有 IP，redis 缓存只需要一次往返；异步 redis 缓存使用 SCAN + MGET，不阻塞事件循环
+            if isinstance(self.cache_client, AbstractAsyncCache):
+                ip_values = await self.cache_client.get_many(await self.cache_client.keys(pattern=pattern))
+            else:
+                ip_values = self.cache_client.get_many(self.cache_client.keys(pattern=pattern))
+            for ip_value in ip_values:
                 if not ip_value:
                     continue
                 all_ip_list.append(IpInfoModel(**json.loads(ip_value)))
         except Exception as e:
-            utils.logger.error("[IpCache.load_all_ip] get ip err from redis db", e)
+            utils.logger.error(f"[IpCache.load_all_ip] get ip err from cache: {e}")
         return all_ip_list
+
+    async def close(self):
+        """
+        关闭缓存客户端，释放 redis 连接
+        :return:
+        """
+        if isinstance(self.cache_client, AbstractAsyncCache):
+            await self.cache_client.close()
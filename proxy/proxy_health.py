@@ -0,0 +1,163 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 代理健康度
+#            按代理记录延迟和成功率的 EWMA 以及被封禁次数，数据来自 IP 验证和共享 httpx 客户端的每次请求；
+#            连续失败、成功率过低或被封禁的代理会被隔离一段时间，多次被封禁后不再使用
+
+import time
+from typing import Dict, Optional, Union
+
+import config
+from tools import utils
+
+from .types import IpInfoModel
+
+
+class ProxyHealth:
+    def __init__(self, name: str, alpha: float, max_consecutive_failures: int, min_success_rate: float,
+                 quarantine_seconds: float, max_block_count: int):
+        """
+        Args:
+            name: 代理名称，用于日志
+            alpha: EWMA 平滑系数
+            max_consecutive_failures: 连续失败多少次后隔离
+            min_success_rate: 成功率低于多少时隔离
+            quarantine_seconds: 隔离时长，每多被封禁一次翻倍
+            max_block_count: 被封禁多少次后不再使用
+        """
+        self.name = name
+        self.alpha = alpha
+        self.max_consecutive_failures = max_consecutive_failures
+        self.min_success_rate = min_success_rate
+        self.quarantine_seconds = quarantine_seconds
+        self.max_block_count = max_block_count
+        self.latency_ewma: Optional[float] = None
+        self.success_rate = 1.0
+        self.request_count = 0
+        self.block_count = 0
+        self.consecutive_failures = 0
+        self.quarantined_until = 0.0
+
+    def _quarantine(self, seconds: float, reason: str) -> None:
+        self.quarantined_until = time.monotonic() + seconds
+        self.consecutive_failures = 0
+        utils.logger.warning(f"[ProxyHealth._quarantine] proxy {self.name} quarantined for {seconds:.0f}s, "
+                             f"reason: {reason}, success rate: {self.success_rate:.2f}")
+
+    def record_success(self, latency: float) -> None:
+        """
+        请求成功，更新延迟和成功率
+        :param latency: 请求耗时（秒）
+        :return:
+        """
+        self.request_count += 1
+        self.consecutive_failures = 0
+        self.success_rate = (1 - self.alpha) * self.success_rate + self.alpha
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = (1 - self.alpha) * self.latency_ewma + self.alpha * latency
+
+    def record_failure(self) -> None:
+        """
+        连接失败、超时等请求失败，连续失败或成功率过低时隔离
+        :return:
+        """
+        self.request_count += 1
+        self.consecutive_failures += 1
+        self.success_rate = (1 - self.alpha) * self.success_rate
+        if self.consecutive_failures >= self.max_consecutive_failures:
+            self._quarantine(self.quarantine_seconds, f"{self.consecutive_failures} consecutive failures")
+        elif self.success_rate < self.min_success_rate:
+            self._quarantine(self.quarantine_seconds, "low success rate")
+
+    def record_block(self) -> None:
+        """
+        出现验证码、IP 封禁等信号，立即隔离，每多被封禁一次隔离时长翻倍
+        :return:
+        """
+        self.request_count += 1
+        self.block_count += 1
+        self.success_rate = (1 - self.alpha) * self.success_rate
+        self._quarantine(self.quarantine_seconds * 2 ** (self.block_count - 1), f"blocked {self.block_count} times")
+
+    @property
+    def is_dead(self) -> bool:
+        return self.block_count >= self.max_block_count
+
+    @property
+    def is_available(self) -> bool:
+        return not self.is_dead and self.quarantined_until <= time.monotonic()
+
+    def score(self) -> float:
+        """
+        健康分，成功率越高、延迟越低分数越高
+        :return:
+        """
+        return self.success_rate / max(self.latency_ewma if self.latency_ewma is not None else 1.0, 0.001)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "request_count": self.request_count,
+            "success_rate": round(self.success_rate, 4),
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 3) if self.latency_ewma is not None else None,
+            "block_count": self.block_count,
+            "available": self.is_available,
+        }
+
+
+# key 为 httpx 代理地址 http://user:password@ip:port
+_proxy_health: Dict[str, ProxyHealth] = {}
+
+
+def get_proxy_url(proxy: IpInfoModel) -> str:
+    """
+    代理的 httpx 地址，与 format_proxy_info 返回的一致
+    :param proxy:
+    :return:
+    """
+    return f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"
+
+
+def get_proxies_url(proxies: Optional[Union[str, Dict[str, str]]]) -> Optional[str]:
+    """
+    从 httpx 代理配置中取出代理地址，没有使用代理时返回 None
+    :param proxies:
+    :return:
+    """
+    if not proxies:
+        return None
+    if isinstance(proxies, str):
+        return proxies
+    return next(iter(proxies.values()), None)
+
+
+def get_proxy_health(proxy_url: str) -> ProxyHealth:
+    """
+    获取代理的健康度，同一个代理全局只有一份
+    :param proxy_url: httpx 代理地址
+    :return:
+    """
+    health = _proxy_health.get(proxy_url)
+    if health is None:
+        health = ProxyHealth(
+            name=proxy_url.rsplit("@", 1)[-1],
+            alpha=config.IP_PROXY_HEALTH_EWMA_ALPHA,
+            max_consecutive_failures=config.IP_PROXY_MAX_CONSECUTIVE_FAILURES,
+            min_success_rate=config.IP_PROXY_MIN_SUCCESS_RATE,
+            quarantine_seconds=config.IP_PROXY_QUARANTINE_SECONDS,
+            max_block_count=config.IP_PROXY_MAX_BLOCK_COUNT,
+        )
+        _proxy_health[proxy_url] = health
+    return health
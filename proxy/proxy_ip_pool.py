@@ -13,42 +13,111 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 13:45
 # @Desc    : ip代理池实现
+import asyncio
 import random
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_fixed
 
 import config
 from proxy.providers import new_jisu_http_proxy, new_kuai_daili_proxy
 from tools import utils
+from tools.http_client import retire_proxy_clients
 
-from .base_proxy import ProxyProvider
+from .base_proxy import IpGetError, ProxyProvider
+from .proxy_health import ProxyHealth, get_proxies_url, get_proxy_health, get_proxy_url
 from .types import IpInfoModel, ProviderNameEnum
 
 
 class ProxyIpPool:
-    def __init__(self, ip_pool_count: int, enable_validate_ip: bool, ip_provider: ProxyProvider) -> None:
+    def __init__(self, ip_pool_count: int, enable_validate_ip: bool, ip_provider: ProxyProvider,
+                 valid_ip_url: Optional[str] = None) -> None:
         """
 
         Args:
-            ip_pool_count:
-            enable_validate_ip:
-            ip_provider:
+            ip_pool_count: 池中保持的可用代理数量
+            enable_validate_ip: 是否在放入池中之前验证代理
+            ip_provider: 代理提供商
+            valid_ip_url: 验证 IP 是否有效的地址，为空时使用 IP_PROXY_VALIDATE_URL
         """
-        self.valid_ip_url = "https://httpbin.org/ip"  # 验证 IP 是否有效的地址
+        self.valid_ip_url = valid_ip_url or config.IP_PROXY_VALIDATE_URL
         self.ip_pool_count = ip_pool_count
         self.enable_validate_ip = enable_validate_ip
+        # 已验证、未过期的代理，取用后不移除，一直复用到过期或多次被封禁
         self.proxy_list: List[IpInfoModel] = []
         self.ip_provider: ProxyProvider = ip_provider
+        self._refill_lock = asyncio.Lock()
+        self._refill_task: Optional[asyncio.Task] = None
 
     async def load_proxies(self) -> None:
         """
-        加载IP代理
+        加载IP代理，并发验证后补充到池中，直到池中有 ip_pool_count 个可用代理
         Returns:
 
         """
-        self.proxy_list = await self.ip_provider.get_proxies(self.ip_pool_count)
+        async with self._refill_lock:
+            self._drop_unusable()
+            need_count = self.ip_pool_count - len(self._available_proxies())
+            if need_count <= 0:
+                return
+            proxies = await self.ip_provider.get_proxies(need_count)
+            # 提供商可能返回缓存中已在池里的代理
+            known_urls = {get_proxy_url(proxy) for proxy in self.proxy_list}
+            proxies = [proxy for proxy in proxies if get_proxy_url(proxy) not in known_urls]
+            if self.enable_validate_ip:
+                proxies = await self._validate_proxies(proxies)
+            self.proxy_list.extend(proxy for proxy in proxies if self._is_usable(proxy))
+            utils.logger.info(f"[ProxyIpPool.load_proxies] {len(self._available_proxies())} proxies available")
+
+    @staticmethod
+    def _health(proxy: IpInfoModel) -> ProxyHealth:
+        return get_proxy_health(get_proxy_url(proxy))
+
+    def _is_usable(self, proxy: IpInfoModel) -> bool:
+        if self._health(proxy).is_dead:
+            return False
+        if proxy.expired_time_ts is None:
+            return True
+        return proxy.expired_time_ts - utils.get_unix_timestamp() > config.IP_PROXY_EXPIRE_MARGIN
+
+    def _drop_unusable(self) -> None:
+        usable_proxies = [proxy for proxy in self.proxy_list if self._is_usable(proxy)]
+        for proxy in self.proxy_list:
+            if proxy not in usable_proxies:
+                # 过期或不再使用的代理，关闭共享客户端中到它的连接池
+                retire_proxy_clients(get_proxy_url(proxy))
+        self.proxy_list = usable_proxies
+
+    def _available_proxies(self) -> List[IpInfoModel]:
+        # 未过期且不在隔离期的代理
+        return [proxy for proxy in self.proxy_list if self._health(proxy).is_available]
+
+    def _choose_proxy(self, proxies: List[IpInfoModel]) -> IpInfoModel:
+        """
+        power of two choices：随机抽两个代理，取健康分高的一个，既偏向健康的代理又不会把请求全压在同一个代理上
+        :param proxies: 可用的代理
+        :return:
+        """
+        if len(proxies) == 1:
+            return proxies[0]
+        first, second = random.sample(proxies, 2)
+        return first if self._health(first).score() >= self._health(second).score() else second
+
+    async def _validate_proxies(self, proxies: List[IpInfoModel]) -> List[IpInfoModel]:
+        """
+        并发验证代理IP，返回有效的代理
+        :param proxies:
+        :return:
+        """
+        semaphore = asyncio.Semaphore(config.IP_PROXY_VALIDATE_CONCURRENCY)
+
+        async def validate(proxy: IpInfoModel) -> bool:
+            async with semaphore:
+                return await self._is_valid_proxy(proxy)
+
+        results = await asyncio.gather(*[validate(proxy) for proxy in proxies])
+        return [proxy for proxy, is_valid in zip(proxies, results) if is_valid]
 
     async def _is_valid_proxy(self, proxy: IpInfoModel) -> bool:
         """
@@ -58,43 +127,82 @@ class ProxyIpPool:
         """
         utils.logger.info(f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} is it valid ")
         try:
+            # 不论验证地址是 http 还是 https 都经过代理访问
             httpx_proxy = {
-                f"{proxy.protocol}": f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"
+                "all://": f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"
             }
-            async with httpx.AsyncClient(proxies=httpx_proxy) as client:
+            start = time.monotonic()
+            async with httpx.AsyncClient(proxies=httpx_proxy, timeout=config.IP_PROXY_VALIDATE_TIMEOUT) as client:
                 response = await client.get(self.valid_ip_url)
-            if response.status_code == 200:
-                return True
-            else:
+            if response.status_code != 200:
                 return False
+            # 验证耗时作为代理延迟的第一个样本
+            self._health(proxy).record_success(time.monotonic() - start)
+            return True
         except Exception as e:
             utils.logger.info(f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} err: {e}")
-            raise e
+            return False
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def get_proxy(self) -> IpInfoModel:
         """
-        从代理池中随机提取一个代理IP
+        按健康度从代理池中选择一个代理IP，代理取用后留在池中继续复用；可用代理不足时在后台补充
         :return:
         """
-        if len(self.proxy_list) == 0:
+        self._drop_unusable()
+        proxies = self._available_proxies()
+        if not proxies:
+            # 没有可用的代理，只能等待这次补充完成
             await self._reload_proxies()
+            proxies = self._available_proxies()
+            if not proxies:
+                raise IpGetError("[ProxyIpPool.get_proxy] no valid proxy ip available")
 
-        proxy = random.choice(self.proxy_list)
-        self.proxy_list.remove(proxy) # 取出来一个IP就应该移出掉
-        if self.enable_validate_ip:
-            if not await self._is_valid_proxy(proxy):
-                raise Exception("[ProxyIpPool.get_proxy] current ip invalid and again get it")
-        return proxy
+        if len(proxies) < self.ip_pool_count and (self._refill_task is None or self._refill_task.done()):
+            self._refill_task = asyncio.create_task(self._refill_in_background())
+        return self._choose_proxy(proxies)
+
+    async def refresh_proxies(self, proxies: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        """
+        客户端当前使用的代理过期、被隔离或多次被封禁后，从池中重新选择一个健康的代理，否则原样返回
+        :param proxies: 客户端当前的 httpx 代理配置
+        :return:
+        """
+        proxy_url = get_proxies_url(proxies)
+        for proxy in self.proxy_list:
+            if get_proxy_url(proxy) == proxy_url:
+                if self._is_usable(proxy) and self._health(proxy).is_available:
+                    return proxies
+                break
+        new_proxy = await self.get_proxy()
+        _, new_proxies = utils.format_proxy_info(new_proxy)
+        utils.logger.info(f"[ProxyIpPool.refresh_proxies] current proxy is unavailable, "
+                          f"switch to {new_proxy.ip}:{new_proxy.port}")
+        return new_proxies
+
+    async def _refill_in_background(self):
+        try:
+            await self.load_proxies()
+        except Exception as e:
+            utils.logger.error(f"[ProxyIpPool._refill_in_background] refill proxies error: {e}")
 
     async def _reload_proxies(self):
         """
         # 重新加载代理池
         :return:
         """
-        self.proxy_list = []
         await self.load_proxies()
 
+    async def close(self):
+        """
+        取消后台补充任务并等待其结束，再关闭代理提供商的 IP 缓存连接
+        :return:
+        """
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            await asyncio.gather(self._refill_task, return_exceptions=True)
+            self._refill_task = None
+        await self.ip_provider.close()
+
 
 IpProxyProvider: Dict[str, ProxyProvider] = {
     ProviderNameEnum.JISHU_HTTP_PROVIDER.value: new_jisu_http_proxy(),
@@ -102,6 +210,10 @@ IpProxyProvider: Dict[str, ProxyProvider] = {
 }
 
 
+# 本次运行使用的代理池，平台客户端每次请求前通过 refresh_proxies 检查当前代理是否仍然可用
+_ip_pool: Optional[ProxyIpPool] = None
+
+
 async def create_ip_pool(ip_pool_count: int, enable_validate_ip: bool) -> ProxyIpPool:
     """
      创建 IP 代理池
@@ -109,13 +221,37 @@ async def create_ip_pool(ip_pool_count: int, enable_validate_ip: bool) -> ProxyI
     :param enable_validate_ip: 是否开启验证IP代理
     :return:
     """
+    global _ip_pool
     pool = ProxyIpPool(ip_pool_count=ip_pool_count,
                        enable_validate_ip=enable_validate_ip,
                        ip_provider=IpProxyProvider.get(config.IP_PROXY_PROVIDER_NAME)
                        )
     await pool.load_proxies()
+    _ip_pool = pool
     return pool
 
 
+async def refresh_proxies(proxies: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """
+    没有开启代理池或没有使用代理时原样返回；当前代理不可用时从代理池中换一个健康的代理
+    :param proxies: 客户端当前的 httpx 代理配置
+    :return:
+    """
+    if _ip_pool is None or not proxies:
+        return proxies
+    return await _ip_pool.refresh_proxies(proxies)
+
+
+async def close_ip_pool() -> None:
+    """
+    关闭本次运行的代理池，停止后台补充任务，爬虫结束时调用
+    :return:
+    """
+    global _ip_pool
+    if _ip_pool is not None:
+        pool, _ip_pool = _ip_pool, None
+        await pool.close()
+
+
 if __name__ == '__main__':
     pass
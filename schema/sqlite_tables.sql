@@ -0,0 +1,460 @@
+-- SQLite 版本的表结构，由 schema/tables.sql 移植而来，供 SAVE_DATA_OPTION = "sqlite" 使用
+-- 启动时自动执行，只创建不存在的表和索引，不会删除已有数据
+
+-- B站视频
+CREATE TABLE IF NOT EXISTS `bilibili_video`
+(
+    `id`               INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`          TEXT, -- 用户ID
+    `nickname`         TEXT, -- 用户昵称
+    `avatar`           TEXT, -- 用户头像地址
+    `add_ts`           INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts`   INTEGER NOT NULL, -- 记录最后修改时间戳
+    `video_id`         TEXT NOT NULL, -- 视频ID
+    `video_type`       TEXT NOT NULL, -- 视频类型
+    `title`            TEXT, -- 视频标题
+    `desc`             TEXT, -- 视频描述
+    `create_time`      INTEGER NOT NULL, -- 视频发布时间戳
+    `liked_count`      TEXT, -- 视频点赞数
+    `video_play_count` TEXT, -- 视频播放数量
+    `video_danmaku`    TEXT, -- 视频弹幕数量
+    `video_comment`    TEXT, -- 视频评论数量
+    `video_url`        TEXT, -- 视频详情URL
+    `video_cover_url`  TEXT, -- 视频封面图 URL
+    `source_keyword`   TEXT DEFAULT '' -- 搜索来源关键字
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_bilibili_vi_video_i_31c36e` ON `bilibili_video` (`video_id`);
+CREATE INDEX IF NOT EXISTS `idx_bilibili_vi_create__73e0ec` ON `bilibili_video` (`create_time`);
+
+-- B 站视频评论
+CREATE TABLE IF NOT EXISTS `bilibili_video_comment`
+(
+    `id`                INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`           TEXT, -- 用户ID
+    `nickname`          TEXT, -- 用户昵称
+    `avatar`            TEXT, -- 用户头像地址
+    `add_ts`            INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts`    INTEGER NOT NULL, -- 记录最后修改时间戳
+    `comment_id`        TEXT NOT NULL, -- 评论ID
+    `video_id`          TEXT NOT NULL, -- 视频ID
+    `content`           TEXT, -- 评论内容
+    `create_time`       INTEGER NOT NULL, -- 评论时间戳
+    `sub_comment_count` TEXT NOT NULL, -- 评论回复数
+    `parent_comment_id` TEXT -- 父评论ID
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_bilibili_vi_comment_41c34e` ON `bilibili_video_comment` (`comment_id`);
+CREATE INDEX IF NOT EXISTS `idx_bilibili_vi_video_i_f22873` ON `bilibili_video_comment` (`video_id`);
+
+-- B 站UP主信息
+CREATE TABLE IF NOT EXISTS `bilibili_up_info`
+(
+    `id`             INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`        TEXT, -- 用户ID
+    `nickname`       TEXT, -- 用户昵称
+    `avatar`         TEXT, -- 用户头像地址
+    `add_ts`         INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts` INTEGER NOT NULL, -- 记录最后修改时间戳
+    `total_fans`     INTEGER, -- 粉丝数
+    `total_liked`    INTEGER, -- 总获赞数
+    `user_rank`      INTEGER, -- 用户等级
+    `is_official`    INTEGER -- 是否官号
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_bilibili_vi_user_123456` ON `bilibili_up_info` (`user_id`);
+
+-- 抖音视频
+CREATE TABLE IF NOT EXISTS `douyin_aweme`
+(
+    `id`              INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`         TEXT, -- 用户ID
+    `sec_uid`         TEXT, -- 用户sec_uid
+    `short_user_id`   TEXT, -- 用户短ID
+    `user_unique_id`  TEXT, -- 用户唯一ID
+    `nickname`        TEXT, -- 用户昵称
+    `avatar`          TEXT, -- 用户头像地址
+    `user_signature`  TEXT, -- 用户签名
+    `ip_location`     TEXT, -- 评论时的IP地址
+    `add_ts`          INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts`  INTEGER NOT NULL, -- 记录最后修改时间戳
+    `aweme_id`        TEXT NOT NULL, -- 视频ID
+    `aweme_type`      TEXT NOT NULL, -- 视频类型
+    `title`           TEXT, -- 视频标题
+    `desc`            TEXT, -- 视频描述
+    `create_time`     INTEGER NOT NULL, -- 视频发布时间戳
+    `liked_count`     TEXT, -- 视频点赞数
+    `comment_count`   TEXT, -- 视频评论数
+    `share_count`     TEXT, -- 视频分享数
+    `collected_count` TEXT, -- 视频收藏数
+    `aweme_url`       TEXT, -- 视频详情页URL
+    `source_keyword`  TEXT DEFAULT '' -- 搜索来源关键字
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_douyin_awem_aweme_i_6f7bc6` ON `douyin_aweme` (`aweme_id`);
+CREATE INDEX IF NOT EXISTS `idx_douyin_awem_create__299dfe` ON `douyin_aweme` (`create_time`);
+
+-- 抖音视频评论
+CREATE TABLE IF NOT EXISTS `douyin_aweme_comment`
+(
+    `id`                INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`           TEXT, -- 用户ID
+    `sec_uid`           TEXT, -- 用户sec_uid
+    `short_user_id`     TEXT, -- 用户短ID
+    `user_unique_id`    TEXT, -- 用户唯一ID
+    `nickname`          TEXT, -- 用户昵称
+    `avatar`            TEXT, -- 用户头像地址
+    `user_signature`    TEXT, -- 用户签名
+    `ip_location`       TEXT, -- 评论时的IP地址
+    `add_ts`            INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts`    INTEGER NOT NULL, -- 记录最后修改时间戳
+    `comment_id`        TEXT NOT NULL, -- 评论ID
+    `aweme_id`          TEXT NOT NULL, -- 视频ID
+    `content`           TEXT, -- 评论内容
+    `create_time`       INTEGER NOT NULL, -- 评论时间戳
+    `sub_comment_count` TEXT NOT NULL, -- 评论回复数
+    `parent_comment_id` TEXT, -- 父评论ID
+    `like_count`        TEXT NOT NULL DEFAULT '0' -- 点赞数
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_douyin_awem_comment_fcd7e4` ON `douyin_aweme_comment` (`comment_id`);
+CREATE INDEX IF NOT EXISTS `idx_douyin_awem_aweme_i_c50049` ON `douyin_aweme_comment` (`aweme_id`);
+
+-- 抖音博主信息
+CREATE TABLE IF NOT EXISTS `dy_creator`
+(
+    `id`             INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`        TEXT NOT NULL, -- 用户ID
+    `nickname`       TEXT, -- 用户昵称
+    `avatar`         TEXT, -- 用户头像地址
+    `ip_location`    TEXT, -- 评论时的IP地址
+    `add_ts`         INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts` INTEGER NOT NULL, -- 记录最后修改时间戳
+    `desc`           TEXT, -- 用户描述
+    `gender`         TEXT, -- 性别
+    `follows`        TEXT, -- 关注数
+    `fans`           TEXT, -- 粉丝数
+    `interaction`    TEXT, -- 获赞数
+    `videos_count`   TEXT -- 作品数
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_dy_creator_user_id` ON `dy_creator` (`user_id`);
+
+-- 快手视频
+CREATE TABLE IF NOT EXISTS `kuaishou_video`
+(
+    `id`              INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`         TEXT, -- 用户ID
+    `nickname`        TEXT, -- 用户昵称
+    `avatar`          TEXT, -- 用户头像地址
+    `add_ts`          INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts`  INTEGER NOT NULL, -- 记录最后修改时间戳
+    `video_id`        TEXT NOT NULL, -- 视频ID
+    `video_type`      TEXT NOT NULL, -- 视频类型
+    `title`           TEXT, -- 视频标题
+    `desc`            TEXT, -- 视频描述
+    `create_time`     INTEGER NOT NULL, -- 视频发布时间戳
+    `liked_count`     TEXT, -- 视频点赞数
+    `viewd_count`     TEXT, -- 视频浏览数量
+    `video_url`       TEXT, -- 视频详情URL
+    `video_cover_url` TEXT, -- 视频封面图 URL
+    `video_play_url`  TEXT, -- 视频播放 URL
+    `source_keyword`  TEXT DEFAULT '' -- 搜索来源关键字
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_kuaishou_vi_video_i_c5c6a6` ON `kuaishou_video` (`video_id`);
+CREATE INDEX IF NOT EXISTS `idx_kuaishou_vi_create__a10dee` ON `kuaishou_video` (`create_time`);
+
+-- 快手视频评论
+CREATE TABLE IF NOT EXISTS `kuaishou_video_comment`
+(
+    `id`                INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`           TEXT, -- 用户ID
+    `nickname`          TEXT, -- 用户昵称
+    `avatar`            TEXT, -- 用户头像地址
+    `add_ts`            INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts`    INTEGER NOT NULL, -- 记录最后修改时间戳
+    `comment_id`        TEXT NOT NULL, -- 评论ID
+    `video_id`          TEXT NOT NULL, -- 视频ID
+    `content`           TEXT, -- 评论内容
+    `create_time`       INTEGER NOT NULL, -- 评论时间戳
+    `sub_comment_count` TEXT NOT NULL -- 评论回复数
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_kuaishou_vi_comment_ed48fa` ON `kuaishou_video_comment` (`comment_id`);
+CREATE INDEX IF NOT EXISTS `idx_kuaishou_vi_video_i_e50914` ON `kuaishou_video_comment` (`video_id`);
+
+-- 微博帖子
+CREATE TABLE IF NOT EXISTS `weibo_note`
+(
+    `id`               INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`          TEXT, -- 用户ID
+    `nickname`         TEXT, -- 用户昵称
+    `avatar`           TEXT, -- 用户头像地址
+    `gender`           TEXT, -- 用户性别
+    `profile_url`      TEXT, -- 用户主页地址
+    `ip_location`      TEXT DEFAULT '发布微博的地理信息',
+    `add_ts`           INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts`   INTEGER NOT NULL, -- 记录最后修改时间戳
+    `note_id`          TEXT NOT NULL, -- 帖子ID
+    `content`          TEXT, -- 帖子正文内容
+    `create_time`      INTEGER NOT NULL, -- 帖子发布时间戳
+    `create_date_time` TEXT NOT NULL, -- 帖子发布日期时间
+    `liked_count`      TEXT, -- 帖子点赞数
+    `comments_count`   TEXT, -- 帖子评论数量
+    `shared_count`     TEXT, -- 帖子转发数量
+    `note_url`         TEXT, -- 帖子详情URL
+    `source_keyword`   TEXT DEFAULT '' -- 搜索来源关键字
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_weibo_note_note_id_f95b1a` ON `weibo_note` (`note_id`);
+CREATE INDEX IF NOT EXISTS `idx_weibo_note_create__692709` ON `weibo_note` (`create_time`);
+CREATE INDEX IF NOT EXISTS `idx_weibo_note_create__d05ed2` ON `weibo_note` (`create_date_time`);
+
+-- 微博帖子评论
+CREATE TABLE IF NOT EXISTS `weibo_note_comment`
+(
+    `id`                 INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`            TEXT, -- 用户ID
+    `nickname`           TEXT, -- 用户昵称
+    `avatar`             TEXT, -- 用户头像地址
+    `gender`             TEXT, -- 用户性别
+    `profile_url`        TEXT, -- 用户主页地址
+    `ip_location`        TEXT DEFAULT '发布微博的地理信息',
+    `add_ts`             INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts`     INTEGER NOT NULL, -- 记录最后修改时间戳
+    `comment_id`         TEXT NOT NULL, -- 评论ID
+    `note_id`            TEXT NOT NULL, -- 帖子ID
+    `content`            TEXT, -- 评论内容
+    `create_time`        INTEGER NOT NULL, -- 评论时间戳
+    `create_date_time`   TEXT NOT NULL, -- 评论日期时间
+    `comment_like_count` TEXT NOT NULL, -- 评论点赞数量
+    `sub_comment_count`  TEXT NOT NULL, -- 评论回复数
+    `parent_comment_id`  TEXT -- 父评论ID
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_weibo_note__comment_c7611c` ON `weibo_note_comment` (`comment_id`);
+CREATE INDEX IF NOT EXISTS `idx_weibo_note__note_id_24f108` ON `weibo_note_comment` (`note_id`);
+CREATE INDEX IF NOT EXISTS `idx_weibo_note__create__667fe3` ON `weibo_note_comment` (`create_date_time`);
+
+-- 小红书博主
+CREATE TABLE IF NOT EXISTS `xhs_creator`
+(
+    `id`             INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`        TEXT NOT NULL, -- 用户ID
+    `nickname`       TEXT, -- 用户昵称
+    `avatar`         TEXT, -- 用户头像地址
+    `ip_location`    TEXT, -- 评论时的IP地址
+    `add_ts`         INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts` INTEGER NOT NULL, -- 记录最后修改时间戳
+    `desc`           TEXT, -- 用户描述
+    `gender`         TEXT, -- 性别
+    `follows`        TEXT, -- 关注数
+    `fans`           TEXT, -- 粉丝数
+    `interaction`    TEXT, -- 获赞和收藏数
+    `tag_list`       TEXT -- 标签列表
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_xhs_creator_user_id` ON `xhs_creator` (`user_id`);
+
+-- 小红书笔记
+CREATE TABLE IF NOT EXISTS `xhs_note`
+(
+    `id`               INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`          TEXT NOT NULL, -- 用户ID
+    `nickname`         TEXT, -- 用户昵称
+    `avatar`           TEXT, -- 用户头像地址
+    `ip_location`      TEXT, -- 评论时的IP地址
+    `add_ts`           INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts`   INTEGER NOT NULL, -- 记录最后修改时间戳
+    `note_id`          TEXT NOT NULL, -- 笔记ID
+    `type`             TEXT, -- 笔记类型(normal | video)
+    `title`            TEXT, -- 笔记标题
+    `desc`             TEXT, -- 笔记描述
+    `video_url`        TEXT, -- 视频地址
+    `time`             INTEGER NOT NULL, -- 笔记发布时间戳
+    `last_update_time` INTEGER NOT NULL, -- 笔记最后更新时间戳
+    `liked_count`      TEXT, -- 笔记点赞数
+    `collected_count`  TEXT, -- 笔记收藏数
+    `comment_count`    TEXT, -- 笔记评论数
+    `share_count`      TEXT, -- 笔记分享数
+    `image_list`       TEXT, -- 笔记封面图片列表
+    `tag_list`         TEXT, -- 标签列表
+    `note_url`         TEXT, -- 笔记详情页的URL
+    `source_keyword`   TEXT DEFAULT '' -- 搜索来源关键字
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_xhs_note_note_id_209457` ON `xhs_note` (`note_id`);
+CREATE INDEX IF NOT EXISTS `idx_xhs_note_time_eaa910` ON `xhs_note` (`time`);
+
+-- 小红书笔记评论
+CREATE TABLE IF NOT EXISTS `xhs_note_comment`
+(
+    `id`                INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`           TEXT NOT NULL, -- 用户ID
+    `nickname`          TEXT, -- 用户昵称
+    `avatar`            TEXT, -- 用户头像地址
+    `ip_location`       TEXT, -- 评论时的IP地址
+    `add_ts`            INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts`    INTEGER NOT NULL, -- 记录最后修改时间戳
+    `comment_id`        TEXT NOT NULL, -- 评论ID
+    `create_time`       INTEGER NOT NULL, -- 评论时间戳
+    `note_id`           TEXT NOT NULL, -- 笔记ID
+    `content`           TEXT NOT NULL, -- 评论内容
+    `sub_comment_count` INTEGER NOT NULL, -- 子评论数量
+    `pictures`          TEXT,
+    `parent_comment_id` TEXT, -- 父评论ID
+    `like_count`        TEXT -- 评论点赞数量
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_xhs_note_co_comment_8e8349` ON `xhs_note_comment` (`comment_id`);
+CREATE INDEX IF NOT EXISTS `idx_xhs_note_co_create__204f8d` ON `xhs_note_comment` (`create_time`);
+
+-- 贴吧帖子表
+CREATE TABLE IF NOT EXISTS `tieba_note`
+(
+    `id`                INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `note_id`           TEXT NOT NULL, -- 帖子ID
+    `title`             TEXT NOT NULL, -- 帖子标题
+    `desc`              TEXT, -- 帖子描述
+    `note_url`          TEXT NOT NULL, -- 帖子链接
+    `publish_time`      TEXT NOT NULL, -- 发布时间
+    `user_link`         TEXT DEFAULT '', -- 用户主页链接
+    `user_nickname`     TEXT DEFAULT '', -- 用户昵称
+    `user_avatar`       TEXT DEFAULT '', -- 用户头像地址
+    `tieba_id`          TEXT DEFAULT '', -- 贴吧ID
+    `tieba_name`        TEXT NOT NULL, -- 贴吧名称
+    `tieba_link`        TEXT NOT NULL, -- 贴吧链接
+    `total_replay_num`  INTEGER DEFAULT 0, -- 帖子回复总数
+    `total_replay_page` INTEGER DEFAULT 0, -- 帖子回复总页数
+    `ip_location`       TEXT DEFAULT '', -- IP地理位置
+    `add_ts`            INTEGER NOT NULL, -- 添加时间戳
+    `last_modify_ts`    INTEGER NOT NULL, -- 最后修改时间戳
+    `source_keyword`    TEXT DEFAULT '' -- 搜索来源关键字
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_tieba_note_note_id` ON `tieba_note` (`note_id`);
+CREATE INDEX IF NOT EXISTS `idx_tieba_note_publish_time` ON `tieba_note` (`publish_time`);
+
+-- 贴吧评论表
+CREATE TABLE IF NOT EXISTS `tieba_comment`
+(
+    `id`                INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `comment_id`        TEXT NOT NULL, -- 评论ID
+    `parent_comment_id` TEXT DEFAULT '', -- 父评论ID
+    `content`           TEXT NOT NULL, -- 评论内容
+    `user_link`         TEXT DEFAULT '', -- 用户主页链接
+    `user_nickname`     TEXT DEFAULT '', -- 用户昵称
+    `user_avatar`       TEXT DEFAULT '', -- 用户头像地址
+    `tieba_id`          TEXT DEFAULT '', -- 贴吧ID
+    `tieba_name`        TEXT NOT NULL, -- 贴吧名称
+    `tieba_link`        TEXT NOT NULL, -- 贴吧链接
+    `publish_time`      TEXT DEFAULT '', -- 发布时间
+    `ip_location`       TEXT DEFAULT '', -- IP地理位置
+    `sub_comment_count` INTEGER DEFAULT 0, -- 子评论数
+    `note_id`           TEXT NOT NULL, -- 帖子ID
+    `note_url`          TEXT NOT NULL, -- 帖子链接
+    `add_ts`            INTEGER NOT NULL, -- 添加时间戳
+    `last_modify_ts`    INTEGER NOT NULL -- 最后修改时间戳
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_tieba_comment_comment_id` ON `tieba_comment` (`comment_id`);
+CREATE INDEX IF NOT EXISTS `idx_tieba_comment_note_id` ON `tieba_comment` (`note_id`);
+CREATE INDEX IF NOT EXISTS `idx_tieba_comment_publish_time` ON `tieba_comment` (`publish_time`);
+
+-- 微博博主
+CREATE TABLE IF NOT EXISTS `weibo_creator`
+(
+    `id`             INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`        TEXT NOT NULL, -- 用户ID
+    `nickname`       TEXT, -- 用户昵称
+    `avatar`         TEXT, -- 用户头像地址
+    `ip_location`    TEXT, -- 评论时的IP地址
+    `add_ts`         INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts` INTEGER NOT NULL, -- 记录最后修改时间戳
+    `desc`           TEXT, -- 用户描述
+    `gender`         TEXT, -- 性别
+    `follows`        TEXT, -- 关注数
+    `fans`           TEXT, -- 粉丝数
+    `tag_list`       TEXT -- 标签列表
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_weibo_creator_user_id` ON `weibo_creator` (`user_id`);
+
+-- 贴吧创作者
+CREATE TABLE IF NOT EXISTS `tieba_creator`
+(
+    `id`                    INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`               TEXT NOT NULL, -- 用户ID
+    `user_name`             TEXT NOT NULL, -- 用户名
+    `nickname`              TEXT, -- 用户昵称
+    `avatar`                TEXT, -- 用户头像地址
+    `ip_location`           TEXT, -- 评论时的IP地址
+    `add_ts`                INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts`        INTEGER NOT NULL, -- 记录最后修改时间戳
+    `gender`                TEXT, -- 性别
+    `follows`               TEXT, -- 关注数
+    `fans`                  TEXT, -- 粉丝数
+    `registration_duration` TEXT -- 吧龄
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_tieba_creator_user_id` ON `tieba_creator` (`user_id`);
+
+-- 知乎内容（回答、文章、视频）
+CREATE TABLE IF NOT EXISTS `zhihu_content`
+(
+    `id`             INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `content_id`     TEXT NOT NULL, -- 内容ID
+    `content_type`   TEXT NOT NULL, -- 内容类型(article | answer | zvideo)
+    `content_text`   TEXT, -- 内容文本, 如果是视频类型这里为空
+    `content_url`    TEXT NOT NULL, -- 内容落地链接
+    `question_id`    TEXT, -- 问题ID, type为answer时有值
+    `title`          TEXT NOT NULL, -- 内容标题
+    `desc`           TEXT, -- 内容描述
+    `created_time`   TEXT NOT NULL, -- 创建时间
+    `updated_time`   TEXT NOT NULL, -- 更新时间
+    `voteup_count`   INTEGER NOT NULL DEFAULT 0, -- 赞同人数
+    `comment_count`  INTEGER NOT NULL DEFAULT 0, -- 评论数量
+    `source_keyword` TEXT, -- 来源关键词
+    `user_id`        TEXT NOT NULL, -- 用户ID
+    `user_link`      TEXT NOT NULL, -- 用户主页链接
+    `user_nickname`  TEXT NOT NULL, -- 用户昵称
+    `user_avatar`    TEXT NOT NULL, -- 用户头像地址
+    `user_url_token` TEXT NOT NULL, -- 用户url_token
+    `add_ts`         INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts` INTEGER NOT NULL -- 记录最后修改时间戳
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_zhihu_content_content_id` ON `zhihu_content` (`content_id`);
+CREATE INDEX IF NOT EXISTS `idx_zhihu_content_created_time` ON `zhihu_content` (`created_time`);
+
+-- 知乎评论
+CREATE TABLE IF NOT EXISTS `zhihu_comment`
+(
+    `id`                INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `comment_id`        TEXT NOT NULL, -- 评论ID
+    `parent_comment_id` TEXT, -- 父评论ID
+    `content`           TEXT NOT NULL, -- 评论内容
+    `publish_time`      TEXT NOT NULL, -- 发布时间
+    `ip_location`       TEXT, -- IP地理位置
+    `sub_comment_count` INTEGER NOT NULL DEFAULT 0, -- 子评论数
+    `like_count`        INTEGER NOT NULL DEFAULT 0, -- 点赞数
+    `dislike_count`     INTEGER NOT NULL DEFAULT 0, -- 踩数
+    `content_id`        TEXT NOT NULL, -- 内容ID
+    `content_type`      TEXT NOT NULL, -- 内容类型(article | answer | zvideo)
+    `user_id`           TEXT NOT NULL, -- 用户ID
+    `user_link`         TEXT NOT NULL, -- 用户主页链接
+    `user_nickname`     TEXT NOT NULL, -- 用户昵称
+    `user_avatar`       TEXT NOT NULL, -- 用户头像地址
+    `add_ts`            INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts`    INTEGER NOT NULL -- 记录最后修改时间戳
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_zhihu_comment_comment_id` ON `zhihu_comment` (`comment_id`);
+CREATE INDEX IF NOT EXISTS `idx_zhihu_comment_content_id` ON `zhihu_comment` (`content_id`);
+CREATE INDEX IF NOT EXISTS `idx_zhihu_comment_publish_time` ON `zhihu_comment` (`publish_time`);
+
+-- 知乎创作者
+CREATE TABLE IF NOT EXISTS `zhihu_creator`
+(
+    `id`               INTEGER PRIMARY KEY AUTOINCREMENT, -- 自增ID
+    `user_id`          TEXT NOT NULL, -- 用户ID
+    `user_link`        TEXT NOT NULL, -- 用户主页链接
+    `user_nickname`    TEXT NOT NULL, -- 用户昵称
+    `user_avatar`      TEXT NOT NULL, -- 用户头像地址
+    `url_token`        TEXT NOT NULL, -- 用户URL Token
+    `gender`           TEXT, -- 用户性别
+    `ip_location`      TEXT, -- IP地理位置
+    `follows`          INTEGER NOT NULL DEFAULT 0, -- 关注数
+    `fans`             INTEGER NOT NULL DEFAULT 0, -- 粉丝数
+    `anwser_count`     INTEGER NOT NULL DEFAULT 0, -- 回答数
+    `video_count`      INTEGER NOT NULL DEFAULT 0, -- 视频数
+    `question_count`   INTEGER NOT NULL DEFAULT 0, -- 问题数
+    `article_count`    INTEGER NOT NULL DEFAULT 0, -- 文章数
+    `column_count`     INTEGER NOT NULL DEFAULT 0, -- 专栏数
+    `get_voteup_count` INTEGER NOT NULL DEFAULT 0, -- 获得的赞同数
+    `add_ts`           INTEGER NOT NULL, -- 记录添加时间戳
+    `last_modify_ts`   INTEGER NOT NULL -- 记录最后修改时间戳
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `idx_zhihu_creator_user_id` ON `zhihu_creator` (`user_id`);
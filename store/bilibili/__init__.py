@@ -17,6 +17,7 @@
 from typing import List
 
 import config
+from store.store_registry import get_store
 from var import source_keyword_var
 
 from .bilibili_store_impl import *
@@ -27,7 +28,10 @@ class BiliStoreFactory:
     STORES = {
         "csv": BiliCsvStoreImplement,
         "db": BiliDbStoreImplement,
-        "json": BiliJsonStoreImplement
+        "json": BiliJsonStoreImplement,
+        "jsonl": BiliJsonlStoreImplement,
+        "sqlite": BiliSqliteStoreImplement,
+        "parquet": BiliParquetStoreImplement,
     }
 
     @staticmethod
@@ -35,8 +39,8 @@ class BiliStoreFactory:
         store_class = BiliStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
+        return get_store(store_class)
 
 
 async def update_bilibili_video(video_item: Dict):
@@ -88,16 +92,18 @@ async def update_up_info(video_item: Dict):
 async def batch_update_bilibili_video_comments(video_id: str, comments: List[Dict]):
     if not comments:
         return
-    for comment_item in comments:
-        await update_bilibili_video_comment(video_id, comment_item)
+    comment_items = [_build_bilibili_video_comment_item(video_id, comment_item) for comment_item in comments]
+    utils.logger.info(
+        f"[store.bilibili.batch_update_bilibili_video_comments] Bilibili video: {video_id}, {len(comment_items)} comments")
+    await BiliStoreFactory.create_store().store_comments(comment_items=comment_items)
 
 
-async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
+def _build_bilibili_video_comment_item(video_id: str, comment_item: Dict) -> Dict:
     comment_id = str(comment_item.get("rpid"))
     parent_comment_id = str(comment_item.get("parent", 0))
     content: Dict = comment_item.get("content")
     user_info: Dict = comment_item.get("member")
-    save_comment_item = {
+    return {
         "comment_id": comment_id,
         "parent_comment_id": parent_comment_id,
         "create_time": comment_item.get("ctime"),
@@ -109,8 +115,12 @@ async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
         "sub_comment_count": str(comment_item.get("rcount", 0)),
         "last_modify_ts": utils.get_current_timestamp(),
     }
+
+
+async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
+    save_comment_item = _build_bilibili_video_comment_item(video_id, comment_item)
     utils.logger.info(
-        f"[store.bilibili.update_bilibili_video_comment] Bilibili video comment: {comment_id}, content: {save_comment_item.get('content')}")
+        f"[store.bilibili.update_bilibili_video_comment] Bilibili video comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content')}")
     await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
 
 
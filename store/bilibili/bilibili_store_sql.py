@@ -17,6 +17,7 @@
 from typing import Dict, List
 
 from db import AsyncMysqlDB
+from store.db_batch_writer import get_db_batch_writer
 from var import media_crawler_db_var
 
 
@@ -30,8 +31,8 @@ async def query_content_by_content_id(content_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_video where video_id = '{content_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
+    sql: str = "select * from bilibili_video where video_id = %s"
+    rows: List[Dict] = await async_db_conn.query(sql, content_id)
     if len(rows) > 0:
         return rows[0]
     return dict()
@@ -77,8 +78,8 @@ async def query_comment_by_comment_id(comment_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_video_comment where comment_id = '{comment_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
+    sql: str = "select * from bilibili_video_comment where comment_id = %s"
+    rows: List[Dict] = await async_db_conn.query(sql, comment_id)
     if len(rows) > 0:
         return rows[0]
     return dict()
@@ -123,8 +124,8 @@ async def query_creator_by_creator_id(creator_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_up_info where user_id = '{creator_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
+    sql: str = "select * from bilibili_up_info where user_id = %s"
+    rows: List[Dict] = await async_db_conn.query(sql, creator_id)
     if len(rows) > 0:
         return rows[0]
     return dict()
@@ -158,3 +159,62 @@ async def update_creator_by_creator_id(creator_id: str, creator_item: Dict) -> i
     effect_row: int = await async_db_conn.update_table("bilibili_up_info", creator_item, "user_id", creator_id)
     return effect_row
 
+
+async def upsert_content(content_item: Dict):
+    """
+    新增或更新一条内容记录，写入缓冲区后通过 INSERT ... ON DUPLICATE KEY UPDATE 批量写入，依赖 video_id 唯一索引
+    Args:
+        content_item:
+
+    Returns:
+
+    """
+    await get_db_batch_writer("bilibili_video").write(content_item)
+
+
+async def upsert_comment(comment_item: Dict):
+    """
+    新增或更新一条评论记录，写入缓冲区后批量写入，依赖 comment_id 唯一索引
+    Args:
+        comment_item:
+
+    Returns:
+
+    """
+    await get_db_batch_writer("bilibili_video_comment").write(comment_item)
+
+
+async def upsert_contents(content_items: List[Dict]):
+    """
+    新增或更新一页内容记录，整页记录进入同一个批次写入
+    Args:
+        content_items:
+
+    Returns:
+
+    """
+    await get_db_batch_writer("bilibili_video").write_many(content_items)
+
+
+async def upsert_comments(comment_items: List[Dict]):
+    """
+    新增或更新一页评论记录，整页记录进入同一个批次写入
+    Args:
+        comment_items:
+
+    Returns:
+
+    """
+    await get_db_batch_writer("bilibili_video_comment").write_many(comment_items)
+
+
+async def upsert_creator(creator_item: Dict):
+    """
+    新增或更新一条创作者记录，写入缓冲区后批量写入，依赖 user_id 唯一索引
+    Args:
+        creator_item:
+
+    Returns:
+
+    """
+    await get_db_batch_writer("bilibili_up_info").write(creator_item)
@@ -0,0 +1,139 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 带缓冲的文本文件追加写入器
+#            文件句柄在整个爬虫运行期间保持打开，写入先进入内存缓冲区，
+#            按行数或时间间隔批量 flush + fsync，写盘在线程池中执行，不阻塞事件循环
+
+import asyncio
+import os
+import pathlib
+from typing import List, Optional, TextIO
+
+from tools import utils
+
+
+class BufferedFileWriter:
+    def __init__(self, file_name: str, flush_lines: int = 100, flush_interval: float = 1.0,
+                 encoding: str = "utf-8", newline: Optional[str] = None):
+        """
+        Args:
+            file_name: 文件路径
+            flush_lines: 缓冲区达到多少行时写盘
+            flush_interval: 最长多少秒写盘一次
+            encoding: 文件编码
+            newline: 同 open 的 newline 参数
+        """
+        self.file_name = file_name
+        self.flush_lines = flush_lines
+        self.flush_interval = flush_interval
+        self.encoding = encoding
+        self.newline = newline
+        self._buffer: List[str] = []
+        self._file: Optional[TextIO] = None
+        self._lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _check_not_closed(self) -> None:
+        # 关闭后（例如日期切换后被替换的旧写入器）不再接受写入，避免重新打开旧文件并重启定时写盘任务
+        if self._closed:
+            raise ValueError(f"write to closed file {self.file_name}")
+
+    def _open(self) -> TextIO:
+        if self._file is None:
+            pathlib.Path(self.file_name).parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.file_name, "a", encoding=self.encoding, newline=self.newline)
+        return self._file
+
+    def _write_lines(self, lines: List[str]) -> None:
+        f = self._open()
+        f.write("".join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+
+    async def write_line(self, line: str) -> None:
+        """
+        追加一行，只写入内存缓冲区，达到行数阈值时写盘
+        Args:
+            line: 以换行符结尾的一行文本
+
+        Returns:
+
+        """
+        self._check_not_closed()
+        self._buffer.append(line)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+        if len(self._buffer) >= self.flush_lines:
+            await self.flush()
+
+    async def write_lines(self, lines: List[str]) -> None:
+        """
+        追加多行，整批进入缓冲区后只检查一次写盘阈值
+        Args:
+            lines: 以换行符结尾的多行文本
+
+        Returns:
+
+        """
+        self._check_not_closed()
+        if not lines:
+            return
+        self._buffer.extend(lines)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+        if len(self._buffer) >= self.flush_lines:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """
+        缓冲区写盘并 fsync，写盘失败（磁盘满、无权限等）时这批数据放回缓冲区头部，下次 flush 重试
+        Returns:
+
+        """
+        async with self._lock:
+            if not self._buffer:
+                return
+            lines, self._buffer = self._buffer, []
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._write_lines, lines)
+            except Exception:
+                self._buffer[:0] = lines
+                raise
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                utils.logger.error(f"[BufferedFileWriter._flush_periodically] flush {self.file_name} error: {e}")
+
+    async def close(self) -> None:
+        """
+        写完缓冲区并关闭文件，关闭后再写入会抛出 ValueError
+        Returns:
+
+        """
+        self._closed = True
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,158 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 带缓冲的 CSV 写入
+#            每个 (crawler_type, store_type) 数据流保持一个打开的文件句柄，表头只写一次；
+#            文件名中的日期变化（跨过零点）时关闭旧文件、切换到新文件
+
+import csv
+import io
+import os
+from typing import Dict, Iterable, List
+
+import config
+from store.buffered_writer import BufferedFileWriter
+from tools import utils
+from var import crawler_type_var
+
+
+def format_csv_row(values: Iterable) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
+
+
+class CsvWriter(BufferedFileWriter):
+    def __init__(self, file_name: str, flush_lines: int = 100, flush_interval: float = 1.0):
+        """
+        Args:
+            file_name: CSV 文件路径
+            flush_lines: 缓冲区达到多少行时写盘
+            flush_interval: 最长多少秒写盘一次
+        """
+        super().__init__(file_name, flush_lines=flush_lines, flush_interval=flush_interval,
+                         encoding="utf-8-sig", newline="")
+        self._header_written = os.path.exists(file_name) and os.path.getsize(file_name) > 0
+
+    async def write(self, item: Dict) -> None:
+        """
+        追加一行数据，新文件的第一行数据前先写表头
+        Args:
+            item: 数据
+
+        Returns:
+
+        """
+        if not self._header_written:
+            self._header_written = True
+            await self.write_line(format_csv_row(item.keys()))
+        await self.write_line(format_csv_row(item.values()))
+
+    async def write_many(self, items: List[Dict]) -> None:
+        """
+        追加多行数据，整页数据一次进入缓冲区
+        Args:
+            items: 数据列表
+
+        Returns:
+
+        """
+        if not items:
+            return
+        lines = [format_csv_row(item.values()) for item in items]
+        if not self._header_written:
+            self._header_written = True
+            lines.insert(0, format_csv_row(items[0].keys()))
+        await self.write_lines(lines)
+
+
+# key 为数据流（不含日期的文件名），value 为该数据流当前写入的文件
+_csv_writers: Dict[str, CsvWriter] = {}
+
+
+async def get_csv_writer(file_name: str, stream_key: str) -> CsvWriter:
+    """
+    获取数据流当前的写入器，文件名变化（日期切换）时关闭旧文件
+    Args:
+        file_name: CSV 文件路径
+        stream_key: 数据流标识，同一个数据流同一时刻只有一个打开的文件
+
+    Returns:
+
+    """
+    writer = _csv_writers.get(stream_key)
+    if writer is not None and writer.file_name == file_name:
+        return writer
+    new_writer = CsvWriter(file_name, flush_lines=config.CSV_FLUSH_LINES, flush_interval=config.CSV_FLUSH_INTERVAL)
+    _csv_writers[stream_key] = new_writer
+    if writer is not None:
+        utils.logger.info(f"[get_csv_writer] rotate {writer.file_name} to {file_name}")
+        await writer.close()
+    return new_writer
+
+
+async def close_csv_writers() -> None:
+    """
+    关闭所有写入器，爬虫结束时调用
+    Returns:
+
+    """
+    for writer in list(_csv_writers.values()):
+        try:
+            await writer.close()
+        except Exception as e:
+            utils.logger.error(f"[close_csv_writers] close {writer.file_name} error: {e}")
+    _csv_writers.clear()
+
+
+async def flush_csv_writers() -> None:
+    """
+    把所有写入器缓冲区中的数据写出，不关闭写入器
+    Returns:
+
+    """
+    for writer in list(_csv_writers.values()):
+        await writer.flush()
+
+
+class CsvStoreMixin:
+    """
+    CSV 存储实现的公共方法：整页写入和生命周期钩子，写入器按文件在模块内共享，放在 AbstractStore 之前继承，
+    使用方需要提供 csv_store_path 和 make_save_file_name
+    """
+
+    async def save_data_list_to_csv(self, save_items: List[Dict], store_type: str):
+        """
+        一页数据一次写入 CSV 写入器
+        Args:
+            save_items: 数据列表
+            store_type: contents or comments
+
+        Returns:
+
+        """
+        save_file_name = self.make_save_file_name(store_type=store_type)
+        stream_key = f"{self.csv_store_path}/{crawler_type_var.get()}_{store_type}"
+        writer = await get_csv_writer(save_file_name, stream_key)
+        await writer.write_many(save_items)
+
+    async def store_contents(self, content_items: List[Dict]):
+        await self.save_data_list_to_csv(content_items, "contents")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        await self.save_data_list_to_csv(comment_items, "comments")
+
+    async def flush(self):
+        await flush_csv_writers()
+
+    async def close(self):
+        await close_csv_writers()
@@ -0,0 +1,190 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 数据库异步批量写入（write-behind）
+#            记录先进入内存缓冲区，攒够 N 条或每隔 T 毫秒通过 INSERT ... ON DUPLICATE KEY UPDATE 批量写入，
+#            取代逐条 SELECT + INSERT/UPDATE 的两次往返
+
+import asyncio
+from typing import Dict, List, Optional
+
+import config
+from async_db import AsyncMysqlDB
+from tools import utils
+from var import media_crawler_db_var
+
+
+class DbBatchWriter:
+    def __init__(self, table_name: str, batch_size: int = 100, flush_interval_ms: int = 1000, max_retries: int = 3):
+        """
+        Args:
+            table_name: 表名，表上需要有业务 ID 的唯一索引
+            batch_size: 缓冲区达到多少条时写入
+            flush_interval_ms: 最长多少毫秒写入一次
+            max_retries: 连续写库失败多少次后丢弃缓冲区中的记录
+        """
+        self.table_name = table_name
+        self.batch_size = batch_size
+        self.flush_interval_ms = flush_interval_ms
+        self.max_retries = max_retries
+        self._buffer: List[Dict] = []
+        self._failed_flushes = 0
+        self._lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def write(self, item: Dict) -> None:
+        """
+        写入一条记录到缓冲区，达到批量阈值时写库
+        Args:
+            item: 记录
+
+        Returns:
+
+        """
+        self._buffer.append(item)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def write_many(self, items: List[Dict]) -> None:
+        """
+        写入多条记录到缓冲区，整页记录进入同一个批次
+        Args:
+            items: 记录列表
+
+        Returns:
+
+        """
+        if not items:
+            return
+        self._buffer.extend(items)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """
+        缓冲区中的记录批量 upsert 到数据库，写库失败时记录放回缓冲区等待下次重试，
+        连续失败 max_retries 次后记录日志并丢弃
+        Returns:
+
+        """
+        async with self._lock:
+            if not self._buffer:
+                return
+            items, self._buffer = self._buffer, []
+            async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+            try:
+                await async_db_conn.batch_upsert(self.table_name, items)
+            except asyncio.CancelledError:
+                # 定时写入任务在写库过程中被 close 取消，记录放回缓冲区，由 close 写完
+                self._buffer[:0] = items
+                raise
+            except Exception:
+                self._failed_flushes += 1
+                if self._failed_flushes >= self.max_retries:
+                    self._failed_flushes = 0
+                    self._log_dropped(items, f"after {self.max_retries} failed flushes")
+                else:
+                    # 放回缓冲区头部，写库期间其他协程新增的记录排在后面，保持写入顺序
+                    self._buffer[:0] = items
+                raise
+            self._failed_flushes = 0
+
+    def _log_dropped(self, items: List[Dict], reason: str) -> None:
+        utils.logger.error(
+            f"[DbBatchWriter] drop {len(items)} rows of table {self.table_name} {reason}, rows: {items}"
+        )
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_ms / 1000)
+            try:
+                await self.flush()
+            except Exception as e:
+                utils.logger.error(f"[DbBatchWriter._flush_periodically] flush table {self.table_name} error: {e}")
+
+    async def close(self) -> None:
+        """
+        停止定时写入并写完缓冲区
+        Returns:
+
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        try:
+            await self.flush()
+        finally:
+            # 关闭后不会再重试，仍未写入的记录记录日志后丢弃
+            if self._buffer:
+                items, self._buffer = self._buffer, []
+                self._log_dropped(items, "on close")
+
+
+_db_batch_writers: Dict[str, DbBatchWriter] = {}
+
+
+def get_db_batch_writer(table_name: str) -> DbBatchWriter:
+    """
+    获取表对应的批量写入器，同一张表全局只有一个写入器
+    Args:
+        table_name: 表名
+
+    Returns:
+
+    """
+    writer = _db_batch_writers.get(table_name)
+    if writer is None:
+        writer = DbBatchWriter(table_name, batch_size=config.DB_BATCH_SIZE,
+                               flush_interval_ms=config.DB_FLUSH_INTERVAL_MS,
+                               max_retries=config.DB_FLUSH_MAX_RETRIES)
+        _db_batch_writers[table_name] = writer
+    return writer
+
+
+async def close_db_batch_writers() -> None:
+    """
+    写完所有缓冲区，需要在关闭数据库连接池之前调用
+    Returns:
+
+    """
+    for writer in list(_db_batch_writers.values()):
+        try:
+            await writer.close()
+        except Exception as e:
+            utils.logger.error(f"[close_db_batch_writers] flush table {writer.table_name} error: {e}")
+    _db_batch_writers.clear()
+
+
+async def flush_db_batch_writers() -> None:
+    """
+    把所有写入器缓冲区中的数据写出，不关闭写入器
+    Returns:
+
+    """
+    for writer in list(_db_batch_writers.values()):
+        await writer.flush()
+
+
+class DbStoreMixin:
+    """
+    数据库存储实现的生命周期钩子，整页写入由各平台实现，写入器按表在模块内共享，放在 AbstractStore 之前继承
+    """
+
+    async def flush(self):
+        await flush_db_batch_writers()
+
+    async def close(self):
+        await close_db_batch_writers()
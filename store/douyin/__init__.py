@@ -13,9 +13,10 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 18:46
 # @Desc    :
-from typing import List
+from typing import List, Optional
 
 import config
+from store.store_registry import get_store
 from var import source_keyword_var
 
 from .douyin_store_impl import *
@@ -25,7 +26,10 @@ class DouyinStoreFactory:
     STORES = {
         "csv": DouyinCsvStoreImplement,
         "db": DouyinDbStoreImplement,
-        "json": DouyinJsonStoreImplement
+        "json": DouyinJsonStoreImplement,
+        "jsonl": DouyinJsonlStoreImplement,
+        "sqlite": DouyinSqliteStoreImplement,
+        "parquet": DouyinParquetStoreImplement,
     }
 
     @staticmethod
@@ -33,8 +37,8 @@ class DouyinStoreFactory:
         store_class = DouyinStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
+        return get_store(store_class)
 
 
 async def update_douyin_aweme(aweme_item: Dict):
@@ -71,22 +75,28 @@ async def update_douyin_aweme(aweme_item: Dict):
 async def batch_update_dy_aweme_comments(aweme_id: str, comments: List[Dict]):
     if not comments:
         return
+    comment_items = []
     for comment_item in comments:
-        await update_dy_aweme_comment(aweme_id, comment_item)
+        save_comment_item = _build_dy_aweme_comment_item(aweme_id, comment_item)
+        if save_comment_item:
+            comment_items.append(save_comment_item)
+    utils.logger.info(
+        f"[store.douyin.batch_update_dy_aweme_comments] douyin aweme: {aweme_id}, {len(comment_items)} comments")
+    await DouyinStoreFactory.create_store().store_comments(comment_items=comment_items)
 
 
-async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
+def _build_dy_aweme_comment_item(aweme_id: str, comment_item: Dict) -> Optional[Dict]:
     comment_aweme_id = comment_item.get("aweme_id")
     if aweme_id != comment_aweme_id:
         utils.logger.error(
             f"[store.douyin.update_dy_aweme_comment] comment_aweme_id: {comment_aweme_id} != aweme_id: {aweme_id}")
-        return
+        return None
     user_info = comment_item.get("user", {})
     comment_id = comment_item.get("cid")
     parent_comment_id = comment_item.get("reply_id", "0")
     avatar_info = user_info.get("avatar_medium", {}) or user_info.get("avatar_300x300", {}) or user_info.get(
         "avatar_168x168", {}) or user_info.get("avatar_thumb", {}) or {}
-    save_comment_item = {
+    return {
         "comment_id": comment_id,
         "create_time": comment_item.get("create_time"),
         "ip_location": comment_item.get("ip_label", ""),
@@ -104,8 +114,14 @@ async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
         "parent_comment_id": parent_comment_id
     }
+
+
+async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
+    save_comment_item = _build_dy_aweme_comment_item(aweme_id, comment_item)
+    if not save_comment_item:
+        return
     utils.logger.info(
-        f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {comment_id}, content: {save_comment_item.get('content')}")
+        f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content')}")
 
     await DouyinStoreFactory.create_store().store_comment(comment_item=save_comment_item)
 
@@ -0,0 +1,183 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : JSON Lines 追加写入
+#            每条数据序列化成一行追加到文件末尾，同一个文件只有一个带缓冲的写入器；
+#            关闭时可导出为旧版的 JSON 数组文件
+
+import asyncio
+import json
+import os
+import pathlib
+from typing import Dict, List, Optional
+
+import config
+from store.buffered_writer import BufferedFileWriter
+from tools import utils
+
+
+def export_jsonl_to_json(jsonl_file_name: str, json_file_name: str) -> int:
+    """
+    把 JSON Lines 文件导出为旧版的 JSON 数组文件（indent=4）
+    Args:
+        jsonl_file_name: JSON Lines 文件路径
+        json_file_name: 导出的 JSON 文件路径
+
+    Returns:
+        导出的数据条数
+
+    """
+    count = 0
+    pathlib.Path(json_file_name).parent.mkdir(parents=True, exist_ok=True)
+    with open(jsonl_file_name, "r", encoding="utf-8") as src, open(json_file_name, "w", encoding="utf-8") as dst:
+        dst.write("[")
+        for line in src:
+            line = line.strip()
+            if not line:
+                continue
+            item_json = json.dumps(json.loads(line), ensure_ascii=False, indent=4)
+            dst.write(",\n    " if count else "\n    ")
+            dst.write(item_json.replace("\n", "\n    "))
+            count += 1
+        dst.write("\n]" if count else "]")
+    return count
+
+
+class JsonlWriter(BufferedFileWriter):
+    def __init__(self, file_name: str, export_json_file_name: Optional[str] = None,
+                 flush_lines: int = 100, flush_interval: float = 1.0):
+        """
+        Args:
+            file_name: JSON Lines 文件路径
+            export_json_file_name: 关闭时导出的 JSON 数组文件路径，为空时不导出
+            flush_lines: 缓冲区达到多少行时写盘
+            flush_interval: 最长多少秒写盘一次
+        """
+        super().__init__(file_name, flush_lines=flush_lines, flush_interval=flush_interval)
+        self.export_json_file_name = export_json_file_name
+
+    async def write(self, item: Dict) -> None:
+        """
+        追加一条数据
+        Args:
+            item: 数据
+
+        Returns:
+
+        """
+        await self.write_line(json.dumps(item, ensure_ascii=False) + "\n")
+
+    async def write_many(self, items: List[Dict]) -> None:
+        """
+        追加多条数据
+        Args:
+            items: 数据列表
+
+        Returns:
+
+        """
+        await self.write_lines([json.dumps(item, ensure_ascii=False) + "\n" for item in items])
+
+    async def close(self) -> None:
+        """
+        写完缓冲区并关闭文件，配置了导出路径时导出 JSON 数组文件
+        Returns:
+
+        """
+        await super().close()
+        if self.export_json_file_name and os.path.exists(self.file_name):
+            count = await asyncio.get_running_loop().run_in_executor(
+                None, export_jsonl_to_json, self.file_name, self.export_json_file_name
+            )
+            utils.logger.info(
+                f"[JsonlWriter.close] export {count} items from {self.file_name} to {self.export_json_file_name}")
+
+
+_jsonl_writers: Dict[str, JsonlWriter] = {}
+
+
+def get_jsonl_writer(file_name: str, export_json_file_name: Optional[str] = None) -> JsonlWriter:
+    """
+    获取文件对应的写入器，同一个文件全局只有一个写入器
+    Args:
+        file_name: JSON Lines 文件路径
+        export_json_file_name: 关闭时导出的 JSON 数组文件路径
+
+    Returns:
+
+    """
+    writer = _jsonl_writers.get(file_name)
+    if writer is None:
+        writer = JsonlWriter(
+            file_name,
+            export_json_file_name=export_json_file_name if config.JSONL_EXPORT_JSON_ON_CLOSE else None,
+            flush_lines=config.JSONL_FLUSH_LINES,
+            flush_interval=config.JSONL_FLUSH_INTERVAL,
+        )
+        _jsonl_writers[file_name] = writer
+    return writer
+
+
+async def close_jsonl_writers() -> None:
+    """
+    关闭所有写入器，爬虫结束时调用
+    Returns:
+
+    """
+    for writer in list(_jsonl_writers.values()):
+        try:
+            await writer.close()
+        except Exception as e:
+            utils.logger.error(f"[close_jsonl_writers] close {writer.file_name} error: {e}")
+    _jsonl_writers.clear()
+
+
+async def flush_jsonl_writers() -> None:
+    """
+    把所有写入器缓冲区中的数据写出，不关闭写入器
+    Returns:
+
+    """
+    for writer in list(_jsonl_writers.values()):
+        await writer.flush()
+
+
+class JsonlStoreMixin:
+    """
+    JSON Lines 存储实现的公共方法：整页写入和生命周期钩子，写入器按文件在模块内共享，放在 AbstractStore 之前继承，
+    使用方需要提供 make_save_file_name
+    """
+
+    async def save_data_list_to_jsonl(self, save_items: List[Dict], store_type: str):
+        """
+        一页数据一次写入 JSON Lines 写入器
+        Args:
+            save_items: 数据列表
+            store_type: contents or comments
+
+        Returns:
+
+        """
+        save_file_name, export_file_name = self.make_save_file_name(store_type=store_type)
+        await get_jsonl_writer(save_file_name, export_file_name).write_many(save_items)
+
+    async def store_contents(self, content_items: List[Dict]):
+        await self.save_data_list_to_jsonl(content_items, "contents")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        await self.save_data_list_to_jsonl(comment_items, "comments")
+
+    async def flush(self):
+        await flush_jsonl_writers()
+
+    async def close(self):
+        await close_jsonl_writers()
@@ -16,6 +16,7 @@
 from typing import List
 
 import config
+from store.store_registry import get_store
 from var import source_keyword_var
 
 from .kuaishou_store_impl import *
@@ -25,7 +26,10 @@ class KuaishouStoreFactory:
     STORES = {
         "csv": KuaishouCsvStoreImplement,
         "db": KuaishouDbStoreImplement,
-        "json": KuaishouJsonStoreImplement
+        "json": KuaishouJsonStoreImplement,
+        "jsonl": KuaishouJsonlStoreImplement,
+        "sqlite": KuaishouSqliteStoreImplement,
+        "parquet": KuaishouParquetStoreImplement,
     }
 
     @staticmethod
@@ -33,8 +37,8 @@ class KuaishouStoreFactory:
         store_class = KuaishouStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
+        return get_store(store_class)
 
 
 async def update_kuaishou_video(video_item: Dict):
@@ -66,17 +70,17 @@ async def update_kuaishou_video(video_item: Dict):
 
 
 async def batch_update_ks_video_comments(video_id: str, comments: List[Dict]):
-    utils.logger.info(f"[store.kuaishou.batch_update_ks_video_comments] video_id:{video_id}, comments:{comments}")
     if not comments:
         return
-    for comment_item in comments:
-        await update_ks_video_comment(video_id, comment_item)
+    comment_items = [_build_ks_video_comment_item(video_id, comment_item) for comment_item in comments]
+    utils.logger.info(
+        f"[store.kuaishou.batch_update_ks_video_comments] video_id:{video_id}, {len(comment_items)} comments")
+    await KuaishouStoreFactory.create_store().store_comments(comment_items=comment_items)
 
 
-async def update_ks_video_comment(video_id: str, comment_item: Dict):
-    comment_id = comment_item.get("commentId")
-    save_comment_item = {
-        "comment_id": comment_id,
+def _build_ks_video_comment_item(video_id: str, comment_item: Dict) -> Dict:
+    return {
+        "comment_id": comment_item.get("commentId"),
         "create_time": comment_item.get("timestamp"),
         "video_id": video_id,
         "content": comment_item.get("content"),
@@ -86,8 +90,12 @@ async def update_ks_video_comment(video_id: str, comment_item: Dict):
         "sub_comment_count": str(comment_item.get("subCommentCount", 0)),
         "last_modify_ts": utils.get_current_timestamp(),
     }
+
+
+async def update_ks_video_comment(video_id: str, comment_item: Dict):
+    save_comment_item = _build_ks_video_comment_item(video_id, comment_item)
     utils.logger.info(
-        f"[store.kuaishou.update_ks_video_comment] Kuaishou video comment: {comment_id}, content: {save_comment_item.get('content')}")
+        f"[store.kuaishou.update_ks_video_comment] Kuaishou video comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content')}")
     await KuaishouStoreFactory.create_store().store_comment(comment_item=save_comment_item)
 
 async def save_creator(user_id: str, creator: Dict):
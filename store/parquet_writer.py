@@ -0,0 +1,301 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Parquet 列式存储
+#            每个 (crawler_type, store_type) 数据流在内存中攒够一个 row group 后写入压缩的 Parquet 文件，
+#            计数字段存为整数，逗号拼接的列表字段存为 list<string>，文件超过大小阈值时滚动到下一个分片
+
+import asyncio
+import os
+import pathlib
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import config
+from tools import utils
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 只有 parquet 存储需要 pyarrow
+    pa = None
+    pq = None
+
+# 存为 int64 的字段：时间戳和各类计数
+INT_FIELDS = {
+    "add_ts", "last_modify_ts", "time", "last_update_time", "create_time",
+    "liked_count", "collected_count", "comment_count", "share_count", "shared_count", "comments_count",
+    "sub_comment_count", "like_count", "dislike_count", "comment_like_count", "read_count", "viewd_count",
+    "video_play_count", "video_danmaku", "video_comment", "voteup_count", "get_voteup_count",
+    "follows", "fans", "total_fans", "total_liked", "user_rank", "is_official",
+    "anwser_count", "video_count", "question_count", "article_count", "column_count",
+    "total_replay_num", "total_replay_page",
+}
+
+_COUNT_UNITS = {"k": 1000, "w": 10000, "万": 10000, "亿": 100000000}
+_COUNT_PATTERN = re.compile(r"^([0-9]+(?:\.[0-9]+)?)\s*(k|w|万|亿)?\+?$", re.IGNORECASE)
+
+
+def parse_count(value: Any) -> Optional[int]:
+    """
+    把平台返回的计数转换成整数，支持 "1,234"、"1.2万"、"10w+" 这类格式，无法解析时返回 None
+    Args:
+        value: 原始值
+
+    Returns:
+
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    match = _COUNT_PATTERN.match(str(value).strip().replace(",", ""))
+    if not match:
+        return None
+    number, unit = match.groups()
+    return int(float(number) * _COUNT_UNITS.get(unit.lower(), 1)) if unit else int(float(number))
+
+
+def split_list(value: Any) -> List[str]:
+    """
+    把逗号拼接的列表字段还原成列表
+    Args:
+        value: 原始值
+
+    Returns:
+
+    """
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value]
+    return [item for item in str(value).split(",") if item]
+
+
+class ParquetWriter:
+    def __init__(self, file_prefix: str, list_fields: Sequence[str] = (), row_group_size: int = 5000,
+                 max_file_size: int = 128 * 1024 * 1024, compression: str = "zstd"):
+        """
+        Args:
+            file_prefix: 文件路径前缀，实际文件名为 {file_prefix}_part0001.parquet
+            list_fields: 以逗号拼接、需要存为 list<string> 的字段
+            row_group_size: 每个 row group 的行数
+            max_file_size: 单个文件超过多少字节后滚动到下一个分片
+            compression: 压缩算法
+        """
+        if pa is None:
+            raise ImportError("parquet store requires pyarrow, please run: pip install pyarrow")
+        self.file_prefix = file_prefix
+        self.list_fields = set(list_fields)
+        self.row_group_size = row_group_size
+        self.max_file_size = max_file_size
+        self.compression = compression
+        self.file_name: Optional[str] = None
+        self._buffer: List[Dict] = []
+        self._schema: Optional["pa.Schema"] = None
+        self._writer: Optional["pq.ParquetWriter"] = None
+        self._lock = asyncio.Lock()
+
+    def _field_type(self, field: str) -> "pa.DataType":
+        if field in self.list_fields:
+            return pa.list_(pa.string())
+        if field in INT_FIELDS:
+            return pa.int64()
+        return pa.string()
+
+    def _convert_value(self, field: str, value: Any) -> Any:
+        if field in self.list_fields:
+            return split_list(value)
+        if field in INT_FIELDS:
+            return parse_count(value)
+        return None if value is None else str(value)
+
+    def _next_file_name(self) -> str:
+        part = 1
+        while os.path.exists(f"{self.file_prefix}_part{part:04d}.parquet"):
+            part += 1
+        return f"{self.file_prefix}_part{part:04d}.parquet"
+
+    def _close_file(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            utils.logger.info(f"[ParquetWriter._close_file] closed {self.file_name}")
+
+    def _write_rows(self, rows: List[Dict]) -> None:
+        fields = list(self._schema.names) if self._schema is not None else []
+        new_fields = [field for row in rows for field in row if field not in fields]
+        if new_fields:
+            # 出现新字段时以新的 schema 滚动到下一个分片，同一个文件内的 schema 保持不变
+            self._close_file()
+            fields.extend(dict.fromkeys(new_fields))
+            self._schema = pa.schema([(field, self._field_type(field)) for field in fields])
+
+        columns = {field: [self._convert_value(field, row.get(field)) for row in rows] for field in fields}
+        table = pa.Table.from_pydict(columns, schema=self._schema)
+        if self._writer is None:
+            self.file_name = self._next_file_name()
+            pathlib.Path(self.file_name).parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(self.file_name, self._schema, compression=self.compression)
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        if os.path.getsize(self.file_name) >= self.max_file_size:
+            self._close_file()
+
+    async def write(self, item: Dict) -> None:
+        """
+        追加一条数据，攒够一个 row group 时写入文件
+        Args:
+            item: 数据
+
+        Returns:
+
+        """
+        self._buffer.append(item)
+        if len(self._buffer) >= self.row_group_size:
+            await self.flush(full_row_groups_only=True)
+
+    async def write_many(self, items: List[Dict]) -> None:
+        """
+        追加多条数据
+        Args:
+            items: 数据列表
+
+        Returns:
+
+        """
+        self._buffer.extend(items)
+        if len(self._buffer) >= self.row_group_size:
+            await self.flush(full_row_groups_only=True)
+
+    async def flush(self, full_row_groups_only: bool = False) -> None:
+        """
+        缓冲区中的数据按 row_group_size 切分成 row group 写入文件，写入失败时这批数据放回缓冲区头部，下次 flush 重试
+        Args:
+            full_row_groups_only: 只写出凑满的 row group，不足一个 row group 的剩余数据留在缓冲区，
+                避免运行期间的写出产生很小的 row group
+
+        Returns:
+
+        """
+        async with self._lock:
+            count = len(self._buffer)
+            if full_row_groups_only:
+                count -= count % self.row_group_size
+            if count == 0:
+                return
+            rows, self._buffer = self._buffer[:count], self._buffer[count:]
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._write_rows, rows)
+            except Exception:
+                self._buffer[:0] = rows
+                raise
+
+    async def close(self) -> None:
+        """
+        写完缓冲区并关闭文件，Parquet 文件在关闭时才写入 footer，未关闭的文件无法读取
+        Returns:
+
+        """
+        await self.flush()
+        async with self._lock:
+            await asyncio.get_running_loop().run_in_executor(None, self._close_file)
+
+
+_parquet_writers: Dict[str, ParquetWriter] = {}
+
+
+def get_parquet_writer(file_prefix: str, list_fields: Sequence[str] = ()) -> ParquetWriter:
+    """
+    获取数据流对应的写入器，同一个文件前缀全局只有一个写入器
+    Args:
+        file_prefix: 文件路径前缀
+        list_fields: 需要存为 list<string> 的字段
+
+    Returns:
+
+    """
+    writer = _parquet_writers.get(file_prefix)
+    if writer is None:
+        writer = ParquetWriter(
+            file_prefix,
+            list_fields=list_fields,
+            row_group_size=config.PARQUET_ROW_GROUP_SIZE,
+            max_file_size=config.PARQUET_MAX_FILE_SIZE_MB * 1024 * 1024,
+            compression=config.PARQUET_COMPRESSION,
+        )
+        _parquet_writers[file_prefix] = writer
+    return writer
+
+
+async def close_parquet_writers() -> None:
+    """
+    关闭所有写入器，爬虫结束时调用
+    Returns:
+
+    """
+    for writer in list(_parquet_writers.values()):
+        try:
+            await writer.close()
+        except Exception as e:
+            utils.logger.error(f"[close_parquet_writers] close {writer.file_prefix} error: {e}")
+    _parquet_writers.clear()
+
+
+async def flush_parquet_writers() -> None:
+    """
+    把所有写入器缓冲区中凑满的 row group 写出，不关闭写入器；不足一个 row group 的数据留到关闭时写入，
+    否则慢速爬取时每次定时写出都会生成一个很小的 row group
+    Returns:
+
+    """
+    for writer in list(_parquet_writers.values()):
+        await writer.flush(full_row_groups_only=True)
+
+
+class ParquetStoreMixin:
+    """
+    Parquet 存储实现的公共方法：整页写入和生命周期钩子，写入器按文件在模块内共享，放在 AbstractStore 之前继承，
+    使用方需要提供 make_save_file_prefix
+    """
+    # 每种数据需要存为 list<string> 的字段
+    list_fields: Dict[str, Tuple[str, ...]] = {}
+
+    async def save_data_list_to_parquet(self, save_items: List[Dict], store_type: str):
+        """
+        一页数据一次写入 Parquet 写入器
+        Args:
+            save_items: 数据列表
+            store_type: contents or comments
+
+        Returns:
+
+        """
+        writer = get_parquet_writer(self.make_save_file_prefix(store_type), self.list_fields.get(store_type, ()))
+        await writer.write_many(save_items)
+
+    async def store_contents(self, content_items: List[Dict]):
+        await self.save_data_list_to_parquet(content_items, "contents")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        await self.save_data_list_to_parquet(comment_items, "comments")
+
+    async def open(self):
+        if pa is None:
+            raise ImportError("parquet store requires pyarrow, please run: pip install pyarrow")
+
+    async def flush(self):
+        await flush_parquet_writers()
+
+    async def close(self):
+        await close_parquet_writers()
@@ -0,0 +1,292 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : SQLite 单写入者存储
+#            所有平台的写入请求进入同一个队列，由单个写入任务取出攒批，
+#            在专用线程中以一个事务执行 INSERT ... ON CONFLICT DO UPDATE，事件循环不会阻塞在磁盘 IO 上
+
+import asyncio
+import pathlib
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import config
+from tools import utils
+
+SQLITE_SCHEMA_FILE = "schema/sqlite_tables.sql"
+
+# 写入请求：(表名, 记录, 唯一键字段, 是否只更新已存在的记录)
+WriteRequest = Tuple[str, Dict[str, Any], str, bool]
+
+
+def build_sqlite_upsert_sql(table_name: str, fields: Tuple[str, ...], conflict_field: str,
+                            update_exclude_fields: Tuple[str, ...] = ("add_ts",)) -> str:
+    """
+    构造 SQLite 的 INSERT ... ON CONFLICT DO UPDATE 语句
+    Args:
+        table_name: 表名
+        fields: 插入的字段
+        conflict_field: 唯一键字段
+        update_exclude_fields: 记录已存在时不更新的字段
+
+    Returns:
+
+    """
+    fieldstr = ",".join([f"`{field}`" for field in fields])
+    valstr = ",".join(["?"] * len(fields))
+    updatestr = ",".join([f"`{field}`=excluded.`{field}`" for field in fields
+                          if field not in update_exclude_fields and field != conflict_field])
+    return (f"INSERT INTO `{table_name}` ({fieldstr}) VALUES({valstr}) "
+            f"ON CONFLICT(`{conflict_field}`) DO UPDATE SET {updatestr}")
+
+
+def build_sqlite_update_sql(table_name: str, fields: Tuple[str, ...], conflict_field: str) -> str:
+    """
+    构造按唯一键更新的 UPDATE 语句
+    Args:
+        table_name: 表名
+        fields: 更新的字段
+        conflict_field: 唯一键字段
+
+    Returns:
+
+    """
+    updatestr = ",".join([f"`{field}`=?" for field in fields])
+    return f"UPDATE `{table_name}` SET {updatestr} WHERE `{conflict_field}`=?"
+
+
+class SqliteWriter:
+    def __init__(self, db_path: str, batch_size: int = 500, queue_size: int = 10000):
+        """
+        Args:
+            db_path: 数据库文件路径
+            batch_size: 每个事务最多写入多少条记录
+            queue_size: 写入队列长度
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        # 队列中的每个元素是一组写入请求（一条记录或一整页记录），同一组请求总是在同一个事务中提交
+        self._queue: "asyncio.Queue[Optional[List[WriteRequest]]]" = asyncio.Queue(maxsize=queue_size)
+        # sqlite3 连接只能在创建它的线程中使用，所有数据库操作都在这个单线程的线程池中执行
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite_writer")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._table_columns: Dict[str, Set[str]] = {}
+        self._writer_task: Optional[asyncio.Task] = None
+
+    def _open(self) -> None:
+        pathlib.Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with open(SQLITE_SCHEMA_FILE, "r", encoding="utf-8") as f:
+            self._conn.executescript(f.read())
+
+    def _ensure_columns(self, table_name: str, fields: Tuple[str, ...]) -> None:
+        """
+        平台新增的字段在表结构中还不存在时自动补列，避免整批写入失败
+        """
+        columns = self._table_columns.get(table_name)
+        if columns is None:
+            columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info(`{table_name}`)")}
+            self._table_columns[table_name] = columns
+        for field in fields:
+            if field not in columns:
+                utils.logger.info(f"[SqliteWriter._ensure_columns] add column {field} to table {table_name}")
+                self._conn.execute(f"ALTER TABLE `{table_name}` ADD COLUMN `{field}` TEXT")
+                columns.add(field)
+
+    def _write_batch(self, batch: List[WriteRequest]) -> None:
+        groups: Dict[Tuple[str, Tuple[str, ...], str, bool], List[List[Any]]] = {}
+        for table_name, item, conflict_field, update_only in batch:
+            fields = tuple(item.keys())
+            values = list(item.values())
+            if update_only:
+                values.append(item.get(conflict_field))
+            groups.setdefault((table_name, fields, conflict_field, update_only), []).append(values)
+
+        with self._conn:
+            for (table_name, fields, conflict_field, update_only), values_list in groups.items():
+                self._ensure_columns(table_name, fields)
+                if update_only:
+                    sql = build_sqlite_update_sql(table_name, fields, conflict_field)
+                else:
+                    sql = build_sqlite_upsert_sql(table_name, fields, conflict_field)
+                self._conn.executemany(sql, values_list)
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def _run_in_executor(self, func, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def start(self) -> None:
+        """
+        打开数据库、建表并启动写入任务
+        Returns:
+
+        """
+        await self._run_in_executor(self._open)
+        self._writer_task = asyncio.create_task(self._write_loop())
+        utils.logger.info(f"[SqliteWriter.start] sqlite store opened: {self.db_path}")
+
+    async def _write_loop(self) -> None:
+        stopped = False
+        while not stopped:
+            requests = await self._queue.get()
+            if requests is None:
+                self._queue.task_done()
+                break
+            # 上一批写入期间积压的请求合并到同一个事务中
+            batch = list(requests)
+            queue_items = 1
+            while len(batch) < self.batch_size:
+                try:
+                    requests = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if requests is None:
+                    self._queue.task_done()
+                    stopped = True
+                    break
+                batch.extend(requests)
+                queue_items += 1
+            try:
+                await self._run_in_executor(self._write_batch, batch)
+            except Exception as e:
+                utils.logger.error(f"[SqliteWriter._write_loop] write {len(batch)} records error: {e}")
+                if len(batch) > 1:
+                    await self._write_one_by_one(batch)
+            finally:
+                for _ in range(queue_items):
+                    self._queue.task_done()
+
+    async def _write_one_by_one(self, batch: List[WriteRequest]) -> None:
+        """
+        整批写入失败时逐条重试，只丢弃有问题的记录
+        """
+        for request in batch:
+            try:
+                await self._run_in_executor(self._write_batch, [request])
+            except Exception as e:
+                utils.logger.error(
+                    f"[SqliteWriter._write_one_by_one] write {request[0]} {request[2]}={request[1].get(request[2])} error: {e}")
+
+    async def write(self, table_name: str, item: Dict[str, Any], conflict_field: str,
+                    update_only: bool = False) -> None:
+        """
+        提交一条写入请求，队列满时等待
+        Args:
+            table_name: 表名
+            item: 记录
+            conflict_field: 唯一键字段，记录已存在时按该字段更新
+            update_only: 为 True 时只更新已存在的记录，不新增
+
+        Returns:
+
+        """
+        await self._queue.put([(table_name, item, conflict_field, update_only)])
+
+    async def write_many(self, table_name: str, items: List[Dict[str, Any]], conflict_field: str,
+                         update_only: bool = False) -> None:
+        """
+        提交一页记录，这一页记录在同一个事务中写入
+        Args:
+            table_name: 表名
+            items: 记录列表
+            conflict_field: 唯一键字段，记录已存在时按该字段更新
+            update_only: 为 True 时只更新已存在的记录，不新增
+
+        Returns:
+
+        """
+        if not items:
+            return
+        await self._queue.put([(table_name, item, conflict_field, update_only) for item in items])
+
+    async def flush(self) -> None:
+        """
+        等待已提交的写入请求全部提交到数据库
+        Returns:
+
+        """
+        if self._writer_task is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """
+        写完队列中的请求并关闭数据库
+        Returns:
+
+        """
+        if self._writer_task is not None:
+            await self._queue.put(None)
+            await self._writer_task
+            self._writer_task = None
+        await self._run_in_executor(self._close)
+        self._executor.shutdown(wait=True)
+
+
+_sqlite_writer: Optional[SqliteWriter] = None
+_sqlite_writer_lock = asyncio.Lock()
+
+
+async def get_sqlite_writer() -> SqliteWriter:
+    """
+    获取全局唯一的 SQLite 写入器，第一次调用时打开数据库
+    Returns:
+
+    """
+    global _sqlite_writer
+    if _sqlite_writer is not None:
+        return _sqlite_writer
+    async with _sqlite_writer_lock:
+        if _sqlite_writer is None:
+            writer = SqliteWriter(config.SQLITE_DB_PATH, batch_size=config.SQLITE_BATCH_SIZE,
+                                  queue_size=config.SQLITE_QUEUE_SIZE)
+            await writer.start()
+            _sqlite_writer = writer
+    return _sqlite_writer
+
+
+async def close_sqlite_writer() -> None:
+    """
+    关闭 SQLite 写入器，爬虫结束时调用
+    Returns:
+
+    """
+    global _sqlite_writer
+    if _sqlite_writer is None:
+        return
+    try:
+        await _sqlite_writer.close()
+    except Exception as e:
+        utils.logger.error(f"[close_sqlite_writer] close {_sqlite_writer.db_path} error: {e}")
+    _sqlite_writer = None
+
+
+class SqliteStoreMixin:
+    """
+    SQLite 存储实现的生命周期钩子，整页写入由各平台实现，所有平台共用一个写入器，放在 AbstractStore 之前继承
+    """
+
+    async def open(self):
+        await get_sqlite_writer()
+
+    async def flush(self):
+        if _sqlite_writer is not None:
+            await _sqlite_writer.flush()
+
+    async def close(self):
+        await close_sqlite_writer()
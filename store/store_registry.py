@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 存储实例注册表
+#            每次运行每个存储实现只创建一个实例，所有数据共用，
+#            main.py 在爬虫开始前调用 open_stores、结束后调用 close_stores，
+#            运行期间每隔 STORE_FLUSH_INTERVAL 秒调用一次 flush_stores
+
+import asyncio
+from typing import Dict, Optional, Type, TypeVar
+
+import config
+from base.base_crawler import AbstractStore
+from tools import utils
+
+StoreT = TypeVar("StoreT", bound=AbstractStore)
+
+_stores: Dict[Type[AbstractStore], AbstractStore] = {}
+_flush_task: Optional[asyncio.Task] = None
+
+
+def get_store(store_class: Type[StoreT]) -> StoreT:
+    """
+    获取本次运行的存储实例，第一次获取时创建
+    Args:
+        store_class: 存储实现类
+
+    Returns:
+
+    """
+    store = _stores.get(store_class)
+    if store is None:
+        store = store_class()
+        _stores[store_class] = store
+    return store
+
+
+async def open_stores() -> None:
+    """
+    打开所有已创建的存储实例，并开启定时写出任务
+    Returns:
+
+    """
+    global _flush_task
+    for store in list(_stores.values()):
+        await store.open()
+    if config.STORE_FLUSH_INTERVAL > 0 and (_flush_task is None or _flush_task.done()):
+        _flush_task = asyncio.create_task(_flush_stores_periodically(config.STORE_FLUSH_INTERVAL))
+
+
+async def flush_stores() -> None:
+    """
+    把所有存储实例缓冲区中的数据写出
+    Returns:
+
+    """
+    for store in list(_stores.values()):
+        try:
+            await store.flush()
+        except Exception as e:
+            utils.logger.error(f"[flush_stores] flush {type(store).__name__} error: {e}")
+
+
+async def _flush_stores_periodically(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        # 关闭时取消定时任务不能打断正在进行的写出，否则已从缓冲区取出的数据会丢失
+        await asyncio.shield(flush_stores())
+
+
+async def close_stores() -> None:
+    """
+    停止定时写出任务，关闭所有存储实例并清空注册表，单个存储关闭失败不影响其他存储
+    Returns:
+
+    """
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        _flush_task = None
+    for store in list(_stores.values()):
+        try:
+            await store.close()
+        except Exception as e:
+            utils.logger.error(f"[close_stores] close {type(store).__name__} error: {e}")
+    _stores.clear()
@@ -10,9 +10,10 @@
 
 
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import Dict, List
 
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from store.store_registry import get_store
 from var import source_keyword_var
 
 from . import tieba_store_impl
@@ -23,7 +24,10 @@ class TieBaStoreFactory:
     STORES = {
         "csv": TieBaCsvStoreImplement,
         "db": TieBaDbStoreImplement,
-        "json": TieBaJsonStoreImplement
+        "json": TieBaJsonStoreImplement,
+        "jsonl": TieBaJsonlStoreImplement,
+        "sqlite": TieBaSqliteStoreImplement,
+        "parquet": TieBaParquetStoreImplement,
     }
 
     @staticmethod
@@ -31,8 +35,8 @@ class TieBaStoreFactory:
         store_class = TieBaStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
+        return get_store(store_class)
 
 
 async def batch_update_tieba_notes(note_list: List[TiebaNote]):
@@ -46,8 +50,16 @@ async def batch_update_tieba_notes(note_list: List[TiebaNote]):
     """
     if not note_list:
         return
-    for note_item in note_list:
-        await update_tieba_note(note_item)
+    note_items = [_build_tieba_note_item(note_item) for note_item in note_list]
+    utils.logger.info(f"[store.tieba.batch_update_tieba_notes] {len(note_items)} tieba notes")
+    await TieBaStoreFactory.create_store().store_contents(note_items)
+
+
+def _build_tieba_note_item(note_item: TiebaNote) -> Dict:
+    note_item.source_keyword = source_keyword_var.get()
+    save_note_item = note_item.model_dump()
+    save_note_item.update({"last_modify_ts": utils.get_current_timestamp()})
+    return save_note_item
 
 
 async def update_tieba_note(note_item: TiebaNote):
@@ -59,9 +71,7 @@ async def update_tieba_note(note_item: TiebaNote):
     Returns:
 
     """
-    note_item.source_keyword = source_keyword_var.get()
-    save_note_item = note_item.model_dump()
-    save_note_item.update({"last_modify_ts": utils.get_current_timestamp()})
+    save_note_item = _build_tieba_note_item(note_item)
     utils.logger.info(f"[store.tieba.update_tieba_note] tieba note: {save_note_item}")
 
     await TieBaStoreFactory.create_store().store_content(save_note_item)
@@ -79,8 +89,15 @@ async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaCom
     """
     if not comments:
         return
-    for comment_item in comments:
-        await update_tieba_note_comment(note_id, comment_item)
+    comment_items = [_build_tieba_note_comment_item(comment_item) for comment_item in comments]
+    utils.logger.info(f"[store.tieba.batch_update_tieba_note_comments] tieba note id: {note_id}, {len(comment_items)} comments")
+    await TieBaStoreFactory.create_store().store_comments(comment_items)
+
+
+def _build_tieba_note_comment_item(comment_item: TiebaComment) -> Dict:
+    save_comment_item = comment_item.model_dump()
+    save_comment_item.update({"last_modify_ts": utils.get_current_timestamp()})
+    return save_comment_item
 
 
 async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
@@ -93,8 +110,7 @@ async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
     Returns:
 
     """
-    save_comment_item = comment_item.model_dump()
-    save_comment_item.update({"last_modify_ts": utils.get_current_timestamp()})
+    save_comment_item = _build_tieba_note_comment_item(comment_item)
     utils.logger.info(f"[store.tieba.update_tieba_note_comment] tieba note id: {note_id} comment:{save_comment_item}")
     await TieBaStoreFactory.create_store().store_comment(save_comment_item)
 
@@ -11,16 +11,20 @@
 
 # -*- coding: utf-8 -*-
 import asyncio
-import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 
 import config
 from base.base_crawler import AbstractStore
+from store.csv_writer import CsvStoreMixin, get_csv_writer
+from store.db_batch_writer import DbStoreMixin
+from store.jsonl_writer import JsonlStoreMixin, get_jsonl_writer
+from store.parquet_writer import ParquetStoreMixin, get_parquet_writer
+from store.sqlite_writer import SqliteStoreMixin, get_sqlite_writer
 from tools import utils, words
 from var import crawler_type_var
 
@@ -40,7 +44,7 @@ def calculate_number_of_files(file_store_path: str) -> int:
         return 1
 
 
-class TieBaCsvStoreImplement(AbstractStore):
+class TieBaCsvStoreImplement(CsvStoreMixin, AbstractStore):
     csv_store_path: str = "data/tieba"
     file_count: int = calculate_number_of_files(csv_store_path)
 
@@ -57,7 +61,7 @@ class TieBaCsvStoreImplement(AbstractStore):
 
     async def save_data_to_csv(self, save_item: Dict, store_type: str):
         """
-        Below is a simple way to save it in CSV format.
+        Save it in CSV format, the file is kept open and rows are buffered, the header is written only once.
         Args:
             save_item:  save content dict info
             store_type: Save type contains content and comments（contents | comments）
@@ -65,14 +69,10 @@ class TieBaCsvStoreImplement(AbstractStore):
         Returns: no returns
 
         """
-        pathlib.Path(self.csv_store_path).mkdir(parents=True, exist_ok=True)
         save_file_name = self.make_save_file_name(store_type=store_type)
-        async with aiofiles.open(save_file_name, mode='a+', encoding="utf-8-sig", newline="") as f:
-            f.fileno()
-            writer = csv.writer(f)
-            if await f.tell() == 0:
-                await writer.writerow(save_item.keys())
-            await writer.writerow(save_item.values())
+        stream_key = f"{self.csv_store_path}/{crawler_type_var.get()}_{store_type}"
+        writer = await get_csv_writer(save_file_name, stream_key)
+        await writer.write(save_item)
 
     async def store_content(self, content_item: Dict):
         """
@@ -108,7 +108,7 @@ class TieBaCsvStoreImplement(AbstractStore):
         await self.save_data_to_csv(save_item=creator, store_type="creator")
 
 
-class TieBaDbStoreImplement(AbstractStore):
+class TieBaDbStoreImplement(DbStoreMixin, AbstractStore):
     async def store_content(self, content_item: Dict):
         """
         tieba content DB storage implementation
@@ -118,16 +118,9 @@ class TieBaDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .tieba_store_sql import (add_new_content,
-                                      query_content_by_content_id,
-                                      update_content_by_content_id)
-        note_id = content_item.get("note_id")
-        note_detail: Dict = await query_content_by_content_id(content_id=note_id)
-        if not note_detail:
-            content_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_content(content_item)
-        else:
-            await update_content_by_content_id(note_id, content_item=content_item)
+        from .tieba_store_sql import upsert_content
+        content_item["add_ts"] = utils.get_current_timestamp()
+        await upsert_content(content_item)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -138,16 +131,39 @@ class TieBaDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .tieba_store_sql import (add_new_comment,
-                                      query_comment_by_comment_id,
-                                      update_comment_by_comment_id)
-        comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
-            comment_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_comment(comment_item)
-        else:
-            await update_comment_by_comment_id(comment_id, comment_item=comment_item)
+        from .tieba_store_sql import upsert_comment
+        comment_item["add_ts"] = utils.get_current_timestamp()
+        await upsert_comment(comment_item)
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        contents DB storage implementation, a page of contents goes into the same batch
+        Args:
+            content_items: content item list
+
+        Returns:
+
+        """
+        from .tieba_store_sql import upsert_contents
+        add_ts = utils.get_current_timestamp()
+        for content_item in content_items:
+            content_item["add_ts"] = add_ts
+        await upsert_contents(content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comments DB storage implementation, a page of comments goes into the same batch
+        Args:
+            comment_items: comment item list
+
+        Returns:
+
+        """
+        from .tieba_store_sql import upsert_comments
+        add_ts = utils.get_current_timestamp()
+        for comment_item in comment_items:
+            comment_item["add_ts"] = add_ts
+        await upsert_comments(comment_items)
 
     async def store_creator(self, creator: Dict):
         """
@@ -158,16 +174,9 @@ class TieBaDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .tieba_store_sql import (add_new_creator,
-                                      query_creator_by_user_id,
-                                      update_creator_by_user_id)
-        user_id = creator.get("user_id")
-        user_detail: Dict = await query_creator_by_user_id(user_id)
-        if not user_detail:
-            creator["add_ts"] = utils.get_current_timestamp()
-            await add_new_creator(creator)
-        else:
-            await update_creator_by_user_id(user_id, creator)
+        from .tieba_store_sql import upsert_creator
+        creator["add_ts"] = utils.get_current_timestamp()
+        await upsert_creator(creator)
 
 
 class TieBaJsonStoreImplement(AbstractStore):
@@ -194,13 +203,25 @@ class TieBaJsonStoreImplement(AbstractStore):
 
     async def save_data_to_json(self, save_item: Dict, store_type: str):
         """
-        Below is a simple way to save it in json format.
+        Save a single item in json format.
         Args:
             save_item: save content dict info
             store_type: Save type contains content and comments（contents | comments）
 
         Returns:
 
+        """
+        await self.save_data_list_to_json([save_item], store_type)
+
+    async def save_data_list_to_json(self, save_items: List[Dict], store_type: str):
+        """
+        Below is a simple way to save it in json format.
+        Args:
+            save_items: save content dict list, a page of items is read and written once
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
         """
         pathlib.Path(self.json_store_path).mkdir(parents=True, exist_ok=True)
         pathlib.Path(self.words_store_path).mkdir(parents=True, exist_ok=True)
@@ -212,15 +233,22 @@ class TieBaJsonStoreImplement(AbstractStore):
                 async with aiofiles.open(save_file_name, 'r', encoding='utf-8') as file:
                     save_data = json.loads(await file.read())
 
-            save_data.append(save_item)
+            save_data.extend(save_items)
             async with aiofiles.open(save_file_name, 'w', encoding='utf-8') as file:
                 await file.write(json.dumps(save_data, ensure_ascii=False))
 
-            if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
-                try:
-                    await self.WordCloud.generate_word_frequency_and_cloud(save_data, words_file_name_prefix)
-                except:
-                    pass
+        if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
+            try:
+                # 只对新增的数据分词，词频文件和词云图由 WordCloud 定时写入
+                await self.WordCloud.add_items(save_items, words_file_name_prefix)
+            except Exception as e:
+                utils.logger.error(f"[TieBaJsonStoreImplement.save_data_list_to_json] word cloud error: {e}")
+
+    async def flush(self):
+        await self.WordCloud.flush()
+
+    async def close(self):
+        await self.WordCloud.close()
 
     async def store_content(self, content_item: Dict):
         """
@@ -244,6 +272,28 @@ class TieBaJsonStoreImplement(AbstractStore):
         """
         await self.save_data_to_json(comment_item, "comments")
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        contents JSON storage implementation
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.save_data_list_to_json(content_items, "contents")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comments JSON storage implementation
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.save_data_list_to_json(comment_items, "comments")
+
     async def store_creator(self, creator: Dict):
         """
         tieba content JSON storage implementation
@@ -254,3 +304,192 @@ class TieBaJsonStoreImplement(AbstractStore):
 
         """
         await self.save_data_to_json(creator, "creator")
+
+
+class TieBaJsonlStoreImplement(JsonlStoreMixin, AbstractStore):
+    jsonl_store_path: str = "data/tieba/jsonl"
+    json_store_path: str = "data/tieba/json"
+
+    def make_save_file_name(self, store_type: str) -> (str, str):
+        """
+        make save file name by store type
+        Args:
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns: JSON Lines file name and the legacy JSON file name exported on close
+
+        """
+        file_name = f"{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}"
+        return f"{self.jsonl_store_path}/{file_name}.jsonl", f"{self.json_store_path}/{file_name}.json"
+
+    async def save_data_to_jsonl(self, save_item: Dict, store_type: str):
+        """
+        Append one line to the JSON Lines file, the writer buffers lines and flushes them in batch
+        Args:
+            save_item: save content dict info
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        save_file_name, export_file_name = self.make_save_file_name(store_type=store_type)
+        await get_jsonl_writer(save_file_name, export_file_name).write(save_item)
+
+    async def store_content(self, content_item: Dict):
+        """
+        content JSON Lines storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(content_item, "contents")
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment JSON Lines storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(comment_item, "comments")
+
+    async def store_creator(self, creator: Dict):
+        """
+        creator JSON Lines storage implementation
+        Args:
+            creator: creator dict
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(creator, "creator")
+
+
+class TieBaSqliteStoreImplement(SqliteStoreMixin, AbstractStore):
+    async def store_content(self, content_item: Dict):
+        """
+        content SQLite storage implementation
+        Args:
+            content_item: content item dict
+
+        Returns:
+
+        """
+        content_item["add_ts"] = utils.get_current_timestamp()
+        await (await get_sqlite_writer()).write("tieba_note", content_item, "note_id")
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment SQLite storage implementation
+        Args:
+            comment_item: comment item dict
+
+        Returns:
+
+        """
+        comment_item["add_ts"] = utils.get_current_timestamp()
+        await (await get_sqlite_writer()).write("tieba_comment", comment_item, "comment_id")
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        contents SQLite storage implementation, a page of contents is written in one transaction
+        Args:
+            content_items: content item list
+
+        Returns:
+
+        """
+        add_ts = utils.get_current_timestamp()
+        for content_item in content_items:
+            content_item["add_ts"] = add_ts
+        await (await get_sqlite_writer()).write_many("tieba_note", content_items, "note_id")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comments SQLite storage implementation, a page of comments is written in one transaction
+        Args:
+            comment_items: comment item list
+
+        Returns:
+
+        """
+        add_ts = utils.get_current_timestamp()
+        for comment_item in comment_items:
+            comment_item["add_ts"] = add_ts
+        await (await get_sqlite_writer()).write_many("tieba_comment", comment_items, "comment_id")
+
+    async def store_creator(self, creator: Dict):
+        """
+        creator SQLite storage implementation
+        Args:
+            creator: creator dict
+
+        Returns:
+
+        """
+        creator["add_ts"] = utils.get_current_timestamp()
+        await (await get_sqlite_writer()).write("tieba_creator", creator, "user_id")
+
+
+class TieBaParquetStoreImplement(ParquetStoreMixin, AbstractStore):
+    parquet_store_path: str = "data/tieba/parquet"
+
+    def make_save_file_prefix(self, store_type: str) -> str:
+        """
+        make save file prefix by store type, the writer appends the part number
+        Args:
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        return f"{self.parquet_store_path}/{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}"
+
+    async def save_data_to_parquet(self, save_item: Dict, store_type: str):
+        """
+        Buffer one row, the writer writes a compressed row group once enough rows are collected
+        Args:
+            save_item: save content dict info
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        await get_parquet_writer(self.make_save_file_prefix(store_type)).write(save_item)
+
+    async def store_content(self, content_item: Dict):
+        """
+        content Parquet storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_parquet(content_item, "contents")
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment Parquet storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_parquet(comment_item, "comments")
+
+    async def store_creator(self, creator: Dict):
+        """
+        creator Parquet storage implementation
+        Args:
+            creator: creator dict
+
+        Returns:
+
+        """
+        await self.save_data_to_parquet(creator, "creator")
@@ -16,6 +16,7 @@
 from typing import List
 
 import config
+from store.store_registry import get_store
 from var import source_keyword_var
 
 from .toutiao_store_impl import *
@@ -25,7 +26,10 @@ class ToutiaoStoreFactory:
     STORES = {
         "csv": ToutiaoCsvStoreImplement,
         "db": ToutiaoDbStoreImplement,
-        "json": ToutiaoJsonStoreImplement
+        "json": ToutiaoJsonStoreImplement,
+        "jsonl": ToutiaoJsonlStoreImplement,
+        "sqlite": ToutiaoSqliteStoreImplement,
+        "parquet": ToutiaoParquetStoreImplement,
     }
 
     @staticmethod
@@ -33,8 +37,8 @@ class ToutiaoStoreFactory:
         store_class = ToutiaoStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[ToutiaoStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[ToutiaoStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
+        return get_store(store_class)
 
 
 async def update_toutiao_post(post_item: Dict):
@@ -109,14 +113,14 @@ async def update_toutiao_post(post_item: Dict):
 async def batch_update_posts_comments(aweme_id: str, comments: List[Dict]):
     if not comments:
         return
-    for comment_item in comments:
-        await update_post_comment(aweme_id, comment_item)
+    comment_items = [_build_post_comment_item(aweme_id, comment_item) for comment_item in comments]
+    utils.logger.info(
+        f"[store.toutiao.batch_update_posts_comments] toutiao post: {aweme_id}, {len(comment_items)} comments")
+    await ToutiaoStoreFactory.create_store().store_comments(comment_items=comment_items)
 
 
-async def update_post_comment(post_id: str, comment_item: Dict):
-    # utils.logger.info(f"[store.toutiao.update_post_comment] id={post_id}, comment={comment_item}")
-
-    save_comment_item = {
+def _build_post_comment_item(post_id: str, comment_item: Dict) -> Dict:
+    return {
         "id": comment_item.get("id", 0),
         "post_id": post_id,
         "user_id": comment_item.get("user_id", ""),
@@ -126,6 +130,12 @@ async def update_post_comment(post_id: str, comment_item: Dict):
         "text": comment_item.get("text", ""),
         "score": comment_item.get("score", 0),
     }
+
+
+async def update_post_comment(post_id: str, comment_item: Dict):
+    # utils.logger.info(f"[store.toutiao.update_post_comment] id={post_id}, comment={comment_item}")
+
+    save_comment_item = _build_post_comment_item(post_id, comment_item)
     utils.logger.info(
         f"[store.toutiao.update_post_comment] toutiao post comment: {save_comment_item.get('id')}, content: {save_comment_item.get('text')}")
 
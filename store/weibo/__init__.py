@@ -15,8 +15,9 @@
 # @Desc    :
 
 import re
-from typing import List
+from typing import List, Optional
 
+from store.store_registry import get_store
 from var import source_keyword_var
 
 from .weibo_store_image import *
@@ -28,6 +29,9 @@ class WeibostoreFactory:
         "csv": WeiboCsvStoreImplement,
         "db": WeiboDbStoreImplement,
         "json": WeiboJsonStoreImplement,
+        "jsonl": WeiboJsonlStoreImplement,
+        "sqlite": WeiboSqliteStoreImplement,
+        "parquet": WeiboParquetStoreImplement,
     }
 
     @staticmethod
@@ -35,8 +39,8 @@ class WeibostoreFactory:
         store_class = WeibostoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
+        return get_store(store_class)
 
 
 async def batch_update_weibo_notes(note_list: List[Dict]):
@@ -50,28 +54,21 @@ async def batch_update_weibo_notes(note_list: List[Dict]):
     """
     if not note_list:
         return
-    for note_item in note_list:
-        await update_weibo_note(note_item)
+    note_items = [save_item for save_item in map(_build_weibo_note_item, note_list) if save_item]
+    utils.logger.info(f"[store.weibo.batch_update_weibo_notes] {len(note_items)} weibo notes")
+    await WeibostoreFactory.create_store().store_contents(content_items=note_items)
 
 
-async def update_weibo_note(note_item: Dict):
-    """
-    Update weibo note
-    Args:
-        note_item:
-
-    Returns:
-
-    """
+def _build_weibo_note_item(note_item: Dict) -> Optional[Dict]:
     if not note_item:
-        return
+        return None
 
     mblog: Dict = note_item.get("mblog")
     user_info: Dict = mblog.get("user")
     note_id = mblog.get("id")
     content_text = mblog.get("text")
     clean_text = re.sub(r"<.*?>", "", content_text)
-    save_content_item = {
+    return {
         # 微博信息
         "note_id": note_id,
         "content": clean_text,
@@ -93,8 +90,22 @@ async def update_weibo_note(note_item: Dict):
 
         "source_keyword": source_keyword_var.get(),
     }
+
+
+async def update_weibo_note(note_item: Dict):
+    """
+    Update weibo note
+    Args:
+        note_item:
+
+    Returns:
+
+    """
+    save_content_item = _build_weibo_note_item(note_item)
+    if not save_content_item:
+        return
     utils.logger.info(
-        f"[store.weibo.update_weibo_note] weibo note id:{note_id}, title:{save_content_item.get('content')[:24]} ...")
+        f"[store.weibo.update_weibo_note] weibo note id:{save_content_item.get('note_id')}, title:{save_content_item.get('content')[:24]} ...")
     await WeibostoreFactory.create_store().store_content(content_item=save_content_item)
 
 
@@ -110,27 +121,24 @@ async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
     """
     if not comments:
         return
+    comment_items = []
     for comment_item in comments:
-        await update_weibo_note_comment(note_id, comment_item)
-
-
-async def update_weibo_note_comment(note_id: str, comment_item: Dict):
-    """
-    Update weibo note comment
-    Args:
-        note_id: weibo note id
-        comment_item: weibo comment item
+        save_comment_item = _build_weibo_note_comment_item(note_id, comment_item)
+        if save_comment_item:
+            comment_items.append(save_comment_item)
+    utils.logger.info(
+        f"[store.weibo.batch_update_weibo_note_comments] weibo note id:{note_id}, {len(comment_items)} comments")
+    await WeibostoreFactory.create_store().store_comments(comment_items=comment_items)
 
-    Returns:
 
-    """
+def _build_weibo_note_comment_item(note_id: str, comment_item: Dict) -> Optional[Dict]:
     if not comment_item or not note_id:
-        return
+        return None
     comment_id = str(comment_item.get("id"))
     user_info: Dict = comment_item.get("user")
     content_text = comment_item.get("text")
     clean_text = re.sub(r"<.*?>", "", content_text)
-    save_comment_item = {
+    return {
         "comment_id": comment_id,
         "create_time": utils.rfc2822_to_timestamp(comment_item.get("created_at")),
         "create_date_time": str(utils.rfc2822_to_china_datetime(comment_item.get("created_at"))),
@@ -149,8 +157,23 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
         "profile_url": user_info.get("profile_url", ""),
         "avatar": user_info.get("profile_image_url", ""),
     }
+
+
+async def update_weibo_note_comment(note_id: str, comment_item: Dict):
+    """
+    Update weibo note comment
+    Args:
+        note_id: weibo note id
+        comment_item: weibo comment item
+
+    Returns:
+
+    """
+    save_comment_item = _build_weibo_note_comment_item(note_id, comment_item)
+    if not save_comment_item:
+        return
     utils.logger.info(
-        f"[store.weibo.update_weibo_note_comment] Weibo note comment: {comment_id}, content: {save_comment_item.get('content', '')[:24]} ...")
+        f"[store.weibo.update_weibo_note_comment] Weibo note comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content', '')[:24]} ...")
     await WeibostoreFactory.create_store().store_comment(comment_item=save_comment_item)
 
 
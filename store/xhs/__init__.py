@@ -16,6 +16,7 @@
 from typing import List
 
 import config
+from store.store_registry import get_store
 from var import source_keyword_var
 
 from . import xhs_store_impl
@@ -27,15 +28,18 @@ class XhsStoreFactory:
     STORES = {
         "csv": XhsCsvStoreImplement,
         "db": XhsDbStoreImplement,
-        "json": XhsJsonStoreImplement
+        "json": XhsJsonStoreImplement,
+        "jsonl": XhsJsonlStoreImplement,
+        "sqlite": XhsSqliteStoreImplement,
+        "parquet": XhsParquetStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = XhsStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
+        return get_store(store_class)
 
 
 def get_video_url_arr(note_item: Dict) -> List:
@@ -124,25 +128,17 @@ async def batch_update_xhs_note_comments(note_id: str, comments: List[Dict]):
     """
     if not comments:
         return
-    for comment_item in comments:
-        await update_xhs_note_comment(note_id, comment_item)
+    comment_items = [_build_xhs_note_comment_item(note_id, comment_item) for comment_item in comments]
+    utils.logger.info(f"[store.xhs.batch_update_xhs_note_comments] xhs note:{note_id}, {len(comment_items)} comments")
+    await XhsStoreFactory.create_store().store_comments(comment_items)
 
 
-async def update_xhs_note_comment(note_id: str, comment_item: Dict):
-    """
-    更新小红书笔记评论
-    Args:
-        note_id:
-        comment_item:
-
-    Returns:
-
-    """
+def _build_xhs_note_comment_item(note_id: str, comment_item: Dict) -> Dict:
     user_info = comment_item.get("user_info", {})
     comment_id = comment_item.get("id")
     comment_pictures = [item.get("url_default", "") for item in comment_item.get("pictures", [])]
     target_comment = comment_item.get("target_comment", {})
-    local_db_item = {
+    return {
         "comment_id": comment_id,
         "create_time": comment_item.get("create_time"),
         "ip_location": comment_item.get("ip_location"),
@@ -157,6 +153,19 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
         "like_count": comment_item.get("like_count", 0),
     }
+
+
+async def update_xhs_note_comment(note_id: str, comment_item: Dict):
+    """
+    更新小红书笔记评论
+    Args:
+        note_id:
+        comment_item:
+
+    Returns:
+
+    """
+    local_db_item = _build_xhs_note_comment_item(note_id, comment_item)
     utils.logger.info(f"[store.xhs.update_xhs_note_comment] xhs note comment:{local_db_item}")
     await XhsStoreFactory.create_store().store_comment(local_db_item)
 
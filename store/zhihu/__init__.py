@@ -10,14 +10,18 @@
 
 
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import Dict, List
 
 import config
 from base.base_crawler import AbstractStore
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from store.zhihu.zhihu_store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuDbStoreImplement,
-                                          ZhihuJsonStoreImplement)
+                                          ZhihuJsonlStoreImplement,
+                                          ZhihuJsonStoreImplement,
+                                          ZhihuParquetStoreImplement,
+                                          ZhihuSqliteStoreImplement)
+from store.store_registry import get_store
 from tools import utils
 from var import source_keyword_var
 
@@ -26,15 +30,18 @@ class ZhihuStoreFactory:
     STORES = {
         "csv": ZhihuCsvStoreImplement,
         "db": ZhihuDbStoreImplement,
-        "json": ZhihuJsonStoreImplement
+        "json": ZhihuJsonStoreImplement,
+        "jsonl": ZhihuJsonlStoreImplement,
+        "sqlite": ZhihuSqliteStoreImplement,
+        "parquet": ZhihuParquetStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = ZhihuStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or parquet ...")
+        return get_store(store_class)
 
 async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     """
@@ -48,8 +55,17 @@ async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     if not contents:
         return
 
-    for content_item in contents:
-        await update_zhihu_content(content_item)
+    content_items = [_build_zhihu_content_item(content_item) for content_item in contents]
+    utils.logger.info(f"[store.zhihu.batch_update_zhihu_contents] {len(content_items)} zhihu contents")
+    await ZhihuStoreFactory.create_store().store_contents(content_items)
+
+
+def _build_zhihu_content_item(content_item: ZhihuContent) -> Dict:
+    content_item.source_keyword = source_keyword_var.get()
+    local_db_item = content_item.model_dump()
+    local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
+    return local_db_item
+
 
 async def update_zhihu_content(content_item: ZhihuContent):
     """
@@ -60,9 +76,7 @@ async def update_zhihu_content(content_item: ZhihuContent):
     Returns:
 
     """
-    content_item.source_keyword = source_keyword_var.get()
-    local_db_item = content_item.model_dump()
-    local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
+    local_db_item = _build_zhihu_content_item(content_item)
     utils.logger.info(f"[store.zhihu.update_zhihu_content] zhihu content: {local_db_item}")
     await ZhihuStoreFactory.create_store().store_content(local_db_item)
 
@@ -79,9 +93,16 @@ async def batch_update_zhihu_note_comments(comments: List[ZhihuComment]):
     """
     if not comments:
         return
-    
-    for comment_item in comments:
-        await update_zhihu_content_comment(comment_item)
+
+    comment_items = [_build_zhihu_content_comment_item(comment_item) for comment_item in comments]
+    utils.logger.info(f"[store.zhihu.batch_update_zhihu_note_comments] {len(comment_items)} zhihu content comments")
+    await ZhihuStoreFactory.create_store().store_comments(comment_items)
+
+
+def _build_zhihu_content_comment_item(comment_item: ZhihuComment) -> Dict:
+    local_db_item = comment_item.model_dump()
+    local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
+    return local_db_item
 
 
 async def update_zhihu_content_comment(comment_item: ZhihuComment):
@@ -93,8 +114,7 @@ async def update_zhihu_content_comment(comment_item: ZhihuComment):
     Returns:
 
     """
-    local_db_item = comment_item.model_dump()
-    local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
+    local_db_item = _build_zhihu_content_comment_item(comment_item)
     utils.logger.info(f"[store.zhihu.update_zhihu_note_comment] zhihu content comment:{local_db_item}")
     await ZhihuStoreFactory.create_store().store_comment(local_db_item)
 
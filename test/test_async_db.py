@@ -0,0 +1,174 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : AsyncMysqlDB SQL 文本缓存及连接获取的正确性校验，单行 SQL 构造开销的基准测试（基准测试依赖 pytest-benchmark）
+import asyncio
+import importlib.util
+from unittest import IsolatedAsyncioTestCase
+
+import pytest
+
+from async_db import AsyncMysqlDB, PoolMetrics, _build_insert_sql, _build_update_sql
+
+HAS_BENCHMARK = importlib.util.find_spec("pytest_benchmark") is not None
+requires_benchmark = pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark is not installed")
+
+NOTE_ITEM = {
+    "note_id": "64f1a2b3000000001f00abcd",
+    "type": "normal",
+    "title": "标题 'with quote'",
+    "desc": "描述",
+    "video_url": "",
+    "time": 1700000000000,
+    "last_update_time": 1700000000000,
+    "user_id": "5f1a2b3c000000000101abcd",
+    "nickname": "昵称",
+    "avatar": "",
+    "liked_count": "10",
+    "collected_count": "2",
+    "comment_count": "3",
+    "share_count": "1",
+    "ip_location": "上海",
+    "image_list": "",
+    "tag_list": "",
+    "note_url": "",
+    "source_keyword": "编程副业",
+    "xsec_token": "",
+    "last_modify_ts": 1700000000000,
+}
+
+
+def _legacy_item_to_table_sql(table_name, item):
+    """旧版 item_to_table 每次调用都重新拼接的 SQL"""
+    fields = list(item.keys())
+    values = list(item.values())
+    fields = [f'`{field}`' for field in fields]
+    fieldstr = ','.join(fields)
+    valstr = ','.join(['%s'] * len(item))
+    sql = "INSERT INTO %s (%s) VALUES(%s)" % (table_name, fieldstr, valstr)
+    return sql, values
+
+
+def _cached_item_to_table_sql(table_name, item):
+    return _build_insert_sql(table_name, tuple(item.keys())), list(item.values())
+
+
+def test_insert_sql_identical():
+    assert _cached_item_to_table_sql("xhs_note", NOTE_ITEM) == _legacy_item_to_table_sql("xhs_note", NOTE_ITEM)
+
+
+def test_update_sql_binds_where_value():
+    sql = _build_update_sql("xhs_note", ("title", "desc"), "note_id")
+    assert sql == 'UPDATE xhs_note SET `title`=%s,`desc`=%s WHERE `note_id`=%s'
+    assert _build_update_sql("xhs_note", ("title", "desc"), "note_id") is sql
+
+
+@requires_benchmark
+def test_benchmark_legacy_item_to_table_sql(benchmark):
+    benchmark(_legacy_item_to_table_sql, "xhs_note", NOTE_ITEM)
+
+
+@requires_benchmark
+def test_benchmark_cached_item_to_table_sql(benchmark):
+    benchmark(_cached_item_to_table_sql, "xhs_note", NOTE_ITEM)
+
+
+class FakeConnection:
+    def __init__(self, last_usage: float, ping_error: Exception = None):
+        self.last_usage = last_usage
+        self.ping_error = ping_error
+        self.ping_count = 0
+
+    async def ping(self, reconnect=True):
+        self.ping_count += 1
+        if self.ping_error is not None:
+            raise self.ping_error
+
+
+class FakePool:
+    """
+    模拟 aiomysql.Pool，connection 为空时 acquire 一直等待
+    """
+
+    def __init__(self, connection: FakeConnection = None):
+        self.connection = connection
+        self.released = []
+        self.size = 1
+        self.freesize = 0
+        self.maxsize = 1
+
+    async def acquire(self):
+        if self.connection is None:
+            await asyncio.Event().wait()
+        return self.connection
+
+    def release(self, conn):
+        self.released.append(conn)
+
+
+class TestAsyncMysqlDBAcquire(IsolatedAsyncioTestCase):
+
+    async def test_acquire_timeout(self):
+        db = AsyncMysqlDB(FakePool(), acquire_timeout=0.05)
+        with self.assertRaises(asyncio.TimeoutError):
+            async with db._acquire():
+                pass
+        self.assertEqual(db.metrics.acquire_timeout_count, 1)
+        self.assertEqual(db.metrics.acquire_count, 0)
+
+    async def test_pre_ping_idle_connection(self):
+        now = asyncio.get_running_loop().time()
+        conn = FakeConnection(last_usage=now - 120)
+        pool = FakePool(conn)
+        db = AsyncMysqlDB(pool, pre_ping_interval=60)
+        async with db._acquire() as acquired:
+            self.assertIs(acquired, conn)
+        self.assertEqual(conn.ping_count, 1)
+
+        # 刚使用过的连接不需要 ping
+        conn.last_usage = asyncio.get_running_loop().time()
+        async with db._acquire():
+            pass
+        self.assertEqual(conn.ping_count, 1)
+        self.assertEqual(pool.released, [conn, conn])
+        self.assertEqual(db.pool_stats()["acquire_count"], 2)
+
+    async def test_release_on_ping_failure(self):
+        conn = FakeConnection(last_usage=0, ping_error=ConnectionError("mysql server has gone away"))
+        pool = FakePool(conn)
+        db = AsyncMysqlDB(pool, pre_ping_interval=0)
+        with self.assertRaises(ConnectionError):
+            async with db._acquire():
+                pass
+        self.assertEqual(db.metrics.ping_failure_count, 1)
+        self.assertEqual(pool.released, [conn])
+
+    async def test_release_on_error(self):
+        conn = FakeConnection(last_usage=0)
+        pool = FakePool(conn)
+        db = AsyncMysqlDB(pool)
+        with self.assertRaises(ValueError):
+            async with db._acquire():
+                raise ValueError("bad sql")
+        self.assertEqual(conn.ping_count, 0)
+        self.assertEqual(pool.released, [conn])
+
+
+def test_pool_metrics_snapshot():
+    metrics = PoolMetrics()
+    assert metrics.snapshot()["wait_avg_ms"] == 0.0
+    metrics.record_wait(0.01)
+    metrics.record_wait(0.03)
+    snapshot = metrics.snapshot()
+    assert snapshot["acquire_count"] == 2
+    assert snapshot["wait_avg_ms"] == 20.0
+    assert snapshot["wait_max_ms"] == 30.0
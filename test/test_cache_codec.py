@@ -0,0 +1,39 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import unittest
+
+from cache import codec
+from cache.codec import get_codec
+
+
+class TestCacheCodec(unittest.TestCase):
+
+    value = {"ip": "127.0.0.1", "port": 8080, "tags": ["a", "中文"], "expired": None}
+
+    def test_json_round_trip(self):
+        json_codec = get_codec("json")
+        self.assertEqual(json_codec.loads(json_codec.dumps(self.value)), self.value)
+        self.assertEqual(json_codec.loads(json_codec.dumps("value")), "value")
+
+    @unittest.skipIf(codec.msgpack is None, "msgpack not installed")
+    def test_msgpack_round_trip(self):
+        msgpack_codec = get_codec("msgpack")
+        self.assertEqual(msgpack_codec.loads(msgpack_codec.dumps(self.value)), self.value)
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            get_codec("yaml")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import csv
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase, mock
+
+from store.csv_writer import close_csv_writers, get_csv_writer
+
+
+class TestCsvWriter(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.stream_key = os.path.join(self.tmp_dir.name, "search_comments")
+
+    async def asyncTearDown(self):
+        await close_csv_writers()
+        self.tmp_dir.cleanup()
+
+    def read_rows(self, file_name):
+        with open(file_name, encoding="utf-8-sig", newline="") as f:
+            return list(csv.reader(f))
+
+    async def test_header_written_once(self):
+        file_name = f"{self.stream_key}_2024-01-01.csv"
+        for i in range(250):
+            writer = await get_csv_writer(file_name, self.stream_key)
+            await writer.write({"comment_id": str(i), "content": f"含有,逗号\n和换行 {i}"})
+        await close_csv_writers()
+
+        rows = self.read_rows(file_name)
+        self.assertEqual(rows[0], ["comment_id", "content"])
+        self.assertEqual(len(rows), 251)
+        self.assertEqual(rows[-1], ["249", "含有,逗号\n和换行 249"])
+
+        # 同一文件再次打开追加时不重复写表头
+        writer = await get_csv_writer(file_name, self.stream_key)
+        await writer.write({"comment_id": "250", "content": ""})
+        await close_csv_writers()
+        rows = self.read_rows(file_name)
+        self.assertEqual(len(rows), 252)
+        self.assertEqual(sum(row == ["comment_id", "content"] for row in rows), 1)
+
+    async def test_rotate_when_date_changed(self):
+        day1_file = f"{self.stream_key}_2024-01-01.csv"
+        day2_file = f"{self.stream_key}_2024-01-02.csv"
+        old_writer = await get_csv_writer(day1_file, self.stream_key)
+        await old_writer.write({"note_id": "1"})
+        writer = await get_csv_writer(day2_file, self.stream_key)
+        await writer.write({"note_id": "2"})
+
+        # 切换日期时旧文件已写完并关闭
+        self.assertEqual(self.read_rows(day1_file), [["note_id"], ["1"]])
+        # 仍持有旧写入器的协程不能再写入旧文件
+        self.assertTrue(old_writer.closed)
+        with self.assertRaises(ValueError):
+            await old_writer.write({"note_id": "3"})
+        with self.assertRaises(ValueError):
+            await old_writer.write_many([{"note_id": "3"}])
+        self.assertIsNone(old_writer._flush_task)
+        self.assertEqual(self.read_rows(day1_file), [["note_id"], ["1"]])
+        await close_csv_writers()
+        self.assertEqual(self.read_rows(day2_file), [["note_id"], ["2"]])
+
+    async def test_write_many(self):
+        file_name = f"{self.stream_key}_2024-01-01.csv"
+        writer = await get_csv_writer(file_name, self.stream_key)
+        await writer.write_many([{"comment_id": str(i), "content": "c"} for i in range(20)])
+        await writer.write_many([])
+        await writer.write_many([{"comment_id": "20", "content": "c"}])
+        await close_csv_writers()
+
+        rows = self.read_rows(file_name)
+        self.assertEqual(rows[0], ["comment_id", "content"])
+        self.assertEqual(len(rows), 22)
+        self.assertEqual(rows[-1], ["20", "c"])
+
+    async def test_header_kept_after_failed_flush(self):
+        file_name = f"{self.stream_key}_2024-01-01.csv"
+        writer = await get_csv_writer(file_name, self.stream_key)
+        await writer.write({"note_id": "1"})
+        with mock.patch.object(writer, "_write_lines", side_effect=PermissionError("Permission denied")):
+            with self.assertRaises(PermissionError):
+                await writer.flush()
+        await writer.write({"note_id": "2"})
+        await close_csv_writers()
+        # 写盘失败后表头和数据都没有丢，表头仍在第一行
+        self.assertEqual(self.read_rows(file_name), [["note_id"], ["1"], ["2"]])
@@ -0,0 +1,90 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from store.db_batch_writer import DbBatchWriter
+from var import media_crawler_db_var
+
+
+class FakeAsyncMysqlDB:
+    def __init__(self, fail_times: int = 0, delay: float = 0):
+        self.batches = []
+        self.fail_times = fail_times
+        self.delay = delay
+
+    async def batch_upsert(self, table_name, items, update_exclude_fields=("add_ts",)):
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise ConnectionError("lost connection to mysql server")
+        await asyncio.sleep(self.delay)
+        self.batches.append((table_name, items))
+        return len(items)
+
+
+class TestDbBatchWriter(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.db = FakeAsyncMysqlDB()
+        media_crawler_db_var.set(self.db)
+
+    async def test_flush_on_batch_size(self):
+        writer = DbBatchWriter("xhs_note", batch_size=3, flush_interval_ms=60000)
+        for i in range(7):
+            await writer.write({"note_id": str(i)})
+        self.assertEqual([len(items) for _, items in self.db.batches], [3, 3])
+        await writer.close()
+        self.assertEqual([len(items) for _, items in self.db.batches], [3, 3, 1])
+        self.assertEqual([item["note_id"] for _, items in self.db.batches for item in items],
+                         [str(i) for i in range(7)])
+
+    async def test_periodic_flush(self):
+        writer = DbBatchWriter("xhs_note", batch_size=100, flush_interval_ms=50)
+        await writer.write({"note_id": "1"})
+        await asyncio.sleep(0.2)
+        self.assertEqual(self.db.batches, [("xhs_note", [{"note_id": "1"}])])
+        await writer.close()
+        self.assertEqual(len(self.db.batches), 1)
+
+    async def test_retry_after_failed_flush(self):
+        self.db.fail_times = 1
+        writer = DbBatchWriter("xhs_note", batch_size=100, flush_interval_ms=60000)
+        await writer.write_many([{"note_id": "1"}, {"note_id": "2"}])
+        with self.assertRaises(ConnectionError):
+            await writer.flush()
+        self.assertEqual(self.db.batches, [])
+        await writer.write({"note_id": "3"})
+        await writer.flush()
+        self.assertEqual(self.db.batches,
+                         [("xhs_note", [{"note_id": "1"}, {"note_id": "2"}, {"note_id": "3"}])])
+        await writer.close()
+
+    async def test_drop_after_max_retries(self):
+        self.db.fail_times = 2
+        writer = DbBatchWriter("xhs_note", batch_size=100, flush_interval_ms=60000, max_retries=2)
+        await writer.write({"note_id": "1"})
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                await writer.flush()
+        await writer.write({"note_id": "2"})
+        await writer.close()
+        self.assertEqual(self.db.batches, [("xhs_note", [{"note_id": "2"}])])
+
+    async def test_close_during_periodic_flush(self):
+        self.db.delay = 0.2
+        writer = DbBatchWriter("xhs_note", batch_size=100, flush_interval_ms=10)
+        await writer.write({"note_id": "1"})
+        await asyncio.sleep(0.05)
+        self.db.delay = 0
+        await writer.close()
+        self.assertEqual(self.db.batches, [("xhs_note", [{"note_id": "1"}])])
@@ -0,0 +1,114 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 抖音客户端并发测试，验证 N 个 get_aweme_detail 请求在本地桩服务上是重叠执行的
+import asyncio
+import json
+from unittest import IsolatedAsyncioTestCase, mock
+from urllib.parse import parse_qs, urlparse
+
+import config
+from media_platform.douyin.client import DOUYINClient
+from media_platform.douyin.core import DouYinCrawler
+from tools import rate_limiter
+from tools.http_client import close_async_clients
+
+CONCURRENCY = 10
+STUB_WAIT_TIMEOUT = 5  # 桩服务等待全部请求到达的最长时间（秒），请求串行执行时超时后才返回
+
+
+class StubServer:
+    """
+    极简的 HTTP/1.1 桩服务，统计同时在处理中的请求数；
+    每个请求都等到 CONCURRENCY 个请求同时到达后才返回 aweme_detail
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.all_arrived = asyncio.Event()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            while (await reader.readline()) not in (b"\r\n", b""):
+                pass
+            path = request_line.decode().split(" ")[1]
+            aweme_id = parse_qs(urlparse(path).query).get("aweme_id", [""])[0]
+
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            if self.in_flight >= CONCURRENCY:
+                self.all_arrived.set()
+            try:
+                await asyncio.wait_for(self.all_arrived.wait(), timeout=STUB_WAIT_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+            self.in_flight -= 1
+
+            body = json.dumps({"aweme_detail": {"aweme_id": aweme_id}}).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        writer.close()
+
+
+class TestDouYinClientConcurrency(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        # 只关心传输层并发，放开限速器
+        self.rate_limit_patchers = [
+            mock.patch.multiple(config, RATE_LIMIT_INITIAL_QPS=1000, RATE_LIMIT_MAX_QPS=1000, RATE_LIMIT_BURST=CONCURRENCY),
+            mock.patch.dict(rate_limiter._rate_limiters, clear=True),
+        ]
+        for patcher in self.rate_limit_patchers:
+            patcher.start()
+        self.stub = StubServer()
+        self.server = await asyncio.start_server(self.stub.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+
+        async def _skip_sign(*args, **kwargs):
+            return None
+
+        client = DOUYINClient(
+            headers={"User-Agent": "unittest", "Origin": "http://127.0.0.1"},
+            playwright_page=None,
+            cookie_dict={},
+        )
+        client._host = f"http://127.0.0.1:{port}"
+        # 签名与传输层无关，测试中跳过 a_bogus 计算
+        client._DOUYINClient__process_req_params = _skip_sign
+        self.crawler = DouYinCrawler()
+        self.crawler.dy_client = client
+
+    async def asyncTearDown(self):
+        await close_async_clients()
+        self.server.close()
+        await self.server.wait_closed()
+        for patcher in self.rate_limit_patchers:
+            patcher.stop()
+
+    async def test_get_aweme_detail_overlaps(self):
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+        aweme_ids = [str(i) for i in range(CONCURRENCY)]
+        results = await asyncio.gather(
+            *[self.crawler.get_aweme_detail(aweme_id, semaphore) for aweme_id in aweme_ids]
+        )
+
+        self.assertEqual([item["aweme_id"] for item in results], aweme_ids)
+        # 串行执行时桩服务同时只会看到一个请求
+        self.assertEqual(self.stub.max_in_flight, CONCURRENCY)
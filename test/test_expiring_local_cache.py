@@ -42,6 +42,41 @@ class TestExpiringLocalCache(unittest.TestCase):
         time.sleep(12)
         self.assertIsNone(self.cache.get('key'))
 
+    def test_heap_clear_only_expired(self):
+        self.cache.set('short', 'value', 1)
+        self.cache.set('long', 'value', 60)
+        # 覆盖后旧的过期时间失效
+        self.cache.set('renewed', 'value', 1)
+        self.cache.set('renewed', 'value', 60)
+        time.sleep(1.1)
+        self.cache._clear()
+        self.assertEqual(sorted(self.cache.keys('*')), ['long', 'renewed'])
+        self.assertEqual(self.cache.stats.expirations, 1)
+
+    def test_max_entries_lru(self):
+        cache = ExpiringLocalCache(cron_interval=10, max_entries=2)
+        cache.set('a', 1, 60)
+        cache.set('b', 2, 60)
+        cache.get('a')
+        cache.set('c', 3, 60)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.stats.snapshot()["evictions"], 1)
+        self.assertEqual(cache.stats.snapshot()["hits"], 3)
+        self.assertEqual(cache.stats.snapshot()["misses"], 1)
+
+    def test_keys_prefix(self):
+        for key in ['provider_1', 'provider_2', 'other_provider_3', 'provider']:
+            self.cache.set(key, 'value', 60)
+        self.assertEqual(self.cache.keys('provider_*'), ['provider_1', 'provider_2'])
+        self.assertEqual(sorted(self.cache.keys('*provider_*')), ['other_provider_3', 'provider_1', 'provider_2'])
+        self.cache.delete('provider_1')
+        self.assertEqual(self.cache.keys('provider_*'), ['provider_2'])
+        # 前缀索引建好之后新增的键也能查到
+        self.cache.set('provider_0', 'value', 60)
+        self.assertEqual(self.cache.keys('provider_*'), ['provider_0', 'provider_2'])
+
     def tearDown(self):
         del self.cache
 
@@ -0,0 +1,89 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase, mock
+
+import httpx
+
+from proxy import proxy_health
+from proxy.proxy_health import get_proxy_health
+from tools import http_client
+from tools.http_client import PooledAsyncClient, retire_proxy_clients
+
+PROXY_URL = "http://u:p@127.0.0.1:1"
+
+
+class TestPooledAsyncClient(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        proxy_health._proxy_health.clear()
+        self.patchers = [
+            mock.patch.dict(http_client._shared_clients, clear=True),
+            mock.patch.object(http_client, "_closing_clients", set()),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    async def asyncTearDown(self):
+        await http_client.close_async_clients()
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def _proxy_client(self, handler) -> PooledAsyncClient:
+        client = PooledAsyncClient(transport=httpx.MockTransport(handler), proxy_health=get_proxy_health(PROXY_URL),
+                                   proxy_url=PROXY_URL)
+        http_client._shared_clients[PROXY_URL] = client
+        return client
+
+    async def test_response_cookies_not_shared(self):
+        sent_cookies = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            sent_cookies.append(request.headers.get("Cookie"))
+            return httpx.Response(200, headers={"Set-Cookie": "session=abc; Path=/"})
+
+        client = PooledAsyncClient(transport=httpx.MockTransport(handler))
+        await client.get("http://127.0.0.1/login")
+        await client.get("http://127.0.0.1/media.jpg")
+        await client.get("http://127.0.0.1/api", cookies={"a1": "x"})
+        self.assertEqual(sent_cookies, [None, None, "a1=x"])
+        await client.aclose()
+
+    async def test_quarantined_proxy_client_closed(self):
+        client = self._proxy_client(lambda request: httpx.Response(429))
+        for _ in range(get_proxy_health(PROXY_URL).max_consecutive_failures):
+            await client.get("http://127.0.0.1/api")
+        # 代理被隔离后客户端移出缓存，没有进行中的请求时关闭连接池
+        self.assertNotIn(PROXY_URL, http_client._shared_clients)
+        await asyncio.sleep(0)
+        self.assertTrue(client.is_closed)
+
+    async def test_retired_client_closed_after_in_flight_requests(self):
+        release = asyncio.Event()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await release.wait()
+            return httpx.Response(200)
+
+        client = self._proxy_client(handler)
+        request_task = asyncio.create_task(client.get("http://127.0.0.1/api"))
+        await asyncio.sleep(0)
+        retire_proxy_clients(PROXY_URL)
+        self.assertNotIn(PROXY_URL, http_client._shared_clients)
+        await asyncio.sleep(0)
+        self.assertFalse(client.is_closed)
+
+        release.set()
+        self.assertEqual((await request_task).status_code, 200)
+        await asyncio.sleep(0)
+        self.assertTrue(client.is_closed)
@@ -0,0 +1,58 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from tools.js_worker_pool import JsWorkerError, JsWorkerPool
+
+
+class TestJsWorkerPool(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.pool = JsWorkerPool("libs/douyin.js", worker_num=2)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    async def test_call_batch(self):
+        results = await self.pool.call_batch("sign_reply", [(f"aweme_id={i}", "test-ua") for i in range(20)])
+        self.assertEqual(len(results), 20)
+        self.assertTrue(all(isinstance(item, str) and item for item in results))
+        self.assertEqual(self.pool.get_stats()["call_count"], 20)
+
+    async def test_restart_crashed_worker(self):
+        await self.pool.call("sign_datail", "aweme_id=1", "test-ua")
+        for worker in self.pool.workers:
+            if worker.is_alive:
+                worker._process.kill()
+        await asyncio.sleep(0.2)
+        self.assertTrue(await self.pool.call("sign_datail", "aweme_id=1", "test-ua"))
+        self.assertGreaterEqual(self.pool.get_stats()["restart_count"], 1)
+
+    async def test_restart_kills_process_when_reader_died(self):
+        worker = self.pool.workers[0]
+        self.assertTrue(await worker.call("sign_datail", "aweme_id=1", "test-ua"))
+        old_process = worker._process
+        # 读取任务异常退出但 Node 进程仍存活
+        worker._reader_task.cancel()
+        await asyncio.gather(worker._reader_task, return_exceptions=True)
+        self.assertIsNone(old_process.returncode)
+
+        self.assertTrue(await worker.call("sign_datail", "aweme_id=1", "test-ua"))
+        self.assertIsNot(worker._process, old_process)
+        # 重启前旧进程已被结束，不会成为孤儿进程
+        self.assertIsNotNone(old_process.returncode)
+
+    async def test_js_error(self):
+        with self.assertRaises(JsWorkerError):
+            await self.pool.call("not_exist_function")
@@ -0,0 +1,71 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase, mock
+
+from store.jsonl_writer import JsonlWriter, export_jsonl_to_json
+
+
+class TestJsonlWriter(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.jsonl_file = os.path.join(self.tmp_dir.name, "jsonl", "search_comments_2024-01-01.jsonl")
+        self.json_file = os.path.join(self.tmp_dir.name, "json", "search_comments_2024-01-01.json")
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def test_concurrent_write_and_export(self):
+        items = [{"comment_id": str(i), "content": f"评论 {i}", "sub": {"like_count": i}} for i in range(250)]
+        writer = JsonlWriter(self.jsonl_file, export_json_file_name=self.json_file, flush_lines=100, flush_interval=60)
+        await asyncio.gather(*[writer.write(item) for item in items])
+        await writer.close()
+
+        with open(self.jsonl_file, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(sorted(lines, key=lambda item: int(item["comment_id"])), items)
+        with open(self.json_file, encoding="utf-8") as f:
+            exported = f.read()
+        # 导出文件与旧版 json 存储写出的内容逐字节一致
+        self.assertEqual(exported, json.dumps(lines, ensure_ascii=False, indent=4))
+
+    async def test_periodic_flush(self):
+        writer = JsonlWriter(self.jsonl_file, flush_lines=100, flush_interval=0.05)
+        await writer.write({"note_id": "1"})
+        await asyncio.sleep(0.2)
+        with open(self.jsonl_file, encoding="utf-8") as f:
+            self.assertEqual(f.read(), '{"note_id": "1"}\n')
+        await writer.close()
+
+    async def test_failed_flush_keeps_lines(self):
+        writer = JsonlWriter(self.jsonl_file, flush_lines=100, flush_interval=60)
+        await writer.write({"note_id": "1"})
+        with mock.patch.object(writer, "_write_lines", side_effect=OSError("No space left on device")):
+            with self.assertRaises(OSError):
+                await writer.flush()
+        # 写盘失败的数据放回缓冲区，排在之后写入的数据前面
+        await writer.write({"note_id": "2"})
+        await writer.close()
+        with open(self.jsonl_file, encoding="utf-8") as f:
+            self.assertEqual(f.read(), '{"note_id": "1"}\n{"note_id": "2"}\n')
+
+    def test_export_empty_file(self):
+        os.makedirs(os.path.dirname(self.jsonl_file))
+        open(self.jsonl_file, "w").close()
+        self.assertEqual(export_jsonl_to_json(self.jsonl_file, self.json_file), 0)
+        with open(self.json_file, encoding="utf-8") as f:
+            self.assertEqual(f.read(), json.dumps([], indent=4))
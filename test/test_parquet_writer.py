@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import glob
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase, mock
+
+from store.parquet_writer import ParquetWriter, parse_count, pq, split_list
+
+
+class TestParquetValueConvert(unittest.TestCase):
+
+    def test_parse_count(self):
+        self.assertEqual(parse_count(12), 12)
+        self.assertEqual(parse_count("1,234"), 1234)
+        self.assertEqual(parse_count("1.2万"), 12000)
+        self.assertEqual(parse_count("10w+"), 100000)
+        self.assertIsNone(parse_count(""))
+        self.assertIsNone(parse_count("未知"))
+
+    def test_split_list(self):
+        self.assertEqual(split_list("a,b,,c"), ["a", "b", "c"])
+        self.assertEqual(split_list(""), [])
+        self.assertEqual(split_list(None), [])
+
+
+@unittest.skipIf(pq is None, "pyarrow is not installed")
+class TestParquetWriter(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_prefix = os.path.join(self.tmp_dir.name, "parquet", "search_contents_2024-01-01")
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def test_typed_row_groups(self):
+        writer = ParquetWriter(self.file_prefix, list_fields=("image_list",), row_group_size=10)
+        for i in range(25):
+            await writer.write({"note_id": str(i), "liked_count": f"{i}万", "image_list": "a,b", "add_ts": i})
+        await writer.close()
+
+        parquet_file = pq.ParquetFile(f"{self.file_prefix}_part0001.parquet")
+        self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+        self.assertEqual(str(parquet_file.schema_arrow.field("liked_count").type), "int64")
+        self.assertEqual(str(parquet_file.schema_arrow.field("image_list").type), "list<element: string>")
+        table = parquet_file.read()
+        self.assertEqual(table.column("liked_count").to_pylist()[3], 30000)
+        self.assertEqual(table.column("image_list").to_pylist()[0], ["a", "b"])
+
+    async def test_roll_file(self):
+        writer = ParquetWriter(self.file_prefix, row_group_size=5, max_file_size=1)
+        for i in range(12):
+            await writer.write({"note_id": str(i)})
+        # 出现新字段时也滚动到新的分片
+        await writer.write({"note_id": "12", "title": "t"})
+        await writer.close()
+
+        files = sorted(glob.glob(f"{self.file_prefix}_part*.parquet"))
+        self.assertEqual(len(files), 3)
+        self.assertEqual(sum(pq.read_metadata(f).num_rows for f in files), 13)
+        self.assertEqual(pq.read_schema(files[-1]).names, ["note_id", "title"])
+
+    async def test_failed_flush_keeps_rows(self):
+        writer = ParquetWriter(self.file_prefix, row_group_size=10)
+        await writer.write({"note_id": "1"})
+        with mock.patch.object(writer, "_write_rows", side_effect=OSError("No space left on device")):
+            with self.assertRaises(OSError):
+                await writer.flush()
+        await writer.write({"note_id": "2"})
+        await writer.close()
+        # 写入失败的数据放回缓冲区，关闭时和之后的数据一起写入
+        table = pq.read_table(f"{self.file_prefix}_part0001.parquet")
+        self.assertEqual(table.column("note_id").to_pylist(), ["1", "2"])
+
+    async def test_only_full_row_groups_before_close(self):
+        writer = ParquetWriter(self.file_prefix, row_group_size=10)
+        for page in range(4):
+            await writer.write_many([{"note_id": f"{page}-{i}"} for i in range(7)])
+            # 定时写出只写凑满的 row group
+            await writer.flush(full_row_groups_only=True)
+        await writer.close()
+        metadata = pq.read_metadata(f"{self.file_prefix}_part0001.parquet")
+        self.assertEqual([metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)], [10, 10, 8])
@@ -0,0 +1,221 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase, mock
+
+import httpx
+
+from media_platform.xhs import client as xhs_client_module
+from media_platform.xhs.client import XiaoHongShuClient
+from media_platform.xhs.exception import AccountBlockError, IPBlockError
+from tools.http_client import PooledAsyncClient
+from tools.pipeline import CrawlerPipeline, fan_out_keywords
+from var import source_keyword_var
+
+
+class TestCrawlerPipeline(IsolatedAsyncioTestCase):
+
+    async def test_fan_out_to_downstream_stages(self):
+        stored, commented = [], []
+
+        async def fetch_detail(item):
+            return None if item % 5 == 0 else {"id": item}
+
+        async def store(detail):
+            stored.append(detail["id"])
+
+        async def fetch_comments(detail):
+            commented.append(detail["id"])
+
+        pipeline = CrawlerPipeline("test", queue_size=2)
+        pipeline.add_stage("detail", fetch_detail, worker_num=3)
+        pipeline.add_stage("store", store, upstreams=["detail"])
+        pipeline.add_stage("comment", fetch_comments, worker_num=2, upstreams=["detail"])
+        async with pipeline:
+            for item in range(20):
+                await pipeline.put(item)
+
+        expected = [item for item in range(20) if item % 5 != 0]
+        self.assertEqual(sorted(stored), expected)
+        self.assertEqual(sorted(commented), expected)
+
+    async def test_slow_comments_not_block_producer(self):
+        release = asyncio.Event()
+        running, max_running, finished = 0, 0, []
+
+        async def slow_comments(item):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await release.wait()
+            running -= 1
+            finished.append(item)
+
+        pipeline = CrawlerPipeline("test", queue_size=10)
+        pipeline.add_stage("comment", slow_comments, worker_num=5)
+        async with pipeline:
+            for item in range(10):
+                await pipeline.put(item)
+            # 评论还一条都没处理完，生产者已经投递完所有元素
+            self.assertEqual(finished, [])
+            await asyncio.wait_for(self._wait_until(lambda: running == 5), timeout=1)
+            release.set()
+
+        self.assertEqual(sorted(finished), list(range(10)))
+        # 5 个 worker 同时处理评论
+        self.assertEqual(max_running, 5)
+
+    @staticmethod
+    async def _wait_until(predicate):
+        while not predicate():
+            await asyncio.sleep(0)
+
+    async def test_handler_error_not_stop_stage(self):
+        results = []
+
+        async def handler(item):
+            if item == 1:
+                raise ValueError("boom")
+            results.append(item)
+
+        pipeline = CrawlerPipeline("test")
+        pipeline.add_stage("only", handler)
+        async with pipeline:
+            for item in range(3):
+                await pipeline.put(item)
+        self.assertEqual(results, [0, 2])
+
+    async def test_fatal_error_stops_pipeline(self):
+        handled = []
+
+        async def handler(item):
+            handled.append(item)
+            if item == 1:
+                raise PermissionError("ip blocked")
+
+        pipeline = CrawlerPipeline("test", queue_size=100, fatal_exceptions=(PermissionError,))
+        pipeline.add_stage("only", handler)
+        with self.assertRaises(PermissionError):
+            async with pipeline:
+                for item in range(10):
+                    await pipeline.put(item)
+                    await asyncio.sleep(0.01)
+        # 出现致命异常后生产者停止投递，剩余元素不再处理
+        self.assertEqual(handled, [0, 1])
+
+    async def test_fatal_error_raised_on_join(self):
+        async def handler(item):
+            raise PermissionError("ip blocked")
+
+        pipeline = CrawlerPipeline("test", fatal_exceptions=(PermissionError,))
+        pipeline.add_stage("only", handler)
+        with self.assertRaises(PermissionError):
+            async with pipeline:
+                await pipeline.put(0)
+
+    async def test_xhs_ip_block_code_stops_pipeline(self):
+        requested = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requested.append(str(request.url))
+            return httpx.Response(200, json={"success": False, "code": 300012, "msg": "ip blocked"})
+
+        async def no_wait(seconds):
+            pass
+
+        xhs_client = XiaoHongShuClient(headers={}, playwright_page=mock.MagicMock(), cookie_dict={})
+        http_client = PooledAsyncClient(transport=httpx.MockTransport(handler))
+        rate_limiter = mock.MagicMock(acquire=mock.AsyncMock())
+
+        async def fetch_detail(note_id):
+            return await xhs_client.request("GET", f"https://edith.xiaohongshu.com/api/sns/web/v1/feed?id={note_id}")
+
+        pipeline = CrawlerPipeline("test", queue_size=100, fatal_exceptions=(IPBlockError, AccountBlockError))
+        pipeline.add_stage("detail", fetch_detail)
+        with mock.patch.object(xhs_client_module, "get_async_client", return_value=http_client), \
+                mock.patch.object(xhs_client_module, "get_rate_limiter", return_value=rate_limiter), \
+                mock.patch.object(XiaoHongShuClient.request.retry, "sleep", no_wait):
+            # 请求方法的 @retry 重试耗尽后抛出的是 RetryError，流水线按最后一次的 IPBlockError 终止
+            with self.assertRaises(IPBlockError):
+                async with pipeline:
+                    for note_id in range(5):
+                        await pipeline.put(note_id)
+        await http_client.aclose()
+        self.assertEqual(len(requested), 3)
+        self.assertTrue(all(url.endswith("id=0") for url in requested))
+
+
+class TestFanOutKeywords(IsolatedAsyncioTestCase):
+
+    async def test_keyword_context_isolated(self):
+        seen = []
+
+        async def search_by_keyword(keyword):
+            for page in range(3):
+                await asyncio.sleep(0.01)
+                seen.append((keyword, source_keyword_var.get()))
+
+        await fan_out_keywords(["python", "golang", "rust"], search_by_keyword, max_concurrency=3)
+        self.assertEqual(len(seen), 9)
+        self.assertTrue(all(keyword == source_keyword for keyword, source_keyword in seen))
+        self.assertEqual(source_keyword_var.get(), "")
+
+    async def test_max_concurrency(self):
+        running, max_running = 0, 0
+
+        async def search_by_keyword(keyword):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        await fan_out_keywords([str(i) for i in range(10)], search_by_keyword, max_concurrency=3)
+        self.assertEqual(max_running, 3)
+
+    async def test_error_stops_other_keywords(self):
+        finished = []
+
+        async def search_by_keyword(keyword):
+            if keyword == "banned":
+                await asyncio.sleep(0.01)
+                raise PermissionError("ip blocked")
+            await asyncio.sleep(1)
+            finished.append(keyword)
+
+        with self.assertRaises(PermissionError):
+            await fan_out_keywords(["python", "banned", "rust", "golang"], search_by_keyword, max_concurrency=2)
+        self.assertEqual(finished, [])
+
+    async def test_shared_stage_semaphore(self):
+        running, max_running = 0, 0
+        comment_semaphore = asyncio.Semaphore(2)
+
+        async def fetch_comments(item):
+            nonlocal running, max_running
+            async with comment_semaphore:
+                running += 1
+                max_running = max(max_running, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        async def search_by_keyword(keyword):
+            pipeline = CrawlerPipeline(f"test-{keyword}")
+            pipeline.add_stage("comment", fetch_comments, worker_num=2)
+            async with pipeline:
+                for item in range(5):
+                    await pipeline.put(item)
+
+        await fan_out_keywords(["python", "golang", "rust"], search_by_keyword, max_concurrency=3)
+        # 每个关键词各有 2 个 worker，但共用的信号量把总并发限制在 2
+        self.assertEqual(max_running, 2)
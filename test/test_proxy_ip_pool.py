@@ -13,10 +13,24 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 14:42
 # @Desc    :
-from unittest import IsolatedAsyncioTestCase
+import asyncio
+import socket
+import time
+from typing import Any, Dict, List, Optional
+from unittest import IsolatedAsyncioTestCase, mock
 
-from proxy.proxy_ip_pool import create_ip_pool
+import httpx
+
+import config
+from cache.abs_cache import AbstractAsyncCache
+from cache.cache_factory import CacheFactory
+from proxy import proxy_health, proxy_ip_pool
+from proxy.base_proxy import IpCache, IpGetError, ProxyProvider
+from proxy.proxy_health import get_proxy_health, get_proxy_url
+from proxy.proxy_ip_pool import ProxyIpPool, create_ip_pool, refresh_proxies
 from proxy.types import IpInfoModel
+from tools import utils
+from tools.http_client import PooledAsyncClient
 
 
 class TestIpPool(IsolatedAsyncioTestCase):
@@ -28,3 +42,217 @@ class TestIpPool(IsolatedAsyncioTestCase):
             print(ip_proxy_info)
             self.assertIsNotNone(ip_proxy_info.ip, msg="验证 ip 是否获取成功")
 
+
+class StubProxyProvider(ProxyProvider):
+    """
+    按顺序返回预先准备好的代理
+    """
+
+    def __init__(self, proxies: List[IpInfoModel]):
+        self.proxies = proxies
+        self.requested: List[int] = []
+
+    async def get_proxies(self, num: int) -> List[IpInfoModel]:
+        self.requested.append(num)
+        proxies, self.proxies = self.proxies[:num], self.proxies[num:]
+        return proxies
+
+
+def _unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestProxyIpPoolReservoir(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        # 本地的 HTTP 代理桩，对任何请求返回 200
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\n{}")
+            await writer.drain()
+            writer.close()
+
+        self.server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        self.stub_port = self.server.sockets[0].getsockname()[1]
+        proxy_health._proxy_health.clear()
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def _proxy(self, user: str, port: int = 0, expired_in: int = 3600) -> IpInfoModel:
+        # 代理桩不校验认证信息，用户名区分不同的代理
+        return IpInfoModel(ip="127.0.0.1", port=port or self.stub_port, user=user, password="p", protocol="http://",
+                           expired_time_ts=int(time.time()) + expired_in)
+
+    def _pool(self, provider: ProxyProvider, ip_pool_count: int) -> ProxyIpPool:
+        return ProxyIpPool(ip_pool_count=ip_pool_count, enable_validate_ip=True, ip_provider=provider,
+                           valid_ip_url="http://validate.stub/ip")
+
+    async def test_only_valid_proxies_are_served(self):
+        provider = StubProxyProvider([self._proxy("a"), self._proxy("bad", port=_unused_port()),
+                                      self._proxy("expiring", expired_in=1), self._proxy("b")])
+        pool = self._pool(provider, ip_pool_count=4)
+        await pool.load_proxies()
+        self.assertEqual([proxy.user for proxy in pool.proxy_list], ["a", "b"])
+
+        # 代理取用后留在池中复用
+        for _ in range(5):
+            self.assertIn((await pool.get_proxy()).user, ("a", "b"))
+        self.assertEqual(len(pool.proxy_list), 2)
+        await pool.close()
+
+    async def test_prefer_healthy_proxy(self):
+        provider = StubProxyProvider([self._proxy("fast"), self._proxy("slow")])
+        pool = self._pool(provider, ip_pool_count=2)
+        await pool.load_proxies()
+        for _ in range(5):
+            get_proxy_health(get_proxy_url(pool.proxy_list[0])).record_success(0.01)
+            get_proxy_health(get_proxy_url(pool.proxy_list[1])).record_success(1.0)
+        for _ in range(5):
+            self.assertEqual((await pool.get_proxy()).user, "fast")
+        await pool.close()
+
+    async def test_quarantine_and_refill(self):
+        provider = StubProxyProvider([self._proxy(user) for user in ("a", "b", "c")])
+        pool = self._pool(provider, ip_pool_count=2)
+        await pool.load_proxies()
+        get_proxy_health(get_proxy_url(self._proxy("a"))).record_block()
+
+        self.assertEqual((await pool.get_proxy()).user, "b")
+        await pool._refill_task
+        self.assertEqual(provider.requested, [2, 1])
+        self.assertEqual(sorted(proxy.user for proxy in pool._available_proxies()), ["b", "c"])
+        # 隔离中的代理仍留在池中，隔离期结束后恢复使用
+        self.assertEqual(len(pool.proxy_list), 3)
+        await pool.close()
+
+    async def test_close_ip_pool_stops_refill(self):
+        refill_started = asyncio.Event()
+
+        class SlowProvider(StubProxyProvider):
+            async def get_proxies(self, num: int) -> List[IpInfoModel]:
+                if self.requested:
+                    refill_started.set()
+                    await asyncio.Event().wait()
+                return await super().get_proxies(num)
+
+        pool = self._pool(SlowProvider([self._proxy("a")]), ip_pool_count=2)
+        await pool.load_proxies()
+        with mock.patch.object(proxy_ip_pool, "_ip_pool", pool):
+            await pool.get_proxy()
+            refill_task = pool._refill_task
+            await refill_started.wait()
+            await proxy_ip_pool.close_ip_pool()
+            self.assertIsNone(proxy_ip_pool._ip_pool)
+        # 爬虫结束时后台补充任务已经结束，不会遗留未完成的 task
+        self.assertTrue(refill_task.done())
+
+    async def test_refresh_proxies_when_current_unavailable(self):
+        provider = StubProxyProvider([self._proxy("a"), self._proxy("b")])
+        pool = self._pool(provider, ip_pool_count=2)
+        await pool.load_proxies()
+        _, proxies_a = utils.format_proxy_info(self._proxy("a"))
+        _, proxies_b = utils.format_proxy_info(self._proxy("b"))
+        with mock.patch.object(proxy_ip_pool, "_ip_pool", pool):
+            self.assertEqual(await refresh_proxies(proxies_a), proxies_a)
+            self.assertIsNone(await refresh_proxies(None))
+
+            # 运行中的客户端在代理被隔离后换到池中健康的代理
+            get_proxy_health(get_proxy_url(self._proxy("a"))).record_block()
+            self.assertEqual(await refresh_proxies(proxies_a), proxies_b)
+
+            # 代理过期被移出池后同样更换
+            pool.proxy_list[1].expired_time_ts = int(time.time())
+            provider.proxies = [self._proxy("c")]
+            _, proxies_c = utils.format_proxy_info(self._proxy("c"))
+            self.assertEqual(await refresh_proxies(proxies_b), proxies_c)
+        await pool.close()
+
+    async def test_no_proxy_available(self):
+        pool = self._pool(StubProxyProvider([self._proxy("bad", port=_unused_port())]), ip_pool_count=1)
+        with self.assertRaises(IpGetError):
+            await pool.get_proxy()
+        await pool.close()
+
+
+class DictAsyncCache(AbstractAsyncCache):
+    """
+    基于字典的异步缓存，代替 redis 记录 IpCache 的读写
+    """
+
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.closed = False
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self.data.get(key)
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        self.data[key] = value
+
+    async def keys(self, pattern: str) -> List[str]:
+        return [key for key in self.data if key.startswith(pattern.rstrip("*"))]
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class TestIpCache(IsolatedAsyncioTestCase):
+
+    async def test_async_redis_cache_type(self):
+        async_cache = DictAsyncCache()
+        with mock.patch.object(config, "IP_PROXY_CACHE_TYPE", config.CACHE_TYPE_ASYNC_REDIS), \
+                mock.patch.object(CacheFactory, "create_cache", return_value=async_cache) as create_cache:
+            ip_cache = IpCache()
+        create_cache.assert_called_once_with(cache_type=config.CACHE_TYPE_ASYNC_REDIS)
+
+        proxy = IpInfoModel(ip="127.0.0.1", port=8080, user="u", password="p",
+                            expired_time_ts=utils.get_unix_timestamp() + 60)
+        await ip_cache.set_ip("kuaidaili_127.0.0.1_8080", proxy.model_dump_json(), ex=60)
+        await ip_cache.set_ip("JISUHTTP_127.0.0.2_8080", proxy.model_dump_json(), ex=60)
+        self.assertEqual(await ip_cache.load_all_ip("kuaidaili"), [proxy])
+
+        await ip_cache.close()
+        self.assertTrue(async_cache.closed)
+
+
+class TestProxyHealth(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        proxy_health._proxy_health.clear()
+        self.health = get_proxy_health("http://u:p@127.0.0.1:1")
+
+    async def test_consecutive_failures(self):
+        self.health.record_success(0.1)
+        for _ in range(self.health.max_consecutive_failures - 1):
+            self.health.record_failure()
+            self.health.record_success(0.1)
+        self.assertTrue(self.health.is_available)
+        for _ in range(self.health.max_consecutive_failures):
+            self.health.record_failure()
+        self.assertFalse(self.health.is_available)
+
+    async def test_block_until_dead(self):
+        self.health.record_block()
+        self.assertFalse(self.health.is_available)
+        self.assertFalse(self.health.is_dead)
+        self.health.quarantined_until = 0
+        self.assertTrue(self.health.is_available)
+        for _ in range(self.health.max_block_count - 1):
+            self.health.record_block()
+        self.assertTrue(self.health.is_dead)
+
+    async def test_status_codes_count_as_failures(self):
+        client = PooledAsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(429)),
+                                   proxy_health=self.health)
+        for _ in range(self.health.max_consecutive_failures):
+            await client.get("http://127.0.0.1/api")
+        # 限流只会临时隔离，不计入封禁次数
+        self.assertFalse(self.health.is_available)
+        self.assertEqual(self.health.block_count, 0)
+        client.report_blocked()
+        self.assertEqual(self.health.block_count, 1)
+        await client.aclose()
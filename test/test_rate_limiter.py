@@ -0,0 +1,93 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+from unittest import IsolatedAsyncioTestCase, mock
+
+import config
+from tools import rate_limiter
+from tools.rate_limiter import AdaptiveTokenBucket, get_rate_limiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestAdaptiveTokenBucket(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.patchers = [
+            mock.patch.object(rate_limiter, "time", self.clock),
+            mock.patch.object(rate_limiter.asyncio, "sleep", self.clock.sleep),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def make_bucket(self, rate: float = 1.0, capacity: float = 1) -> AdaptiveTokenBucket:
+        return AdaptiveTokenBucket(name="test", rate=rate, min_rate=0.1, max_rate=1.2, capacity=capacity,
+                                   increase_step=0.1, decrease_factor=0.5)
+
+    def test_additive_increase_clamped_to_max_rate(self):
+        bucket = self.make_bucket()
+        bucket.on_success()
+        self.assertAlmostEqual(bucket.rate, 1.1)
+        for _ in range(5):
+            bucket.on_success()
+        self.assertEqual(bucket.rate, 1.2)
+
+    def test_multiplicative_decrease_clamped_to_min_rate(self):
+        bucket = self.make_bucket()
+        bucket.on_throttled()
+        self.assertEqual(bucket.rate, 0.5)
+        for _ in range(5):
+            bucket.on_throttled()
+        self.assertEqual(bucket.rate, 0.1)
+
+    async def test_acquire_waits_for_refill(self):
+        bucket = self.make_bucket(rate=2.0)
+        await bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+        await bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [0.5])
+        self.clock.now += 10
+        await bucket.acquire()
+        # 令牌最多积攒到桶容量，空闲再久也只能放行一次突发
+        await bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [0.5, 0.5])
+
+    async def test_throttled_drops_saved_tokens(self):
+        bucket = self.make_bucket(rate=1.0, capacity=3)
+        bucket.on_throttled()
+        await bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [2.0])
+
+    def test_platform_overrides(self):
+        with mock.patch.dict(rate_limiter._rate_limiters, clear=True), \
+                mock.patch.object(config, "RATE_LIMIT_PLATFORM_OVERRIDES", {"wb": {"INITIAL_QPS": 0.3, "MAX_QPS": 1.0}}):
+            wb_limiter = get_rate_limiter("wb", "https://m.weibo.cn/api/comments/show")
+            xhs_limiter = get_rate_limiter("xhs", "https://edith.xiaohongshu.com/api/sns/web/v1/search/notes")
+        self.assertEqual((wb_limiter.rate, wb_limiter.max_rate), (0.3, 1.0))
+        self.assertEqual((xhs_limiter.rate, xhs_limiter.max_rate), (config.RATE_LIMIT_INITIAL_QPS, config.RATE_LIMIT_MAX_QPS))
+        self.assertEqual(wb_limiter.min_rate, config.RATE_LIMIT_MIN_QPS)
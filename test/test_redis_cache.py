@@ -17,7 +17,9 @@
 
 import time
 import unittest
+from unittest import IsolatedAsyncioTestCase
 
+from cache.async_redis_cache import AsyncRedisCache
 from cache.redis_cache import RedisCache
 
 
@@ -47,5 +49,25 @@ class TestRedisCache(unittest.TestCase):
         pass
 
 
+class TestAsyncRedisCache(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.redis_cache = AsyncRedisCache()
+
+    async def test_set_and_get(self):
+        await self.redis_cache.set('async_key', {'ip': '127.0.0.1'}, 10)
+        self.assertEqual(await self.redis_cache.get('async_key'), {'ip': '127.0.0.1'})
+
+    async def test_bulk_load(self):
+        await self.redis_cache.set_many({f'async_bulk_{i}': i for i in range(100)}, 10)
+        keys = await self.redis_cache.keys('async_bulk_*')
+        self.assertEqual(len(keys), 100)
+        self.assertEqual(await self.redis_cache.get_many(['async_bulk_1', 'async_bulk_missing']), [1, None])
+        self.assertEqual(len(await self.redis_cache.load_by_pattern('async_bulk_*')), 100)
+
+    async def asyncTearDown(self):
+        await self.redis_cache.close()
+
+
 if __name__ == '__main__':
     unittest.main()
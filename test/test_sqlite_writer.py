@@ -0,0 +1,80 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import sqlite3
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from store.sqlite_writer import SqliteWriter
+
+
+def _note(note_id: str, title: str, ts: int) -> dict:
+    return {"note_id": note_id, "user_id": "u", "title": title, "time": ts, "last_update_time": ts,
+            "add_ts": ts, "last_modify_ts": ts}
+
+
+class TestSqliteWriter(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "sqlite", "media_crawler.db")
+        self.writer = SqliteWriter(self.db_path, batch_size=50)
+        await self.writer.start()
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _query(self, sql: str):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    async def test_concurrent_upsert(self):
+        await asyncio.gather(*[self.writer.write("xhs_note", _note(str(i % 100), f"v1-{i}", 1), "note_id")
+                               for i in range(300)])
+        await self.writer.write("xhs_note", _note("0", "v2", 2), "note_id")
+        await self.writer.close()
+
+        self.assertEqual(self._query("PRAGMA journal_mode")[0][0], "wal")
+        self.assertEqual(self._query("select count(*) from xhs_note")[0][0], 100)
+        # 已存在的记录更新其他字段，保留第一次写入的 add_ts
+        self.assertEqual(self._query("select title, add_ts, last_modify_ts from xhs_note where note_id = '0'"),
+                         [("v2", 1, 2)])
+
+    async def test_update_only_and_new_column(self):
+        await self.writer.write("douyin_aweme", {"aweme_id": "1", "title": "", "add_ts": 1, "last_modify_ts": 1},
+                                "aweme_id", update_only=True)
+        await self.writer.write("xhs_note", dict(_note("1", "t", 1), new_field="x"), "note_id")
+        await self.writer.close()
+
+        self.assertEqual(self._query("select count(*) from douyin_aweme")[0][0], 0)
+        self.assertEqual(self._query("select new_field from xhs_note")[0][0], "x")
+
+    async def test_bad_record_does_not_drop_batch(self):
+        await asyncio.gather(self.writer.write("xhs_note", {"note_id": "bad"}, "note_id"),
+                             *[self.writer.write("xhs_note", _note(str(i), "t", 1), "note_id") for i in range(10)])
+        await self.writer.close()
+
+        self.assertEqual(self._query("select count(*) from xhs_note")[0][0], 10)
+
+    async def test_write_many(self):
+        await self.writer.write_many("xhs_note", [_note(str(i), "v1", 1) for i in range(120)], "note_id")
+        await self.writer.write_many("xhs_note", [_note(str(i), "v2", 2) for i in range(60)], "note_id")
+        await self.writer.write_many("xhs_note", [], "note_id")
+        await self.writer.close()
+
+        self.assertEqual(self._query("select title, count(*) from xhs_note group by title order by title"),
+                         [("v1", 60), ("v2", 60)])
@@ -0,0 +1,83 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from typing import Dict
+from unittest import IsolatedAsyncioTestCase, mock
+
+import config
+from base.base_crawler import AbstractStore
+from store import store_registry
+
+
+class RecordStore(AbstractStore):
+    events = []
+
+    async def store_content(self, content_item: Dict):
+        pass
+
+    async def store_comment(self, comment_item: Dict):
+        pass
+
+    async def store_creator(self, creator: Dict):
+        pass
+
+    async def open(self):
+        self.events.append("open")
+
+    async def flush(self):
+        self.events.append("flush")
+
+    async def close(self):
+        self.events.append("close")
+
+
+class BrokenStore(RecordStore):
+    async def close(self):
+        raise IOError("disk full")
+
+
+class TestStoreRegistry(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        RecordStore.events = []
+
+    async def asyncTearDown(self):
+        await store_registry.close_stores()
+
+    async def test_single_instance_per_run(self):
+        store = store_registry.get_store(RecordStore)
+        self.assertIs(store_registry.get_store(RecordStore), store)
+        await store_registry.open_stores()
+        await store_registry.close_stores()
+        self.assertEqual(RecordStore.events, ["open", "close"])
+        # 关闭后注册表清空，下一次运行重新创建实例
+        self.assertIsNot(store_registry.get_store(RecordStore), store)
+
+    async def test_close_error_does_not_skip_other_stores(self):
+        store_registry.get_store(BrokenStore)
+        store_registry.get_store(RecordStore)
+        await store_registry.close_stores()
+        self.assertEqual(RecordStore.events, ["close"])
+
+    async def test_periodic_flush(self):
+        store_registry.get_store(RecordStore)
+        with mock.patch.object(config, "STORE_FLUSH_INTERVAL", 0.05):
+            await store_registry.open_stores()
+            await asyncio.sleep(0.12)
+            await store_registry.close_stores()
+        self.assertEqual(RecordStore.events[0], "open")
+        self.assertEqual(RecordStore.events[-1], "close")
+        self.assertGreaterEqual(RecordStore.events.count("flush"), 1)
+        # 关闭后不再定时写出
+        await asyncio.sleep(0.1)
+        self.assertEqual(RecordStore.events[-1], "close")
@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import unittest
+from typing import Any, Dict, List, Optional
+from unittest.mock import MagicMock, patch
+
+from cache.tiered_cache import TieredCache
+
+
+class FakeRedisCache:
+    """
+    用 dict 代替 redis，记录每次读取
+    """
+
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.reads: List[str] = []
+        self.redis_client = MagicMock()
+
+    def get(self, key: str) -> Optional[Any]:
+        self.reads.append(key)
+        return self.data.get(key)
+
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        self.reads.extend(keys)
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key: str, value: Any, expire_time: int) -> None:
+        self.data[key] = value
+
+    def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+
+    def keys(self, pattern: str) -> List[str]:
+        return [key for key in self.data if key.startswith(pattern.rstrip('*'))]
+
+
+class TestTieredCache(unittest.TestCase):
+
+    def setUp(self):
+        with patch("cache.tiered_cache.RedisCache", FakeRedisCache):
+            self.cache = TieredCache(l1_ttl=60, negative_ttl=60)
+        self.l2: FakeRedisCache = self.cache._l2
+
+    def test_l1_hit(self):
+        self.l2.data['key'] = 'value'
+        for _ in range(3):
+            self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.l2.reads, ['key'])
+
+    def test_negative_cache(self):
+        for _ in range(3):
+            self.assertIsNone(self.cache.get('missing'))
+        self.assertEqual(self.l2.reads, ['missing'])
+
+    def test_set_publishes_invalidation(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.set('key', 'value', 10)
+        self.assertEqual(self.cache.get('key'), 'value')
+        channel, message = self.l2.redis_client.publish.call_args.args
+        self.assertTrue(message.endswith(' key'))
+
+    def test_invalidation_from_other_process(self):
+        self.l2.data['key'] = 'v1'
+        self.assertEqual(self.cache.get('key'), 'v1')
+        self.l2.data['key'] = 'v2'
+        # 自己发布的通知不删除本地缓存
+        self.cache._on_invalidate({"data": f"{self.cache._instance_id} key".encode()})
+        self.assertEqual(self.cache.get('key'), 'v1')
+        self.cache._on_invalidate({"data": b"other-process key"})
+        self.assertEqual(self.cache.get('key'), 'v2')
+
+    def test_get_many(self):
+        self.l2.data.update({'a': 1, 'b': 2})
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), [1, 2, None])
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), [1, 2, None])
+        self.assertEqual(self.l2.reads, ['a', 'b', 'c'])
+
+    def tearDown(self):
+        self.cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+import config
+from tools.words import AsyncWordCloudGenerator, count_words
+
+
+class TestAsyncWordCloudGenerator(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.prefix = os.path.join(self.tmp_dir.name, "search_comments_2024-01-01")
+        self.generator = AsyncWordCloudGenerator()
+        # 不依赖字体文件，只检查词云图的调用
+        self.generator.generate_word_cloud = AsyncMock()
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_word_freq(self):
+        with open(f"{self.prefix}_word_freq.json", encoding="utf-8") as f:
+            return json.load(f)
+
+    async def _test_incremental_equals_full(self, process_num: int):
+        items = [{"content": f"今天的高频词是编程副业 {i}"} for i in range(30)] + [{"content": ""}, {"note_id": "1"}]
+        with patch.object(config, "WORDCLOUD_CUT_PROCESS_NUM", process_num), \
+                patch.object(config, "WORDCLOUD_FLUSH_INTERVAL", 60):
+            for i in range(0, len(items), 7):
+                await self.generator.add_items(items[i:i + 7], self.prefix)
+            await self.generator.close()
+
+        expected = count_words([item["content"] for item in items if item.get("content")], self.generator.stop_words)
+        self.assertEqual(self.read_word_freq(), dict(expected))
+        # 多次新增只在结束时合并写一次
+        self.generator.generate_word_cloud.assert_awaited_once()
+
+    async def test_incremental_in_thread(self):
+        await self._test_incremental_equals_full(0)
+
+    async def test_incremental_in_process_pool(self):
+        await self._test_incremental_equals_full(1)
+
+    async def test_resume_from_word_freq_file(self):
+        with open(f"{self.prefix}_word_freq.json", "w", encoding="utf-8") as f:
+            json.dump({"高频词": 5}, f)
+        with patch.object(config, "WORDCLOUD_CUT_PROCESS_NUM", 0):
+            await self.generator.add_items([{"content": "高频词"}], self.prefix)
+            await self.generator.close()
+        self.assertEqual(self.read_word_freq()["高频词"], 6)
+
+    async def test_items_without_content_not_flushed(self):
+        with patch.object(config, "WORDCLOUD_CUT_PROCESS_NUM", 0):
+            await self.generator.add_items([{"desc": "内容正文在 desc 字段"}], self.prefix)
+            await self.generator.close()
+        self.assertFalse(os.path.exists(f"{self.prefix}_word_freq.json"))
+        self.generator.generate_word_cloud.assert_not_awaited()
+
+    async def test_error_in_one_prefix_not_drop_others(self):
+        contents_prefix = os.path.join(self.tmp_dir.name, "search_contents_2024-01-01")
+
+        def generate_word_cloud(word_freq, save_words_prefix):
+            if save_words_prefix == contents_prefix:
+                raise ValueError("plot error")
+
+        self.generator.generate_word_cloud.side_effect = generate_word_cloud
+        with patch.object(config, "WORDCLOUD_CUT_PROCESS_NUM", 0), \
+                patch.object(config, "WORDCLOUD_FLUSH_INTERVAL", 60):
+            await self.generator.add_items([{"content": "正文高频词"}], contents_prefix)
+            await self.generator.add_items([{"content": "评论高频词"}], self.prefix)
+            await self.generator.flush()
+        # 正文的词云生成失败不影响评论的词频和词云，失败的前缀留到下次重试
+        self.assertIn("评论", "".join(self.read_word_freq()))
+        self.assertEqual(
+            sorted(call.args[1] for call in self.generator.generate_word_cloud.await_args_list),
+            sorted([contents_prefix, self.prefix]),
+        )
+        self.assertEqual(self.generator._dirty_prefixes, {contents_prefix})
+        self.generator.generate_word_cloud.side_effect = None
+        await self.generator.close()
+        self.assertEqual(self.generator._dirty_prefixes, set())
@@ -0,0 +1,74 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 小红书签名快速实现与原实现的一致性校验及基准测试（基准测试依赖 pytest-benchmark）
+import importlib.util
+import random
+import string
+
+import pytest
+
+from media_platform.xhs.help import (b64_encode_bytes, b64Encode, build_x_s_common, encodeUtf8, fast_mrc, mrc,
+                                     sign_common_dict)
+
+HAS_BENCHMARK = importlib.util.find_spec("pytest_benchmark") is not None
+requires_benchmark = pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark is not installed")
+
+_rand = random.Random(20241218)
+_B64_CHARS = string.ascii_letters + string.digits + "+/="
+
+
+def _random_sign_params():
+    return dict(
+        a1="".join(_rand.choices("0123456789abcdef", k=52)),
+        b1="".join(_rand.choices(_B64_CHARS, k=_rand.randint(0, 200))),
+        x_s="XYW_" + "".join(_rand.choices(_B64_CHARS, k=_rand.randint(60, 300))),
+        x_t=str(_rand.randint(1700000000000, 1800000000000)),
+    )
+
+
+SIGN_PARAMS_LIST = [_random_sign_params() for _ in range(50)]
+
+
+def test_fast_mrc_identical():
+    for params in SIGN_PARAMS_LIST:
+        text = params["x_t"] + params["x_s"] + params["b1"]
+        assert fast_mrc(text) == mrc(text)
+
+
+def test_b64_encode_bytes_identical():
+    for length in range(0, 64):
+        data = bytes(_rand.randrange(256) for _ in range(length))
+        assert b64_encode_bytes(data) == b64Encode(list(data))
+
+
+def test_utf8_bytes_identical():
+    text = '{"x5":"中文~()*!.\'%/ ","x9":-123}'
+    assert list(text.encode("utf-8")) == encodeUtf8(text)
+
+
+def test_build_x_s_common_identical():
+    for params in SIGN_PARAMS_LIST:
+        assert build_x_s_common(**params) == sign_common_dict(**params)
+
+
+@requires_benchmark
+def test_benchmark_sign_common_dict(benchmark):
+    params = SIGN_PARAMS_LIST[0]
+    benchmark(sign_common_dict, **params)
+
+
+@requires_benchmark
+def test_benchmark_build_x_s_common(benchmark):
+    params = SIGN_PARAMS_LIST[0]
+    result = benchmark(build_x_s_common, **params)
+    assert result == sign_common_dict(**params)
@@ -0,0 +1,93 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from media_platform.xhs.exception import DataFetchError
+from media_platform.xhs.signer import XhsSigner
+
+
+def fake_x_s(url: str) -> str:
+    # x-s-common 的 mrc 至少需要 57 个字符，补齐到真实 X-s 的长度
+    return f"XYW_{url}".ljust(64, "0")
+
+
+class FakePage:
+    """
+    模拟 playwright Page.evaluate：按 _SIGN_BATCH_JS 的约定返回每个 url 的 X-s 和 b1
+    """
+
+    def __init__(self):
+        self.url = "https://www.xiaohongshu.com/explore"
+        self.calls = []
+        self.error = None
+        self.drop_signs = 0
+
+    async def evaluate(self, expression, arg):
+        items, need_b1 = arg
+        self.calls.append((items, need_b1))
+        if self.error is not None:
+            raise self.error
+        signs = [{"X-s": fake_x_s(url), "X-t": 1700000000000} for url, _ in items]
+        return {
+            "signs": signs[:len(signs) - self.drop_signs],
+            "b1": f"b1-{len(self.calls)}" if need_b1 else None,
+        }
+
+
+class TestXhsSigner(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.page = FakePage()
+        self.signer = XhsSigner(self.page, {"a1": "a1-cookie"})
+
+    async def sign_all(self, urls):
+        return await asyncio.wait_for(
+            asyncio.gather(*[self.signer.sign(url) for url in urls], return_exceptions=True), timeout=1
+        )
+
+    async def test_concurrent_signs_share_one_evaluate(self):
+        urls = [f"/api/sns/web/v1/feed?id={i}" for i in range(5)]
+        results = await self.sign_all(urls)
+        self.assertEqual(len(self.page.calls), 1)
+        self.assertEqual([url for url, _ in self.page.calls[0][0]], urls)
+        self.assertEqual([result["x-s"] for result in results], [fake_x_s(url) for url in urls])
+        self.assertTrue(all(result["x-s-common"] for result in results))
+
+    async def test_b1_cached_until_page_or_cookies_change(self):
+        await self.signer.sign("/a")
+        await self.signer.sign("/b")
+        self.assertEqual([need_b1 for _, need_b1 in self.page.calls], [True, False])
+        self.assertEqual(self.signer._b1, "b1-1")
+
+        self.page.url = "https://www.xiaohongshu.com/search_result"
+        await self.signer.sign("/c")
+        self.signer.update_cookies({"a1": "new-a1"})
+        await self.signer.sign("/d")
+        self.assertEqual([need_b1 for _, need_b1 in self.page.calls], [True, False, True, True])
+        self.assertEqual(self.signer._b1, "b1-4")
+
+    async def test_evaluate_error_fails_whole_batch(self):
+        self.page.error = RuntimeError("page closed")
+        results = await self.sign_all(["/a", "/b"])
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        # 出错后不影响后续签名
+        self.page.error = None
+        self.assertEqual((await self.signer.sign("/c"))["x-s"], fake_x_s("/c"))
+
+    async def test_short_result_fails_every_caller(self):
+        self.page.drop_signs = 1
+        results = await self.sign_all(["/a", "/b", "/c"])
+        self.assertTrue(all(isinstance(result, DataFetchError) for result in results))
+        # 签名结果不完整时不缓存 b1
+        self.assertIsNone(self.signer._b1)
@@ -0,0 +1,74 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 知乎签名校验：常驻 worker 池签名与 execjs 同步签名的结果一致且 worker 进程被复用，
+#            以及两种方式的微基准（基准测试依赖 pytest-benchmark）
+import asyncio
+import importlib.util
+from unittest import IsolatedAsyncioTestCase
+
+import pytest
+
+import config
+from media_platform.zhihu.help import sign, sign_by_execjs
+from tools.js_worker_pool import close_js_worker_pools, get_js_worker_pool
+
+HAS_BENCHMARK = importlib.util.find_spec("pytest_benchmark") is not None
+requires_benchmark = pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark is not installed")
+
+SIGN_COUNT = 50
+TEST_URL = "/api/v4/search_v3?gk_version=gz-gaokao&t=general&q=python&correction=1&offset=0&limit=20"
+TEST_COOKIES = "d_c0=AHBTmmKxxxxxxxxxxxxxxxxxxxx|1700000000;"
+
+
+class TestZhihuSign(IsolatedAsyncioTestCase):
+
+    async def asyncTearDown(self):
+        await close_js_worker_pools()
+
+    @staticmethod
+    def get_worker_pids(sign_pool):
+        return {worker.worker_id: worker._process.pid for worker in sign_pool.workers if worker.is_alive}
+
+    async def test_sign_by_worker_pool(self):
+        execjs_result = sign_by_execjs(TEST_URL, TEST_COOKIES)
+        await sign(TEST_URL, TEST_COOKIES)  # 预热 worker
+        sign_pool = get_js_worker_pool("libs/zhihu.js", worker_num=config.SIGN_JS_WORKER_NUM)
+        worker_pids = self.get_worker_pids(sign_pool)
+
+        pool_results = await asyncio.gather(*[sign(TEST_URL, TEST_COOKIES) for _ in range(SIGN_COUNT)])
+
+        # x-zse-96 中包含随机数，只校验两种方式的结果结构一致
+        for pool_res in pool_results:
+            self.assertEqual(execjs_result["x-zst-81"], pool_res["x-zst-81"])
+            self.assertTrue(pool_res["x-zse-96"].startswith("2.0_"))
+        # 已启动的 worker 一直复用同一个 Node 进程，不会每次签名都启动新进程
+        self.assertLessEqual(worker_pids.items(), self.get_worker_pids(sign_pool).items())
+        stats = sign_pool.get_stats()
+        self.assertEqual(stats["call_count"], SIGN_COUNT + 1)
+        self.assertEqual(stats["restart_count"], 0)
+
+
+@requires_benchmark
+def test_benchmark_sign_by_execjs(benchmark):
+    benchmark(sign_by_execjs, TEST_URL, TEST_COOKIES)
+
+
+@requires_benchmark
+def test_benchmark_sign_by_worker_pool(benchmark):
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(sign(TEST_URL, TEST_COOKIES))  # 预热 worker
+        benchmark(lambda: loop.run_until_complete(sign(TEST_URL, TEST_COOKIES)))
+    finally:
+        loop.run_until_complete(close_js_worker_pools())
+        loop.close()
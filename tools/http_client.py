@@ -0,0 +1,207 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 共享的 httpx 连接池，一次爬虫运行内所有平台客户端复用同一个长连接传输层
+
+import asyncio
+import importlib.util
+import json
+import time
+from http.cookiejar import CookieJar
+from typing import Dict, List, Optional, Set, Union
+
+import httpx
+
+import config
+from proxy.proxy_health import ProxyHealth, get_proxies_url, get_proxy_health
+
+ProxiesType = Optional[Union[str, Dict[str, str]]]
+
+
+class _DiscardCookieJar(CookieJar):
+    """
+    不保存响应中 Set-Cookie 的 cookie jar
+    共享客户端跨请求、跨平台复用，如果保存响应 cookie，没有显式携带 Cookie 头的请求（如媒体下载）
+    会带上其他请求拿到的 cookie；与原来每个请求新建客户端时一样，只发送请求自己指定的 cookie
+    """
+
+    def extract_cookies(self, response, request) -> None:
+        pass
+
+
+class PooledAsyncClient(httpx.AsyncClient):
+    """
+    带单 host 并发连接上限的 httpx.AsyncClient
+    httpx.Limits 只能限制整个连接池，这里按 host 额外加一层信号量；
+    使用代理时记录每次请求的耗时和结果，用于代理池按健康度选择代理
+    """
+
+    def __init__(self, *args, max_connections_per_host: int = 0, proxy_health: Optional[ProxyHealth] = None,
+                 proxy_url: Optional[str] = None, **kwargs):
+        kwargs.setdefault("cookies", _DiscardCookieJar())
+        super().__init__(*args, **kwargs)
+        self._max_connections_per_host = max_connections_per_host
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._proxy_health = proxy_health
+        self.proxy_url = proxy_url
+        self._in_flight = 0
+        self._close_when_idle = False
+
+    def _get_host_semaphore(self, host: str) -> Optional[asyncio.Semaphore]:
+        if self._max_connections_per_host <= 0:
+            return None
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._max_connections_per_host)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def _send_limited(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        semaphore = self._get_host_semaphore(request.url.host)
+        if semaphore is None:
+            return await super().send(request, **kwargs)
+        async with semaphore:
+            return await super().send(request, **kwargs)
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        self._in_flight += 1
+        try:
+            return await self._send_with_health(request, **kwargs)
+        finally:
+            self._in_flight -= 1
+            if self._close_when_idle and self._in_flight == 0:
+                self._schedule_close()
+
+    async def _send_with_health(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        if self._proxy_health is None:
+            return await self._send_limited(request, **kwargs)
+        start = time.monotonic()
+        try:
+            response = await self._send_limited(request, **kwargs)
+        except httpx.TransportError:
+            self._proxy_health.record_failure()
+            self._retire_if_unavailable()
+            raise
+        if response.status_code in config.IP_PROXY_FAILURE_STATUS_CODES:
+            self._proxy_health.record_failure()
+            self._retire_if_unavailable()
+        else:
+            self._proxy_health.record_success(time.monotonic() - start)
+        return response
+
+    def report_blocked(self) -> None:
+        """
+        响应内容中出现 IP 封禁信号（状态码正常）时由平台客户端调用，记录到当前代理的健康度
+        :return:
+        """
+        if self._proxy_health is not None:
+            self._proxy_health.record_block()
+            self._retire_if_unavailable()
+
+    def _retire_if_unavailable(self) -> None:
+        # 代理被隔离或不再使用时，不再复用这个连接池，避免一直占着到坏代理的连接
+        if not self._proxy_health.is_available:
+            retire_proxy_clients(self.proxy_url)
+
+    def close_when_idle(self) -> None:
+        """
+        没有进行中的请求时关闭连接池，否则等最后一个请求结束后再关闭
+        :return:
+        """
+        self._close_when_idle = True
+        if self._in_flight == 0:
+            self._schedule_close()
+
+    def _schedule_close(self) -> None:
+        if self.is_closed or self in _closing_clients:
+            return
+        _closing_clients.add(self)
+        task = asyncio.get_running_loop().create_task(self.aclose())
+        task.add_done_callback(lambda _: _closing_clients.discard(self))
+
+
+_shared_clients: Dict[str, PooledAsyncClient] = {}
+# 已从缓存中移除、正在关闭的客户端
+_closing_clients: Set[PooledAsyncClient] = set()
+
+
+def _proxies_key(proxies: ProxiesType) -> str:
+    if not proxies:
+        return ""
+    if isinstance(proxies, str):
+        return proxies
+    return json.dumps(proxies, sort_keys=True)
+
+
+def is_http2_available() -> bool:
+    """
+    HTTP/2 依赖 h2 包（pip install httpx[http2]），未安装时自动退回 HTTP/1.1
+    :return:
+    """
+    return config.ENABLE_HTTP2 and importlib.util.find_spec("h2") is not None
+
+
+def get_async_client(proxies: ProxiesType = None) -> PooledAsyncClient:
+    """
+    获取共享的 httpx 异步客户端，相同代理配置复用同一个连接池
+    :param proxies: httpx 代理配置
+    :return:
+    """
+    key = _proxies_key(proxies)
+    client = _shared_clients.get(key)
+    if client is None or client.is_closed:
+        proxy_url = get_proxies_url(proxies)
+        client = PooledAsyncClient(
+            proxies=proxies or None,
+            http2=is_http2_available(),
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            max_connections_per_host=config.HTTP_MAX_CONNECTIONS_PER_HOST,
+            proxy_health=get_proxy_health(proxy_url) if proxy_url else None,
+            proxy_url=proxy_url,
+        )
+        _shared_clients[key] = client
+    return client
+
+
+def retire_proxy_clients(proxy_url: Optional[str]) -> None:
+    """
+    代理过期、被隔离或被替换后，从缓存中移除使用该代理的客户端，进行中的请求结束后关闭连接池；
+    之后再用这个代理时会新建客户端
+    :param proxy_url: httpx 代理地址
+    :return:
+    """
+    if not proxy_url:
+        return
+    retired: List[PooledAsyncClient] = []
+    for key, client in list(_shared_clients.items()):
+        if client.proxy_url == proxy_url:
+            del _shared_clients[key]
+            retired.append(client)
+    for client in retired:
+        client.close_when_idle()
+
+
+async def close_async_clients() -> None:
+    """
+    关闭所有共享的 httpx 客户端，释放连接
+    :return:
+    """
+    clients = list(_shared_clients.values()) + list(_closing_clients)
+    _shared_clients.clear()
+    _closing_clients.clear()
+    for client in clients:
+        if not client.is_closed:
+            await client.aclose()
@@ -0,0 +1,269 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 常驻 Node 进程的 JS 签名 worker 池
+#            PyExecJS 每次 call 都会启动一个新的 Node 子进程并阻塞事件循环，
+#            这里改为启动若干个常驻 Node 进程（libs/js_worker.js），通过 stdin/stdout 按行收发 JSON，异步调用签名函数
+
+import asyncio
+import itertools
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from tools import utils
+
+JS_WORKER_SCRIPT = "libs/js_worker.js"
+
+
+class JsWorkerError(Exception):
+    pass
+
+
+class JsWorker:
+    """
+    单个常驻 Node 进程
+    """
+
+    def __init__(self, script_path: str, worker_id: int, node_path: str = "node"):
+        self.script_path = script_path
+        self.worker_id = worker_id
+        self.node_path = node_path
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._id_counter = itertools.count(1)
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None \
+            and self._reader_task is not None and not self._reader_task.done()
+
+    @property
+    def crashed(self) -> bool:
+        return self._process is not None and not self.is_alive
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def start(self) -> None:
+        """
+        启动 Node 进程，等待签名脚本加载完成；之前的进程还在（如读取任务异常退出）时先结束它，避免遗留孤儿进程
+        :return:
+        """
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.is_alive:
+                return
+            await self._kill()
+            self._process = await asyncio.create_subprocess_exec(
+                self.node_path, JS_WORKER_SCRIPT, self.script_path,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                limit=2 ** 20,
+            )
+            ready_line = await self._process.stdout.readline()
+            if not ready_line:
+                raise JsWorkerError(f"[JsWorker.start] worker {self.worker_id} load {self.script_path} failed")
+            self._reader_task = asyncio.create_task(self._read_loop())
+            utils.logger.info(
+                f"[JsWorker.start] worker {self.worker_id} started, pid: {self._process.pid}, script: {self.script_path}")
+
+    async def _read_loop(self) -> None:
+        """
+        读取 worker 的响应，按 id 分发给等待中的调用
+        :return:
+        """
+        try:
+            while True:
+                line = await self._process.stdout.readline()
+                if not line:
+                    break
+                resp = json.loads(line)
+                future = self._pending.pop(resp.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in resp:
+                    future.set_exception(JsWorkerError(resp["error"]))
+                else:
+                    future.set_result(resp.get("result"))
+        finally:
+            # 进程退出或读取异常，未完成的调用全部失败，由上层重启 worker 后重试
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(JsWorkerError(f"js worker {self.worker_id} exited"))
+
+    async def call(self, fn: str, *args) -> Any:
+        """
+        调用 JS 中的全局函数
+        :param fn: 函数名
+        :param args: 参数
+        :return:
+        """
+        if not self.is_alive:
+            await self.start()
+        call_id = next(self._id_counter)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[call_id] = future
+        try:
+            payload = json.dumps({"id": call_id, "fn": fn, "args": list(args)}, ensure_ascii=False)
+            self._process.stdin.write(payload.encode("utf-8") + b"\n")
+            await self._process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            self._pending.pop(call_id, None)
+            raise JsWorkerError(f"js worker {self.worker_id} exited: {e}")
+        return await future
+
+    async def _kill(self) -> None:
+        """
+        强制结束当前 Node 进程并等待读取任务退出
+        :return:
+        """
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+        self._process = None
+        self._reader_task = None
+
+    async def close(self) -> None:
+        if self._process is None:
+            return
+        if self._process.returncode is None:
+            try:
+                self._process.stdin.close()
+                await asyncio.wait_for(self._process.wait(), timeout=3)
+            except (asyncio.TimeoutError, BrokenPipeError, ConnectionResetError):
+                self._process.kill()
+                await self._process.wait()
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+        self._process = None
+        self._reader_task = None
+
+
+class JsWorkerPool:
+    """
+    常驻 JS worker 池，支持异步调用、批量调用、worker 崩溃自动重启以及单次调用耗时统计
+    """
+
+    def __init__(self, script_path: str, worker_num: int = 2, node_path: str = "node", max_retries: int = 1):
+        self.script_path = os.path.abspath(script_path)
+        self.max_retries = max_retries
+        self.workers: List[JsWorker] = [
+            JsWorker(self.script_path, worker_id, node_path) for worker_id in range(max(1, worker_num))
+        ]
+        self.restart_count = 0
+        self.call_count = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+
+    def _pick_worker(self) -> JsWorker:
+        """
+        选择当前排队调用最少的 worker
+        :return:
+        """
+        return min(self.workers, key=lambda worker: worker.pending_count)
+
+    def _record_latency(self, fn: str, latency: float) -> None:
+        self.call_count += 1
+        self.total_latency += latency
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        utils.logger.debug(f"[JsWorkerPool.call] {fn} cost: {latency * 1000:.2f}ms")
+
+    async def call(self, fn: str, *args) -> Any:
+        """
+        在空闲 worker 上调用 JS 函数，worker 崩溃时重启后重试
+        :param fn: 函数名
+        :param args: 参数
+        :return:
+        """
+        attempt = 0
+        while True:
+            worker = self._pick_worker()
+            if worker.crashed:
+                self.restart_count += 1
+                utils.logger.warning(f"[JsWorkerPool.call] worker {worker.worker_id} crashed, restart it")
+                await worker.close()
+            start_time = time.perf_counter()
+            try:
+                result = await worker.call(fn, *args)
+            except JsWorkerError:
+                if worker.is_alive or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                continue
+            self._record_latency(fn, time.perf_counter() - start_time)
+            return result
+
+    async def call_batch(self, fn: str, args_list: Sequence[Sequence[Any]]) -> List[Any]:
+        """
+        批量调用，请求会被分散到所有 worker 上并发执行
+        :param fn: 函数名
+        :param args_list: 每次调用的参数列表
+        :return: 与 args_list 顺序一致的结果
+        """
+        return list(await asyncio.gather(*[self.call(fn, *args) for args in args_list]))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取调用耗时统计
+        :return:
+        """
+        return {
+            "call_count": self.call_count,
+            "avg_latency_ms": self.total_latency / self.call_count * 1000 if self.call_count else 0.0,
+            "max_latency_ms": self.max_latency * 1000,
+            "last_latency_ms": self.last_latency * 1000,
+            "restart_count": self.restart_count,
+        }
+
+    async def close(self) -> None:
+        await asyncio.gather(*[worker.close() for worker in self.workers])
+
+
+_js_worker_pools: Dict[str, JsWorkerPool] = {}
+
+
+def get_js_worker_pool(script_path: str, worker_num: int = 2) -> JsWorkerPool:
+    """
+    获取指定签名脚本的 worker 池，同一个脚本在一次运行内只启动一组 worker
+    :param script_path: 签名脚本路径
+    :param worker_num: worker 数量
+    :return:
+    """
+    key = os.path.abspath(script_path)
+    pool = _js_worker_pools.get(key)
+    if pool is None:
+        pool = JsWorkerPool(script_path, worker_num=worker_num)
+        _js_worker_pools[key] = pool
+    return pool
+
+
+async def close_js_worker_pools() -> None:
+    """
+    关闭所有 worker 池
+    :return:
+    """
+    pools = list(_js_worker_pools.values())
+    _js_worker_pools.clear()
+    for pool in pools:
+        utils.logger.info(f"[close_js_worker_pools] {pool.script_path} stats: {pool.get_stats()}")
+        await pool.close()
@@ -0,0 +1,211 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 多阶段生产者/消费者流水线
+#            各阶段通过有界队列衔接并各自独立并发，例如 搜索页 -> 详情 -> 评论/存储，
+#            慢笔记的评论抓取不会再阻塞下一页搜索；队列满时上游等待，形成背压；
+#            以及多个搜索关键词的并发调度
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+from tenacity import RetryError
+
+import config
+from tools import utils
+from var import source_keyword_var
+
+StageHandler = Callable[[Any], Awaitable[Any]]
+
+
+class PipelineStage:
+    def __init__(self, name: str, handler: StageHandler, worker_num: int, queue_size: int,
+                 pipeline: Optional["CrawlerPipeline"] = None):
+        """
+        Args:
+            name: 阶段名称
+            handler: 处理单个元素的协程函数，返回值不为 None 时会被投递到所有下游阶段
+            worker_num: 并发 worker 数
+            queue_size: 输入队列长度
+            pipeline: 所属流水线，handler 抛出流水线的致命异常时终止整个流水线
+        """
+        self.name = name
+        self.pipeline = pipeline
+        self.handler = handler
+        self.worker_num = max(1, worker_num)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.downstreams: List["PipelineStage"] = []
+        self.upstreams: List["PipelineStage"] = []
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-{i}") for i in range(self.worker_num)
+        ]
+
+    async def put(self, item: Any) -> None:
+        await self.queue.put(item)
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self.queue.get()
+            try:
+                if self.pipeline is not None and self.pipeline.fatal_error is not None:
+                    # 流水线已经因为致命异常终止，剩余元素直接丢弃，让队列尽快清空
+                    continue
+                result = await self.handler(item)
+                if result is not None:
+                    for downstream in self.downstreams:
+                        await downstream.put(result)
+            except Exception as e:
+                if isinstance(e, RetryError) and e.last_attempt.failed:
+                    # 带 @retry 的请求方法重试耗尽后抛出 RetryError，按最后一次的异常判断是否致命
+                    e = e.last_attempt.exception()
+                if self.pipeline is not None and isinstance(e, self.pipeline.fatal_exceptions):
+                    utils.logger.error(f"[PipelineStage._worker] stage {self.name} fatal error, stop pipeline: {e}")
+                    if self.pipeline.fatal_error is None:
+                        self.pipeline.fatal_error = e
+                else:
+                    utils.logger.error(f"[PipelineStage._worker] stage {self.name} handle item error: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def join(self) -> None:
+        await self.queue.join()
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+class CrawlerPipeline:
+    def __init__(self, name: str, queue_size: int = 50,
+                 fatal_exceptions: Tuple[Type[BaseException], ...] = ()):
+        """
+        Args:
+            name: 流水线名称，用于日志
+            queue_size: 各阶段默认的输入队列长度
+            fatal_exceptions: 致命异常（如 IP 被封禁、账号被封或登录失效），任一阶段抛出时丢弃剩余元素，
+                put 和 join 重新抛出该异常；tenacity 的 RetryError 按最后一次重试的异常判断；
+                其他异常只记录日志，不影响后续元素
+        """
+        self.name = name
+        self.queue_size = queue_size
+        self.fatal_exceptions = fatal_exceptions
+        self.fatal_error: Optional[BaseException] = None
+        self.stages: Dict[str, PipelineStage] = {}
+
+    def add_stage(self, name: str, handler: StageHandler, worker_num: int = 1,
+                  upstreams: Sequence[str] = (), queue_size: Optional[int] = None) -> "CrawlerPipeline":
+        """
+        添加一个阶段，上游阶段必须先于下游阶段添加；没有上游的阶段直接接收 put 进来的元素
+        Args:
+            name: 阶段名称
+            handler: 处理单个元素的协程函数
+            worker_num: 并发 worker 数
+            upstreams: 上游阶段名称列表
+            queue_size: 输入队列长度，默认使用流水线的 queue_size
+
+        Returns:
+
+        """
+        stage = PipelineStage(name, handler, worker_num, queue_size or self.queue_size, pipeline=self)
+        for upstream_name in upstreams:
+            upstream = self.stages[upstream_name]
+            upstream.downstreams.append(stage)
+            stage.upstreams.append(upstream)
+        self.stages[name] = stage
+        return self
+
+    async def put(self, item: Any) -> None:
+        """
+        向所有入口阶段投递一个元素，队列满时等待；流水线已因致命异常终止时抛出该异常，让生产者停止
+        Args:
+            item: 元素
+
+        Returns:
+
+        """
+        if self.fatal_error is not None:
+            raise self.fatal_error
+        for stage in self.stages.values():
+            if not stage.upstreams:
+                await stage.put(item)
+
+    async def start(self) -> None:
+        for stage in self.stages.values():
+            stage.start()
+
+    async def join(self) -> None:
+        """
+        按添加顺序（即拓扑顺序）等待各阶段队列清空，上游清空时其产出已全部进入下游队列；
+        有阶段抛出致命异常时重新抛出
+        Returns:
+
+        """
+        for stage in self.stages.values():
+            await stage.join()
+        if self.fatal_error is not None:
+            raise self.fatal_error
+        utils.logger.info(f"[CrawlerPipeline.join] pipeline {self.name} all stages finished")
+
+    async def stop(self) -> None:
+        for stage in self.stages.values():
+            await stage.stop()
+
+    async def __aenter__(self) -> "CrawlerPipeline":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        try:
+            if exc_type is None:
+                await self.join()
+        finally:
+            await self.stop()
+
+
+async def fan_out_keywords(keywords: Sequence[str], keyword_handler: Callable[[str], Awaitable[None]],
+                           max_concurrency: Optional[int] = None) -> None:
+    """
+    并发处理多个搜索关键词，每个关键词一个 task
+    asyncio.create_task 会复制当前的 contextvars 上下文，各关键词在自己的上下文中设置 source_keyword_var，互不干扰；
+    可恢复的错误（如单页请求失败）由 keyword_handler 自己处理，抛出来的异常（IP 被封禁、登录失效等）
+    与串行执行时一样终止本次爬取：取消其他关键词后重新抛出
+    Args:
+        keywords: 关键词列表
+        keyword_handler: 处理单个关键词的协程函数
+        max_concurrency: 同时处理的关键词数量上限，默认使用 config.MAX_KEYWORD_CONCURRENCY_NUM
+
+    Returns:
+
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency or config.MAX_KEYWORD_CONCURRENCY_NUM))
+
+    async def run_keyword(keyword: str) -> None:
+        async with semaphore:
+            source_keyword_var.set(keyword)
+            try:
+                await keyword_handler(keyword)
+            except Exception as e:
+                utils.logger.error(f"[fan_out_keywords] keyword: {keyword} crawl error, stop all keywords: {e}")
+                raise
+
+    tasks = [asyncio.create_task(run_keyword(keyword), name=keyword) for keyword in keywords if keyword]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,132 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 全局自适应限速器
+#            按 (平台, 接口) 维度的令牌桶，所有平台客户端的 request() 都先从这里拿令牌；
+#            速率按 AIMD 调整：请求成功线性加速，出现验证码、IP 封禁、账号风控等信号时成倍降速
+
+import asyncio
+import re
+import time
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+import config
+from tools import utils
+
+_ID_SEGMENT_PATTERN = re.compile(r"^(\d+|(?=[0-9a-zA-Z_-]*\d)[0-9a-zA-Z_-]{16,})$")
+
+
+class AdaptiveTokenBucket:
+    def __init__(self, name: str, rate: float, min_rate: float, max_rate: float, capacity: float,
+                 increase_step: float, decrease_factor: float):
+        """
+        Args:
+            name: 限速器名称，用于日志
+            rate: 初始速率（每秒令牌数）
+            min_rate: 最低速率
+            max_rate: 最高速率
+            capacity: 令牌桶容量，即允许的突发请求数
+            increase_step: 每次请求成功后速率的加性增量
+            decrease_factor: 被限流后速率的乘性系数
+        """
+        self.name = name
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.capacity = capacity
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """
+        获取一个令牌，令牌不足时等待；加锁保证等待中的请求按先来后到的顺序放行
+        :return:
+        """
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def on_success(self) -> None:
+        """
+        请求成功，线性提升速率
+        :return:
+        """
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttled(self) -> None:
+        """
+        出现验证码、IP 封禁等信号，成倍降低速率并清空已积攒的令牌
+        :return:
+        """
+        self._refill()
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self._tokens = min(self._tokens, 0)
+        utils.logger.warning(f"[AdaptiveTokenBucket.on_throttled] {self.name} throttled, rate decrease to {self.rate:.3f}/s")
+
+
+_rate_limiters: Dict[Tuple[str, str], AdaptiveTokenBucket] = {}
+
+
+def normalize_endpoint(url: str) -> str:
+    """
+    把 url 归一成接口名，路径中的 ID 段替换成占位符，避免每个笔记、用户都各自一个令牌桶
+    :param url: 请求地址
+    :return:
+    """
+    path = urlparse(url).path or "/"
+    return "/".join("{id}" if _ID_SEGMENT_PATTERN.match(segment) else segment for segment in path.split("/"))
+
+
+def _get_platform_setting(platform: str, name: str):
+    """
+    读取平台的限速配置，优先使用 RATE_LIMIT_PLATFORM_OVERRIDES 中的平台配置
+    :param platform: 平台名称
+    :param name: 配置名，不带 RATE_LIMIT_ 前缀
+    :return:
+    """
+    overrides = config.RATE_LIMIT_PLATFORM_OVERRIDES.get(platform, {})
+    return overrides.get(name, getattr(config, f"RATE_LIMIT_{name}"))
+
+
+def get_rate_limiter(platform: str, url: str) -> AdaptiveTokenBucket:
+    """
+    获取 (平台, 接口) 对应的限速器
+    :param platform: 平台名称，与 CrawlerFactory 中的平台名一致
+    :param url: 请求地址
+    :return:
+    """
+    key = (platform, normalize_endpoint(url))
+    limiter = _rate_limiters.get(key)
+    if limiter is None:
+        limiter = AdaptiveTokenBucket(
+            name=f"{platform}:{key[1]}",
+            rate=_get_platform_setting(platform, "INITIAL_QPS"),
+            min_rate=_get_platform_setting(platform, "MIN_QPS"),
+            max_rate=_get_platform_setting(platform, "MAX_QPS"),
+            capacity=_get_platform_setting(platform, "BURST"),
+            increase_step=config.RATE_LIMIT_INCREASE_STEP,
+            decrease_factor=config.RATE_LIMIT_DECREASE_FACTOR,
+        )
+        _rate_limiters[key] = limiter
+    return limiter
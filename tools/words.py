@@ -12,7 +12,10 @@
 import asyncio
 import json
 import logging
+import os
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
 
 import aiofiles
 import jieba
@@ -24,6 +27,36 @@ from tools import utils
 
 plot_lock = asyncio.Lock()
 
+# 分词子进程中使用的停用词，由 _init_cut_worker 在子进程启动时设置
+_worker_stop_words: Set[str] = set()
+
+
+def count_words(texts: List[str], stop_words: Iterable[str]) -> Counter:
+    """
+    对一批文本分词并统计词频
+    Args:
+        texts: 文本列表
+        stop_words: 停用词
+
+    Returns:
+
+    """
+    words = [word for word in jieba.lcut(' '.join(texts)) if word not in stop_words and len(word.strip()) > 0]
+    return Counter(words)
+
+
+def _init_cut_worker(custom_words: List[str], stop_words: Set[str]):
+    global _worker_stop_words
+    logging.getLogger('jieba').setLevel(logging.WARNING)
+    for word in custom_words:
+        jieba.add_word(word)
+    _worker_stop_words = stop_words
+
+
+def _count_words_in_worker(texts: List[str]) -> Counter:
+    return count_words(texts, _worker_stop_words)
+
+
 class AsyncWordCloudGenerator:
     def __init__(self):
         logging.getLogger('jieba').setLevel(logging.WARNING)
@@ -33,15 +66,105 @@ class AsyncWordCloudGenerator:
         self.custom_words = config.CUSTOM_WORDS
         for word, group in self.custom_words.items():
             jieba.add_word(word)
+        # 每个词频文件前缀对应一个累计的词频，新数据只对新增的文本分词
+        self._word_freq: Dict[str, Counter] = {}
+        self._dirty_prefixes: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._cut_executor: Optional[ProcessPoolExecutor] = None
 
     def load_stop_words(self):
         with open(self.stop_words_file, 'r', encoding='utf-8') as f:
             return set(f.read().strip().split('\n'))
 
+    def _load_word_freq(self, save_words_prefix: str) -> Counter:
+        # 当天的词频文件已存在时（爬虫重启）在其基础上继续累计
+        freq_file = f"{save_words_prefix}_word_freq.json"
+        if not os.path.exists(freq_file):
+            return Counter()
+        with open(freq_file, 'r', encoding='utf-8') as f:
+            return Counter(json.load(f))
+
+    async def _count_words(self, texts: List[str]) -> Counter:
+        loop = asyncio.get_running_loop()
+        if config.WORDCLOUD_CUT_PROCESS_NUM <= 0:
+            return await loop.run_in_executor(None, count_words, texts, self.stop_words)
+        if self._cut_executor is None:
+            self._cut_executor = ProcessPoolExecutor(
+                max_workers=config.WORDCLOUD_CUT_PROCESS_NUM,
+                initializer=_init_cut_worker,
+                initargs=(list(self.custom_words), self.stop_words),
+            )
+        return await loop.run_in_executor(self._cut_executor, _count_words_in_worker, texts)
+
+    async def add_items(self, data: List[Dict], save_words_prefix: str):
+        """
+        把新增数据的词频累加到对应前缀的词频中，分词在进程池中执行，
+        词频文件和词云图不立即写入，间隔 WORDCLOUD_FLUSH_INTERVAL 秒合并写一次
+        Args:
+            data: 新增的数据
+            save_words_prefix: 词频文件和词云图的路径前缀
+
+        Returns:
+
+        """
+        if save_words_prefix not in self._word_freq:
+            self._word_freq[save_words_prefix] = self._load_word_freq(save_words_prefix)
+        texts = [item['content'] for item in data if item.get('content')]
+        if not texts:
+            # 没有 content 字段的数据（如以 desc 为正文的内容）不影响词频，无需重新生成
+            return
+        self._word_freq[save_words_prefix].update(await self._count_words(texts))
+        self._dirty_prefixes.add(save_words_prefix)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(config.WORDCLOUD_FLUSH_INTERVAL)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            utils.logger.error(f"[AsyncWordCloudGenerator._flush_later] flush word cloud error: {e}")
+
+    async def flush(self):
+        """
+        把有新增数据的词频写入文件并重新生成词云图，单个前缀写入失败时记录日志，留到下次 flush 重试，不影响其他前缀
+        Returns:
+
+        """
+        async with self.lock:
+            prefixes, self._dirty_prefixes = self._dirty_prefixes, set()
+            for save_words_prefix in prefixes:
+                word_freq = self._word_freq[save_words_prefix]
+                try:
+                    freq_file = f"{save_words_prefix}_word_freq.json"
+                    async with aiofiles.open(freq_file, 'w', encoding='utf-8') as file:
+                        await file.write(json.dumps(word_freq, ensure_ascii=False, indent=4))
+                    if word_freq:
+                        # 分词后全是停用词时词频为空，WordCloud 无法生成图片
+                        await self.generate_word_cloud(word_freq, save_words_prefix)
+                except Exception as e:
+                    utils.logger.error(f"[AsyncWordCloudGenerator.flush] flush {save_words_prefix} error: {e}")
+                    self._dirty_prefixes.add(save_words_prefix)
+
+    async def close(self):
+        """
+        写完词频和词云图并关闭分词进程池，爬虫结束时调用
+        Returns:
+
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        try:
+            await self.flush()
+        finally:
+            if self._cut_executor is not None:
+                self._cut_executor.shutdown()
+                self._cut_executor = None
+
     async def generate_word_frequency_and_cloud(self, data, save_words_prefix):
-        all_text = ' '.join(item['content'] for item in data)
-        words = [word for word in jieba.lcut(all_text) if word not in self.stop_words and len(word.strip()) > 0]
-        word_freq = Counter(words)
+        word_freq = count_words([item['content'] for item in data], self.stop_words)
 
         # Save word frequency to file
         freq_file = f"{save_words_prefix}_word_freq.json"
@@ -56,7 +179,10 @@ class AsyncWordCloudGenerator:
         await self.generate_word_cloud(word_freq, save_words_prefix)
 
     async def generate_word_cloud(self, word_freq, save_words_prefix):
-        await plot_lock.acquire()
+        async with plot_lock:
+            self._plot_word_cloud(word_freq, save_words_prefix)
+
+    def _plot_word_cloud(self, word_freq, save_words_prefix):
         top_20_word_freq = {word: freq for word, freq in
                             sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
         wordcloud = WordCloud(
@@ -78,6 +204,4 @@ class AsyncWordCloudGenerator:
         plt.axis('off')
         plt.tight_layout(pad=0)
         plt.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)
-        plt.close()
-
-        plot_lock.release()
\ No newline at end of file
+        plt.close()
\ No newline at end of file